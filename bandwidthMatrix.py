@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+All-Pairs Bandwidth Matrix Analysis
+
+Turns the init_host,dest_host,bw rows of a pairwise sweep (*-summary.csv
+from osu_mb.sh osu_bw/osu_bibw or uniband.sh pairwise) into a node x node
+bandwidth matrix and looks for what is slow:
+
+    - nodes whose whole row (sending) or column (receiving) is low: the
+      node's HFI or cable
+    - edge switches whose pairs are low beyond what their nodes explain:
+      between its own nodes (the switch) or towards/from other edges
+      (its ISL uplinks)
+    - single pairs that remain low: a route-specific link
+
+The matrix is decomposed by median polish of log bandwidth into
+overall + sending node + receiving node + pair residual, and every part
+is scored with robust (median/MAD) z-scores, so a few bad links do not
+hide themselves by shifting the mean. Edge switches come from the same
+node -> edge mapping node_by_edge uses (fabricTopology.py hfi-edges).
+
+    ./bandwidthMatrix.py ${RUN_RSLT} --topology
+    ./bandwidthMatrix.py osu_bw-summary.csv --edges nodes_edges.csv --matrix matrix.csv
+"""
+
+import argparse
+import logging
+import sys
+import warnings
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+MAD_SCALE = 1.4826  # MAD of a normal distribution -> its standard deviation
+DEFAULT_Z = 3.5  # Iglewicz-Hoaglin cut-off for modified z-scores
+DEFAULT_MIN_DROP = 0.10  # Ignore "outliers" less than 10% below typical
+POLISH_ITERATIONS = 10
+POLISH_TOLERANCE = 1e-4  # Largest log change (0.01%) of a converged sweep
+DEFAULT_TOP = 10
+
+
+@dataclass
+class BandwidthMatrix:
+    """Pairwise bandwidth; bw[i, j] is init_host nodes[i] to dest_host nodes[j], NaN if not measured."""
+    nodes: List[str]
+    bw: np.ndarray
+
+
+@dataclass
+class Decomposition:
+    """log(bw[i, j]) = overall + send[i] + receive[j] + residual[i, j], by median polish."""
+    overall: float
+    send: np.ndarray
+    receive: np.ndarray
+    residual: np.ndarray
+
+
+@dataclass
+class Culprit:
+    """A suspected slow component and the low pairs it explains."""
+    kind: str  # node, edge switch, edge uplinks or pair
+    target: str
+    low_pairs: int  # Low pairs it explains
+    pairs: int  # Pairs it takes part in
+    ratio: float  # Its typical bandwidth relative to the fabric's
+    detail: str
+
+
+def load_summaries(paths: Sequence[str]) -> BandwidthMatrix:
+    """
+    Node x node matrix of one or more init_host,dest_host,bw CSVs.
+
+    Pairs measured in several files (repeated sweeps) get their median.
+    Nodes are sorted by name.
+    """
+    frames = [pd.read_csv(path, dtype={"init_host": str, "dest_host": str}) for path in paths]
+    rows = pd.concat(frames, ignore_index=True)
+    missing = {"init_host", "dest_host", "bw"} - set(rows.columns)
+    if missing:
+        raise ValueError(f"missing column(s) {', '.join(sorted(missing))}; expected init_host,dest_host,bw")
+    rows["bw"] = pd.to_numeric(rows["bw"], errors="coerce")
+    rows = rows.dropna(subset=["init_host", "dest_host"])
+    nodes, codes = np.unique(np.concatenate([rows["init_host"].to_numpy(str), rows["dest_host"].to_numpy(str)]),
+                             return_inverse=True)
+    src, dst = codes[:len(rows)], codes[len(rows):]
+    cell = src * len(nodes) + dst
+    # Median per cell across files; a failed run (empty bw) counts as missing
+    medians = pd.Series(rows["bw"].to_numpy()).groupby(cell).median()
+    bw = np.full(len(nodes) * len(nodes), np.nan)
+    bw[medians.index.to_numpy()] = medians.to_numpy()
+    bw = bw.reshape(len(nodes), len(nodes))
+    np.fill_diagonal(bw, np.nan)
+    return BandwidthMatrix(list(nodes), bw)
+
+
+def load_edges(path: str) -> Dict[str, str]:
+    """{node: edge switch} from node_by_edge's "node,edge" lines (fabricTopology.py hfi-edges)."""
+    edges = {}
+    with open(path, 'r') as f:
+        for line in f:
+            node, _, edge = line.strip().partition(',')
+            if node and edge:
+                edges.setdefault(node, edge)
+    return edges
+
+
+def nanmedian(values: np.ndarray, axis: int) -> np.ndarray:
+    """
+    np.nanmedian along an axis, by one sort of the whole array.
+
+    np.nanmedian falls back to a Python loop over rows when NaNs are
+    present, and the matrix diagonal always is NaN.
+    """
+    ordered = np.sort(values, axis=axis)  # NaNs sort last
+    valid = np.sum(~np.isnan(values), axis=axis, keepdims=True)
+    low = np.take_along_axis(ordered, np.maximum(valid - 1, 0) // 2, axis=axis)
+    high = np.take_along_axis(ordered, np.minimum(valid // 2, values.shape[axis] - 1), axis=axis)
+    return np.squeeze(np.where(valid > 0, (low + high) / 2, np.nan), axis=axis)
+
+
+def robust_z(values: np.ndarray) -> np.ndarray:
+    """(values - median) / (1.4826 * MAD) over all values, NaN-aware; a zero MAD counts as the smallest scale."""
+    median = np.nanmedian(values)
+    mad = MAD_SCALE * np.nanmedian(np.abs(values - median))
+    return (values - median) / max(mad, np.finfo(np.float64).tiny)
+
+
+def median_polish(matrix: BandwidthMatrix, iterations: int = POLISH_ITERATIONS) -> Decomposition:
+    """Tukey's median polish of log bandwidth, alternating row and column sweeps."""
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        # Unmeasured or zero pairs and all-NaN rows are simply left out
+        warnings.simplefilter("ignore", RuntimeWarning)
+        residual = np.log(np.where(matrix.bw > 0, matrix.bw, np.nan))
+        send = np.zeros(len(matrix.nodes))
+        receive = np.zeros(len(matrix.nodes))
+        overall = 0.0
+        for _ in range(iterations):
+            rows = np.nan_to_num(nanmedian(residual, axis=1))
+            residual -= rows[:, None]
+            send += rows
+            shift = np.median(receive)
+            receive -= shift
+            overall += shift
+            columns = np.nan_to_num(nanmedian(residual, axis=0))
+            residual -= columns[None, :]
+            receive += columns
+            shift = np.median(send)
+            send -= shift
+            overall += shift
+            if np.abs(rows).max(initial=0) < POLISH_TOLERANCE and np.abs(columns).max(initial=0) < POLISH_TOLERANCE:
+                break
+    return Decomposition(overall, send, receive, residual)
+
+
+def _edge_groups(nodes: List[str], edges: Dict[str, str]) -> Tuple[List[str], np.ndarray]:
+    """Edge switch names and the (node, edge) one-hot membership matrix; nodes without an edge get no column."""
+    names = sorted({edges[node] for node in nodes if node in edges})
+    column = {edge: i for i, edge in enumerate(names)}
+    member = np.zeros((len(nodes), len(names)))
+    for i, node in enumerate(nodes):
+        if node in edges:
+            member[i, column[edges[node]]] = 1
+    return names, member
+
+
+def find_culprits(matrix: BandwidthMatrix, edges: Optional[Dict[str, str]] = None, z: float = DEFAULT_Z,
+                  min_drop: float = DEFAULT_MIN_DROP) -> Tuple[List[Culprit], np.ndarray]:
+    """
+    Rank the components most likely to explain the low pairs.
+
+    A pair is low when its bandwidth is at least ``min_drop`` below the
+    fabric median and its log bandwidth is ``z`` robust deviations low.
+    Nodes are suspected from their send/receive effects, edge switches
+    from low residual pairs (what the nodes do not explain) inside the
+    edge or crossing its uplinks, and remaining low residual pairs are
+    listed on their own.
+
+    Args:
+        matrix: Pairwise bandwidth
+        edges: {node: edge switch}, e.g. from load_edges; None skips the edge analysis
+        z: Robust z-score cut-off
+        min_drop: Smallest relative drop that counts
+
+    Returns:
+        (culprits with the most explained low pairs first, (node, node) low pair mask)
+    """
+    polish = median_polish(matrix)
+    measured = ~np.isnan(matrix.bw)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = matrix.bw / np.nanmedian(matrix.bw)
+        logbw = np.log(np.where(matrix.bw > 0, matrix.bw, np.nan))
+        low = measured & (ratio <= 1 - min_drop) & (np.nan_to_num(robust_z(logbw), nan=-np.inf) < -z)
+        residual_low = low & (np.nan_to_num(robust_z(polish.residual), nan=-np.inf) < -z) \
+            & (np.exp(np.nan_to_num(polish.residual)) <= 1 - min_drop)
+    culprits = []
+
+    # Nodes: HFI or cable, seen in the whole row (sending) and/or column (receiving)
+    send_z, receive_z = robust_z(polish.send), robust_z(polish.receive)
+    send_low = (send_z < -z) & (np.exp(polish.send) <= 1 - min_drop)
+    receive_low = (receive_z < -z) & (np.exp(polish.receive) <= 1 - min_drop)
+    low_nodes = np.flatnonzero(send_low | receive_low)
+    explained = np.zeros_like(low)
+
+    edge_names, member = _edge_groups(matrix.nodes, edges or {})
+    if edge_names:
+        # An edge most of whose nodes look bad is one culprit, not many
+        node_edge = member.argmax(axis=1)
+        has_edge = member.any(axis=1)
+        bad_per_edge = np.bincount(node_edge[low_nodes][has_edge[low_nodes]], minlength=len(edge_names))
+        size_per_edge = member.sum(axis=0)
+        bad_edges = np.flatnonzero((bad_per_edge >= 2) & (bad_per_edge * 2 >= size_per_edge))
+        for e in bad_edges:
+            inside = member[:, e].astype(bool)
+            on_edge = low & (inside[:, None] | inside[None, :])
+            explained |= on_edge
+            typical = float(np.exp(min(np.median(polish.send[inside]), np.median(polish.receive[inside]))))
+            culprits.append(Culprit("edge uplinks" if not low[np.ix_(inside, inside)].any() else "edge switch",
+                                    edge_names[e], int(on_edge.sum()),
+                                    int((measured & (inside[:, None] | inside[None, :])).sum()), typical,
+                                    f"{bad_per_edge[e]} of {int(size_per_edge[e])} nodes low"))
+        low_nodes = low_nodes[~np.isin(node_edge[low_nodes], bad_edges) | ~has_edge[low_nodes]]
+
+    for i in low_nodes:
+        in_node = low[i, :] | low[:, i]
+        explained[i, :] |= low[i, :]
+        explained[:, i] |= low[:, i]
+        directions = [f"sends at {np.exp(polish.send[i]):.0%}" if send_low[i] else "",
+                      f"receives at {np.exp(polish.receive[i]):.0%}" if receive_low[i] else ""]
+        culprits.append(Culprit("node", matrix.nodes[i], int(in_node.sum()),
+                                int((measured[i, :] | measured[:, i]).sum()),
+                                float(np.exp(min(polish.send[i], polish.receive[i]))),
+                                " and ".join(d for d in directions if d)))
+
+    unexplained = residual_low & ~explained
+    if edge_names:
+        # Low residual pairs per (source edge, destination edge) block, as matrix products
+        pairs = member.T @ measured.astype(np.float64) @ member
+        intra, egress, ingress = np.diag(pairs), pairs.sum(axis=1) - np.diag(pairs), pairs.sum(axis=0) - np.diag(pairs)
+        rate = unexplained.sum() / max(1, measured.sum())
+        wheres = ("between its own nodes", "towards other edges", "from other edges")
+        while unexplained.any():
+            lows = member.T @ unexplained.astype(np.float64) @ member
+            counts = np.stack([np.diag(lows), lows.sum(axis=1) - np.diag(lows), lows.sum(axis=0) - np.diag(lows)])
+            totals = np.stack([intra, egress, ingress])
+            # Worth a culprit when several pairs are low and far more often than elsewhere
+            counts[(counts < 2) | (counts < 3 * rate * totals)] = 0
+            if not counts.any():
+                break
+            # The block explaining the most low pairs first, so no pair is blamed on two edges
+            block, e = np.unravel_index(np.argmax(counts), counts.shape)
+            inside = member[:, e].astype(bool)
+            rows, columns = (inside, inside) if block == 0 else (inside, ~inside) if block == 1 else (~inside, inside)
+            hit = unexplained & rows[:, None] & columns[None, :]
+            unexplained &= ~hit
+            count, total = int(counts[block, e]), int(totals[block, e])
+            culprits.append(Culprit("edge switch" if block == 0 else "edge uplinks", edge_names[e], count, total,
+                                    float(np.exp(np.nanmedian(polish.residual[hit]))),
+                                    f"{count} of {total} pairs low {wheres[block]}"))
+
+    # What is left: single slow pairs, a cable or ISL on that pair's route
+    for i, j in zip(*np.nonzero(unexplained)):
+        culprits.append(Culprit("pair", f"{matrix.nodes[i]} -> {matrix.nodes[j]}", 1, 1, float(ratio[i, j]),
+                                f"{matrix.bw[i, j]:.6g} vs median {np.nanmedian(matrix.bw):.6g}"))
+
+    culprits.sort(key=lambda c: (-c.low_pairs, c.ratio))
+    return culprits, low
+
+
+def format_report(matrix: BandwidthMatrix, culprits: List[Culprit], low: np.ndarray, top: int = DEFAULT_TOP,
+                  with_edges: bool = False) -> str:
+    """Compact text report of the matrix and its ranked culprits."""
+    measured = int((~np.isnan(matrix.bw)).sum())
+    n = len(matrix.nodes)
+    lines = [f"{n} nodes, {measured} of {n * (n - 1)} pairs measured, median {np.nanmedian(matrix.bw):.6g}, "
+             f"{int(low.sum())} low pairs"]
+    if not with_edges:
+        lines.append("No node -> edge mapping (--edges or --topology): edge switches and uplinks not analysed")
+    if not culprits:
+        lines.append("No slow nodes, edges or pairs found")
+        return "\n".join(lines)
+    rows = [["rank", "kind", "target", "low pairs", "bw ratio", "evidence"]]
+    for rank, culprit in enumerate(culprits[:top], 1):
+        rows.append([str(rank), culprit.kind, culprit.target, f"{culprit.low_pairs}/{culprit.pairs}",
+                     f"{culprit.ratio:.0%}", culprit.detail])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+    if len(culprits) > top:
+        lines.append(f"... {len(culprits) - top} more (--top)")
+    return "\n".join(lines)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Find slow nodes, edge switches, uplinks and pairs in an '
+                                                 'all-pairs bandwidth sweep')
+    parser.add_argument('summary', nargs='+',
+                        help='init_host,dest_host,bw CSVs (*-summary.csv); pairs in several files get their median')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--edges', default=None, metavar='FILE',
+                        help='node,edge lines as node_by_edge uses them (fabricTopology.py hfi-edges)')
+    source.add_argument('--topology', action='store_true',
+                        help='Take the node -> edge mapping from the fabric topology snapshot')
+    parser.add_argument('--z', type=float, default=DEFAULT_Z,
+                        help=f'Robust z-score cut-off (default: {DEFAULT_Z})')
+    parser.add_argument('--min-drop', type=float, default=DEFAULT_MIN_DROP,
+                        help=f'Smallest relative drop that counts as low (default: {DEFAULT_MIN_DROP})')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'Culprits to list (default: {DEFAULT_TOP})')
+    parser.add_argument('--matrix', default=None, metavar='CSV',
+                        help='Write the matrix (rows init_host, columns dest_host) to CSV')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        matrix = load_summaries(args.summary)
+        edges = None
+        if args.edges:
+            edges = load_edges(args.edges)
+        elif args.topology:
+            from fabricTopology import load_topology
+            edges = load_topology().edge_switch
+        if edges is not None:
+            unmapped = [node for node in matrix.nodes if node not in edges]
+            if unmapped:
+                logger.warning(f"{len(unmapped)} of {len(matrix.nodes)} nodes have no edge switch in the mapping, "
+                               f"e.g. {unmapped[0]}")
+        culprits, low = find_culprits(matrix, edges, args.z, args.min_drop)
+        print(format_report(matrix, culprits, low, args.top, bool(edges)))
+        if args.matrix:
+            pd.DataFrame(matrix.bw, index=pd.Index(matrix.nodes, name="init_host"),
+                         columns=matrix.nodes).to_csv(args.matrix, float_format='%.6g')
+            print(f"Written to {args.matrix}")
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
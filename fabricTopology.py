@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Fabric Topology Snapshot
+
+Every test launch rediscovers the same fabric: opa_fabric_switches runs
+``opareport -q`` three times, node_by_edge runs ``opaextractsellinks``
+and check_fgar/detect_algo run ``opaextractlids``. This module runs that
+discovery once and keeps the result in a snapshot file:
+
+    - switches, their ISL ports, LIDs and node descriptions
+    - the HFI -> edge switch mapping (node_by_edge's input)
+    - each switch's tier (1 for edge switches, +1 per ISL hop above them)
+    - the first switch LID (check_fgar/detect_algo)
+
+The snapshot is keyed by the fabric (the master SM's port GUID) and its
+topology generation (a hash of the SA link table). Both come from two
+cheap SA queries, which are re-run on each load: when the links change,
+the snapshot is rediscovered.
+
+    ./fabricTopology.py switches
+    ./fabricTopology.py isl-ports 0x00117501026a0f0e
+    ./fabricTopology.py hfi-edges
+    eval "$(./fabricTopology.py shell)"  # opa_fabric_switches' variables
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+CACHE_DIR_ENV_VAR = "FABRIC_TOPOLOGY_DIR"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "fabric_topology")
+HFI_NAME = "hfi1_0"  # node_by_edge only maps the first HFI of each node
+
+_GUID = re.compile(r'0x[0-9a-fA-F]+')
+_SM_PORT_GUID = re.compile(r'PortGuid:\s*(0x[0-9a-fA-F]+)')
+_MASTER_SM = re.compile(r'State:\s*Master')
+
+
+@dataclass
+class FabricTopology:
+    """Switches and ISLs as discovered by opa_fabric_switches in pmaCountersFromSwitch.sh, plus the HFI mapping."""
+    switches: List[str] = field(default_factory=list)  # Switch GUIDs in opareport order
+    isl_ports: Dict[str, List[str]] = field(default_factory=dict)
+    lids: Dict[str, str] = field(default_factory=dict)
+    descriptions: Dict[str, str] = field(default_factory=dict)
+    hfi_edges: List[str] = field(default_factory=list)  # node_by_edge's "node,edge" lines, unsorted
+    edge_switch: Dict[str, str] = field(default_factory=dict)  # HFI node name -> edge switch name
+    tiers: Dict[str, int] = field(default_factory=dict)  # Switch GUID -> tier, 1 = edge
+    switch_lid: str = ""  # First switch LID from opaextractlids
+
+
+@dataclass
+class OpaTools:
+    """Commands used for discovery, replaceable by scripts that print recorded output."""
+    opareport: str = "opareport"
+    opasaquery: str = "opasaquery"
+    opaextractsellinks: str = "opaextractsellinks"
+    opaextractlids: str = "opaextractlids"
+
+
+def _run(command: List[str]) -> Tuple[int, str]:
+    """Run a command and return its exit status and stdout; stderr goes to ours."""
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+    except OSError as e:
+        logger.warning(f"Cannot run {command[0]}: {e}")
+        return 127, ""
+    return result.returncode, result.stdout
+
+
+def parse_topology(report: str, islinks: str, lid_list: str) -> FabricTopology:
+    """
+    Build a FabricTopology from ``opareport -q``, ``-o islinks`` and ``-o lids`` output.
+
+    Uses the same text matching as opa_fabric_switches: switches are the
+    first field of lines containing "SW", a switch's ISLs are the third
+    field of islinks lines mentioning its GUID, its LID is the first field
+    of the matching lids line and its description is whatever follows "SW"
+    (leading space included).
+    """
+    topology = FabricTopology()
+    sw_lines = [line for line in report.splitlines() if "SW" in line]
+    topology.switches = [line.split()[0] for line in sw_lines if line.split()]
+    isl_lines = islinks.splitlines()
+    lid_lines = lid_list.splitlines()
+    for switch in topology.switches:
+        topology.isl_ports[switch] = [line.split()[2] for line in isl_lines
+                                      if switch in line and len(line.split()) > 2]
+        topology.lids[switch] = next((line.split()[0] for line in lid_lines if switch in line and line.split()), "")
+        topology.descriptions[switch] = next((line.split("SW")[1] for line in sw_lines if switch in line), "")
+    return topology
+
+
+def parse_isl_pairs(islinks: str) -> List[Tuple[str, str]]:
+    """(switch GUID, peer switch GUID) for each link in ``opareport -o islinks``, whose far end is on a "<->" line."""
+    pairs = []
+    near = None
+    for line in islinks.splitlines():
+        match = _GUID.search(line)
+        if match is None:
+            continue
+        if line.split()[0] == "<->" and near is not None:
+            pairs.append((near, match.group(0)))
+            near = None
+        else:
+            near = match.group(0)
+    return pairs
+
+
+def parse_hfi_edges(sellinks: str) -> Tuple[List[str], Dict[str, str], List[str]]:
+    """
+    HFI -> edge switch mapping from ``opaextractsellinks`` output.
+
+    Returns:
+        The "node,edge" lines node_by_edge builds with
+        ``awk -F';' '/hfi1_0/ {print $4,$NF}' | cut -d ' ' -f 1,3 | tr ' ' ','``,
+        the same mapping as {node: edge switch name}, and the GUIDs of
+        every switch with an HFI attached
+    """
+    lines = []
+    edge_switch = {}
+    edge_guids = []
+    for line in sellinks.splitlines():
+        fields = line.split(";")
+        if len(fields) >= 8 and {fields[2], fields[6]} == {"SW", "FI"}:
+            guid = fields[0] if fields[2] == "SW" else fields[4]
+            if guid not in edge_guids:
+                edge_guids.append(guid)
+        if HFI_NAME not in line:
+            continue
+        parts = f"{fields[3] if len(fields) > 3 else ''} {fields[-1]}".split(" ")
+        lines.append(",".join(parts[i] for i in (0, 2) if i < len(parts)))
+        if len(parts) > 2:
+            edge_switch.setdefault(parts[0], parts[2])
+    return lines, edge_switch, edge_guids
+
+
+def switch_tiers(switches: List[str], edge_guids: List[str], pairs: List[Tuple[str, str]]) -> Dict[str, int]:
+    """Tier of every switch reachable from an edge switch: 1 for edge switches, +1 per ISL hop."""
+    neighbours = {switch: set() for switch in switches}
+    for a, b in pairs:
+        neighbours.setdefault(a, set()).add(b)
+        neighbours.setdefault(b, set()).add(a)
+    tiers = {guid: 1 for guid in edge_guids if guid in neighbours}
+    frontier = list(tiers)
+    while frontier:
+        following = []
+        for guid in frontier:
+            for peer in neighbours[guid]:
+                if peer not in tiers:
+                    tiers[peer] = tiers[guid] + 1
+                    following.append(peer)
+        frontier = following
+    return tiers
+
+
+def fabric_key(tools: OpaTools = OpaTools()) -> Optional[Tuple[str, str]]:
+    """
+    (fabric, generation) of the fabric as the SA reports it now.
+
+    The fabric is the master SM's port GUID. The FM's sweep counter is not
+    visible from compute nodes, so the generation is a hash of the SA
+    link table, which changes whenever a link or node comes or goes.
+
+    Returns:
+        None if the SA cannot be queried
+    """
+    status, sminfo = _run([tools.opasaquery, "-o", "sminfo"])
+    if status != 0:
+        return None
+    guids = _SM_PORT_GUID.findall(sminfo)
+    records = sminfo.split("SMInfoRecord")
+    master = next((_SM_PORT_GUID.search(record).group(1) for record in records
+                   if _MASTER_SM.search(record) and _SM_PORT_GUID.search(record)), None)
+    fabric = master or (guids[0] if guids else None)
+    status, links = _run([tools.opasaquery, "-o", "link"])
+    if fabric is None or status != 0:
+        return None
+    return fabric.lower(), hashlib.sha256(links.encode('utf-8')).hexdigest()
+
+
+def discover_topology(tools: OpaTools = OpaTools()) -> Tuple[FabricTopology, bool]:
+    """
+    Query the fabric manager for switches, ISLs, LIDs and the HFI mapping.
+
+    The five tools run concurrently. opareport must succeed; a failing
+    opaextractsellinks or opaextractlids only leaves its part empty.
+
+    Returns:
+        The topology, and whether every tool succeeded (a partial topology
+        must not be cached)
+    """
+    commands = {
+        "report": [tools.opareport, "-q"],
+        "islinks": [tools.opareport, "-q", "-o", "islinks"],
+        "lids": [tools.opareport, "-q", "-o", "lids"],
+        "sellinks": [tools.opaextractsellinks],
+        "extractlids": [tools.opaextractlids],
+    }
+    with ThreadPoolExecutor(max_workers=len(commands)) as pool:
+        results = dict(zip(commands, pool.map(_run, commands.values())))
+    for name in ("report", "islinks", "lids"):
+        status, _ = results[name]
+        if status != 0:
+            raise RuntimeError(f"'{' '.join(commands[name])}' exited with status {status}; is the FM running?")
+    complete = True
+    for name in ("sellinks", "extractlids"):
+        if results[name][0] != 0:
+            logger.warning(f"'{' '.join(commands[name])}' exited with status {results[name][0]}; "
+                           "its part of the topology is left empty")
+            complete = False
+
+    topology = parse_topology(results["report"][1], results["islinks"][1], results["lids"][1])
+    topology.hfi_edges, topology.edge_switch, edge_guids = parse_hfi_edges(results["sellinks"][1])
+    topology.tiers = switch_tiers(topology.switches, edge_guids, parse_isl_pairs(results["islinks"][1]))
+    # check_fgar: opaextractlids |& awk -F';' '/SW/ {print $NF}' | head -1
+    topology.switch_lid = next((line.split(";")[-1] for line in results["extractlids"][1].splitlines()
+                                if "SW" in line), "")
+    return topology, complete
+
+
+def _snapshot_path(cache_dir: str, fabric: str) -> str:
+    return os.path.join(cache_dir, f"{fabric}.json")
+
+
+def _read_snapshot(path: str) -> Optional[Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+    return snapshot if snapshot.get("version") == SNAPSHOT_VERSION else None
+
+
+def _write_snapshot(path: str, snapshot: Dict) -> None:
+    """Write atomically so concurrent launches never read a partial snapshot."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.fchmod(fd, 0o644)  # mkstemp creates 0600; the directory may be shared
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as snapshot_file:
+            json.dump(snapshot, snapshot_file, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_topology(tools: OpaTools = OpaTools(), cache_dir: Optional[str] = None,
+                  refresh: bool = False) -> FabricTopology:
+    """
+    The fabric topology, from the snapshot when it is still current.
+
+    Args:
+        tools: Discovery and SA query commands
+        cache_dir: Snapshot directory (default: $FABRIC_TOPOLOGY_DIR or ~/.cache/fabric_topology)
+        refresh: Rediscover even if the snapshot is current
+
+    Returns:
+        FabricTopology: The snapshot's or a freshly discovered topology. If
+            the SA cannot be queried or a discovery tool fails, the topology
+            is discovered and not cached.
+
+    Raises:
+        RuntimeError: If discovery is needed and opareport fails
+    """
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV_VAR) or DEFAULT_CACHE_DIR
+    key = fabric_key(tools)
+    if key is None:
+        logger.warning("Cannot query the SA for the fabric generation; discovering without the snapshot")
+        return discover_topology(tools)[0]
+    fabric, generation = key
+    path = _snapshot_path(cache_dir, fabric)
+    if not refresh:
+        snapshot = _read_snapshot(path)
+        if snapshot is not None and snapshot.get("generation") == generation:
+            return FabricTopology(**snapshot["topology"])
+        if snapshot is not None:
+            logger.info(f"Fabric {fabric} changed since {snapshot.get('created')}; rediscovering")
+
+    topology, complete = discover_topology(tools)
+    if not complete:
+        logger.warning("Not saving the topology snapshot: part of the discovery failed")
+        return topology
+    try:
+        _write_snapshot(path, {"version": SNAPSHOT_VERSION, "fabric": fabric, "generation": generation,
+                               "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "topology": asdict(topology)})
+    except OSError as e:
+        logger.warning(f"Cannot save the topology snapshot to {path}: {e}")
+    return topology
+
+
+def shell_variables(topology: FabricTopology) -> str:
+    """
+    Bash assignments reproducing the variables opa_fabric_switches sets.
+
+    ``switches`` and each ``isl_list`` entry are space separated with a
+    trailing space, as ``tr '\\n' ' '`` leaves them.
+    """
+    lines = [f"switches={shlex.quote(''.join(f'{switch} ' for switch in topology.switches))}"]
+    for switch in topology.switches:
+        key = shlex.quote(switch)
+        lines.append(f"isl_list[{key}]={shlex.quote(''.join(f'{port} ' for port in topology.isl_ports[switch]))}")
+        lines.append(f"sw_lids[{key}]={shlex.quote(topology.lids[switch])}")
+        lines.append(f"node_desc[{key}]={shlex.quote(topology.descriptions[switch])}")
+    return "\n".join(lines)
+
+
+QUERIES = ("switches", "isl-ports", "lid", "description", "tier", "hfi-edges", "edge", "switch-lid", "shell")
+
+
+def answer(topology: FabricTopology, query: str, key: Optional[str] = None) -> str:
+    """
+    Text answer to one CLI query.
+
+    Raises:
+        KeyError: If ``key`` is not in the topology
+        ValueError: If the query needs a key and none was given
+    """
+    lookups = {
+        "isl-ports": lambda guid: " ".join(topology.isl_ports[guid]),
+        "lid": lambda guid: topology.lids[guid],
+        "description": lambda guid: topology.descriptions[guid],
+        "tier": lambda guid: str(topology.tiers[guid]),
+        "edge": lambda node: topology.edge_switch[node],
+    }
+    if query in lookups:
+        if key is None:
+            raise ValueError(f"'{query}' needs a switch GUID or node name")
+        return lookups[query](key)
+    if query == "switches":
+        return "\n".join(topology.switches)
+    if query == "hfi-edges":
+        return "\n".join(topology.hfi_edges)
+    if query == "switch-lid":
+        return topology.switch_lid
+    return shell_variables(topology)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Serve the fabric topology from a snapshot that is rediscovered '
+                                                 'only when the fabric changes')
+    parser.add_argument('query', choices=QUERIES,
+                        help="What to print; 'shell' prints bash assignments of opa_fabric_switches' variables")
+    parser.add_argument('key', nargs='?', default=None, help='Switch GUID, or node name for edge')
+    parser.add_argument('--cache-dir', default=None, metavar='DIR',
+                        help=f'Snapshot directory (default: ${CACHE_DIR_ENV_VAR} or {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--refresh', action='store_true', help='Rediscover the fabric even if the snapshot is current')
+    for tool in OpaTools.__dataclass_fields__:
+        parser.add_argument(f'--{tool}', default=tool, metavar='PATH',
+                            help=f'{tool} to run, e.g. a script replaying recorded output')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    tools = OpaTools(*(getattr(args, tool) for tool in OpaTools.__dataclass_fields__))
+    try:
+        topology = load_topology(tools, args.cache_dir, args.refresh)
+        output = answer(topology, args.query, args.key)
+    except KeyError as e:
+        print(f"Error: {e.args[0]} is not in the fabric topology", file=sys.stderr)
+        sys.exit(1)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not output:
+        # Lets the shell fall back to the OPA tools (fabric_topology ... || opaextractlids ...)
+        print(f"Error: the fabric topology has no {args.query}", file=sys.stderr)
+        sys.exit(1)
+    print(output)
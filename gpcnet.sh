@@ -61,9 +61,11 @@ RUNDIR=${LOGDIR}/${COMPILER}_${MPI}-${THEDATE}-${NAME}
 mkcd $RUNDIR
 
 if [[ $PROFILE == 'true' ]]; then
-    PROFILER=$THISDIR/pmaCountersFromSwitch.sh
+    # Streams each sample to disk, so the samples taken so far survive the job ending first
+    PROFILER="$THISDIR/pmaCounterCollector.py --stream"
     PROFILER_FIELDS="Xmit Pkts, Rcv Pkts, Xmit Time Cong, Xmit Wait, Rcv Bubble"
-    $PROFILER 0 3 30 10 $PROFILER_FIELDS $SWITCH_COUNTER_OUT $SWITCH_COUNTER_RAW &
+    $PROFILER 0 3 30 10 "$PROFILER_FIELDS" $SWITCH_COUNTER_OUT $SWITCH_COUNTER_RAW &
+    PROFILER_PID=$!
 fi
 
 run_test() {
@@ -90,6 +92,7 @@ if [[ $TEST =~ 'network_load_test' ]]; then
 fi
 
 if [[ $PROFILE == 'true' ]]; then opa_counter >> $NIC_COUNTER_OUT; fi
+stop_profiler
 
 GPCNET_RSLT=${RUN_RSLT//.csv/}
 $THISDIR/parse_gpcnet.py $RUN_LOG --output=$GPCNET_RSLT
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+GPCNET Cross-Run Comparison
+
+Groups many GPCNET runs by FM algorithm (or any other test_info entry)
+within one test configuration, and compares every table cell between
+two groups: for each (test, table, name, metric) the group means get
+bootstrap confidence intervals, and the relative change between the
+groups is flagged as a regression or improvement when its interval
+excludes zero.
+
+Usage: python gpcnet_compare.py <logs, dirs, globs or parse_gpcnet csv/npz> --baseline sdr [--candidate fgar]
+
+Latency and congestion impact factors are better when lower, bandwidths
+(units per second) when higher. Bootstrap resampling runs as array math
+over all cells at once, in chunks of bounded memory.
+"""
+
+import argparse
+import logging
+import math
+import os
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from parse_gpcnet import LONG_COLUMNS, LOG_PATTERN, parse_gpcnet_logs, read_columnar
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP_BY = "FMALGO"
+DEFAULT_CONFIG = ("NNODES", "PROCS_PER_NODE")
+DEFAULT_TEST = "network_load_test"
+# Avg(Worst) and 99% of the latency/BW tables; Avg and 99% also cover the Key Results impact factors
+DEFAULT_METRICS = ("Avg", "Avg(Worst)", "99%")
+CELL_COLUMNS = ("test", "table", "name", "metric", "unit")
+TABLE_EXTENSIONS = (".csv", ".npz")
+BOOTSTRAP_CHUNK = 1 << 22  # Resampled values held at once
+
+
+def load_results(paths: Sequence[str], jobs: int = 1) -> pd.DataFrame:
+    """
+    Long-format GPCNET rows of logs and of parse_gpcnet.py csv/npz tables.
+
+    Args:
+        paths: parse_gpcnet long tables (.csv, .npz) and logs, directories or globs
+        jobs: Worker processes for parsing logs
+
+    Returns:
+        One row per (run, test, table, name, metric) with a float ``value``
+    """
+    frames = []
+    logs = [path for path in paths if not path.endswith(TABLE_EXTENSIONS)]
+    if logs:
+        _, rows = parse_gpcnet_logs(logs, jobs)
+        frames.append(pd.DataFrame(rows))
+    for path in paths:
+        if path.endswith(".npz"):
+            frames.append(pd.DataFrame(read_columnar(path)))
+        elif path.endswith(".csv"):
+            frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+            frame["value"] = pd.to_numeric(frame["value"], errors="coerce")
+            frames.append(frame)
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=list(LONG_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def higher_is_better(units: pd.Series) -> np.ndarray:
+    """True for rates (MiB/s/rank, GB/s, ...); latencies and impact factors (X) are better lower."""
+    return units.str.contains("/s", regex=False).to_numpy()
+
+
+def bootstrap_means(samples: np.ndarray, counts: np.ndarray, resamples: int,
+                    rng: np.random.Generator) -> np.ndarray:
+    """
+    Bootstrap distribution of the mean of each row of a padded sample matrix.
+
+    Args:
+        samples: (cells, width) values; row i holds counts[i] values, then padding
+        counts: Sample size of each row, at least 1
+        resamples: Bootstrap resamples per row
+        rng: Random generator
+
+    Returns:
+        (cells, resamples) resampled means
+    """
+    cells, width = samples.shape
+    means = np.empty((cells, resamples))
+    step = max(1, BOOTSTRAP_CHUNK // max(1, resamples * width))
+    for start in range(0, cells, step):
+        rows = slice(start, start + step)
+        n = counts[rows]
+        # Draw counts[i] indices below counts[i] per resample; draws past counts[i] are masked out
+        picks = (rng.random((len(n), resamples, width)) * n[:, None, None]).astype(np.intp)
+        drawn = np.take_along_axis(samples[rows][:, None, :], picks, axis=2)
+        drawn *= (np.arange(width) < n[:, None])[:, None, :]
+        means[rows] = drawn.sum(axis=2) / n[:, None]
+    return means
+
+
+def _padded(values: pd.Series, cell: np.ndarray, cells: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(cells, max count) matrix of values by cell index, zero padded, and the count per cell."""
+    counts = np.bincount(cell, minlength=cells)
+    order = np.argsort(cell, kind="stable")
+    position = np.arange(len(cell)) - np.repeat(np.cumsum(counts) - counts, counts)
+    matrix = np.zeros((cells, max(1, counts.max(initial=0))))
+    matrix[cell[order], position] = values.to_numpy()[order]
+    return matrix, counts
+
+
+def compare_groups(results: pd.DataFrame, baseline: str, candidate: str, group_by: str = DEFAULT_GROUP_BY,
+                   config: Sequence[str] = DEFAULT_CONFIG, resamples: int = 2000, confidence: float = 0.95,
+                   threshold: float = 0.0, min_runs: int = 2, seed: int = 0) -> pd.DataFrame:
+    """
+    Compare every result cell of the candidate group of runs against the baseline group.
+
+    Args:
+        results: Long-format rows, see load_results
+        baseline, candidate: Values of the group_by column
+        group_by: test_info entry that defines the groups, e.g. FMALGO
+        config: test_info entries that must match for runs to be compared
+        resamples: Bootstrap resamples
+        confidence: Confidence level of the intervals
+        threshold: Smallest relative change (0.05 = 5%) that is flagged
+        min_runs: Cells with fewer runs in either group are left out
+        seed: Random seed, for reproducible intervals
+
+    Returns:
+        One row per compared cell: configuration, cell columns, run count,
+        mean and interval of the baseline_* and candidate_* groups, the
+        relative change and its interval, and the verdict (regression,
+        improvement or an empty string)
+    """
+    config = [column for column in config if column in results.columns]
+    keys = config + list(CELL_COLUMNS)
+    selected = results[results[group_by].isin([baseline, candidate]) & results["value"].notna()]
+    # One value per run and cell; a cell repeated within a run is averaged
+    per_run = selected.groupby(keys + [group_by, "run"], sort=False, dropna=False)["value"].mean().reset_index()
+
+    sizes = per_run.groupby(keys + [group_by], sort=False, dropna=False).size().unstack(group_by)
+    both = sizes.reindex(columns=[baseline, candidate]).fillna(0)
+    cells = both[(both[baseline] >= min_runs) & (both[candidate] >= min_runs)].index
+    report = cells.to_frame(index=False)
+    if report.empty:
+        return report
+
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    means, boots = {}, {}
+    for side, group in (("baseline", baseline), ("candidate", candidate)):
+        rows = per_run[per_run[group_by] == group].set_index(keys)
+        cell = cells.get_indexer(rows.index)
+        matrix, counts = _padded(rows["value"][cell >= 0], cell[cell >= 0], len(cells))
+        means[side] = matrix.sum(axis=1) / counts
+        boots[side] = bootstrap_means(matrix, counts, resamples, rng)
+        report[f"{side}_runs"] = counts
+        report[f"{side}_mean"] = means[side]
+        report[f"{side}_low"], report[f"{side}_high"] = np.quantile(boots[side], [alpha, 1 - alpha], axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = (means["candidate"] - means["baseline"]) / np.abs(means["baseline"])
+        boot_change = (boots["candidate"] - boots["baseline"]) / np.abs(boots["baseline"])
+    low, high = np.nanquantile(boot_change, [alpha, 1 - alpha], axis=1)
+
+    better = np.where(higher_is_better(report["unit"]), change, -change)
+    significant = ((low > 0) | (high < 0)) & (np.abs(change) >= threshold)
+    report["change"] = change
+    report["change_low"] = low
+    report["change_high"] = high
+    report["verdict"] = np.where(significant, np.where(better > 0, "improvement", "regression"), "")
+    return report
+
+
+def format_report(report: pd.DataFrame, baseline: str, candidate: str, group_by: str,
+                  config: Sequence[str], confidence: float, significant_only: bool = False) -> str:
+    """Compact text report: one line per cell, regressions first, largest changes first."""
+    config = [column for column in config if column in report.columns]
+    flagged = report["verdict"] != ""
+    lines = [f"{group_by}: {candidate} vs baseline {baseline}, {confidence:.0%} bootstrap intervals - "
+             f"{len(report)} cells, {(report['verdict'] == 'regression').sum()} regressions, "
+             f"{(report['verdict'] == 'improvement').sum()} improvements"]
+    if significant_only:
+        report = report[flagged]
+    if report.empty:
+        return "\n".join(lines)
+
+    order = report.assign(_rank=report["verdict"].map({"regression": 0, "improvement": 1}).fillna(2),
+                          _size=-report["change"].abs())
+    order = order.sort_values(config + ["test", "_rank", "_size"], kind="stable")
+    rows = []
+    for _, row in order.iterrows():
+        setup = " ".join(f"{column}={row[column]}" for column in config)
+        rows.append([
+            setup, row["test"], row["table"], row["name"], row["metric"], row["unit"],
+            f"{row['baseline_runs']}/{row['candidate_runs']}",
+            *(f"{row[side + '_mean']:.4g} [{row[side + '_low']:.4g}, {row[side + '_high']:.4g}]"
+              for side in ("baseline", "candidate")),
+            f"{_percent(row['change'])} [{_percent(row['change_low'])}, {_percent(row['change_high'])}]",
+            row["verdict"].upper(),
+        ])
+    header = ["config", "test", "table", "name", "metric", "unit", "runs",
+              baseline, candidate, "change", "verdict"]
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header] + rows:
+        lines.append("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)).rstrip())
+    return "\n".join(lines)
+
+
+def _percent(fraction: float) -> str:
+    return "n/a" if not math.isfinite(fraction) else f"{fraction:+.1%}"
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Compare GPCNET results between two groups of runs '
+                                                 'with bootstrap confidence intervals')
+    parser.add_argument('inputs', nargs='+',
+                        help=f'GPCNET logs, directories (searched for {LOG_PATTERN}), globs, '
+                             'or long tables written by parse_gpcnet.py (.csv, .npz)')
+    parser.add_argument('--baseline', required=True, help='Group the others are compared against, e.g. sdr')
+    parser.add_argument('--candidate', default=None,
+                        help='Group to compare (default: every other group, one report each)')
+    parser.add_argument('--group-by', default=DEFAULT_GROUP_BY,
+                        help=f'test_info entry defining the groups (default: {DEFAULT_GROUP_BY})')
+    parser.add_argument('--config', default=",".join(DEFAULT_CONFIG),
+                        help='Comma-separated test_info entries that must match for runs to be compared '
+                             f'(default: {",".join(DEFAULT_CONFIG)})')
+    parser.add_argument('--test', default=DEFAULT_TEST,
+                        help=f"GPCNET binary whose tables are compared, or 'all' (default: {DEFAULT_TEST})")
+    parser.add_argument('--metrics', default=",".join(DEFAULT_METRICS),
+                        help=f'Comma-separated table columns to compare (default: {",".join(DEFAULT_METRICS)})')
+    parser.add_argument('--resamples', type=int, default=2000, help='Bootstrap resamples (default: 2000)')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Interval confidence (default: 0.95)')
+    parser.add_argument('--threshold', type=float, default=0.0,
+                        help='Smallest relative change flagged, e.g. 0.05 for 5%% (default: 0)')
+    parser.add_argument('--min-runs', type=int, default=2,
+                        help='Runs each group needs for a cell to be compared (default: 2)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--significant-only', action='store_true', help='Only list flagged cells')
+    parser.add_argument('--output', default=None, metavar='CSV', help='Also write every compared cell to CSV')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help='Parse logs on N worker processes (default: one per CPU)')
+    args = parser.parse_args(argv)
+    if args.resamples < 1 or args.min_runs < 1 or args.jobs < 1:
+        parser.error('--resamples, --min-runs and --jobs must be at least 1')
+    if not 0 < args.confidence < 1:
+        parser.error('--confidence must be between 0 and 1')
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    config = [column for column in args.config.split(",") if column]
+    results = load_results(args.inputs, args.jobs)
+    if results.empty:
+        raise ValueError("no GPCNET results found")
+    if args.group_by not in results.columns:
+        raise ValueError(f"no run has a {args.group_by} entry")
+
+    if args.test != "all":
+        results = results[results["test"] == args.test]
+    results = results[results["metric"].isin(args.metrics.split(","))]
+    groups = sorted(results[args.group_by].dropna().unique())
+    if args.baseline not in groups:
+        raise ValueError(f"no {args.test} results with {args.group_by}={args.baseline}; "
+                         f"groups: {', '.join(groups) or 'none'}")
+    candidates = [args.candidate] if args.candidate else [group for group in groups if group != args.baseline]
+
+    reports = []
+    for candidate in candidates:
+        report = compare_groups(results, args.baseline, candidate, args.group_by, config, args.resamples,
+                                args.confidence, args.threshold, args.min_runs, args.seed)
+        if report.empty:
+            print(f"{args.group_by}: {candidate} vs baseline {args.baseline} - no cells with "
+                  f"{args.min_runs}+ runs in both groups\n")
+            continue
+        print(format_report(report, args.baseline, candidate, args.group_by, config, args.confidence,
+                            args.significant_only) + "\n")
+        reports.append(report.assign(baseline=args.baseline, candidate=candidate))
+
+    if args.output and reports:
+        pd.concat(reports, ignore_index=True).to_csv(args.output, index=False)
+        print(f"Written to {args.output}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+OSU Totaltable Assembler - Builds the wide totaltable from long-format results
+Usage: python osuTotaltable.py <long.csv> <totaltable.csv>
+
+osu_mb.sh appends the full osu_bw/osu_bibw output of every pair to a
+per-run long file, one "column,size,bandwidth" line per message size
+(append_full_rslt), instead of pasting a column onto the whole table for
+each pair. This script turns that file into the totaltable layout that
+parse_osumb.py reads, in one pass:
+
+    Size,<hi>-<h>,<hi>-<h>,...
+    4,<bw>,<bw>,...
+
+Columns keep the order in which the pairs ran, sizes are sorted, and a
+size a pair did not report is left empty. It runs at the end of the sweep,
+and can be run on demand against the long file of a sweep still in
+progress.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from typing import List, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def read_long(long_path: str) -> Tuple[List[str], List[str], List[List[str]]]:
+    """
+    Read a long-format result file.
+
+    A new column starts whenever the column name differs from the line
+    before, so a pair measured twice gets two columns, as the pasted
+    table had.
+
+    Args:
+        long_path: File of "column,size,bandwidth" lines
+
+    Returns:
+        Column names, sizes in file order, and for each size the values of
+        the columns up to the last one reporting it
+    """
+    columns: List[str] = []
+    sizes: List[str] = []
+    rows: List[List[str]] = []
+    row_of = {}
+    skipped = 0
+    with open(long_path, 'r', encoding='utf-8') as long_file:
+        for line in long_file:
+            fields = line.rstrip('\n').split(',')
+            if len(fields) != 3 or not fields[1].isdigit():
+                # A sweep still running may be writing the last line
+                skipped += 1
+                continue
+            column, size, value = fields
+            if not columns or column != columns[-1]:
+                columns.append(column)
+            index = row_of.get(size)
+            if index is None:
+                index = row_of[size] = len(rows)
+                sizes.append(size)
+                rows.append([])
+            row = rows[index]
+            if len(row) == len(columns):
+                row[-1] = value
+                continue
+            row.extend([''] * (len(columns) - 1 - len(row)))
+            row.append(value)
+    if skipped:
+        logger.warning(f"Skipped {skipped} malformed lines in {long_path}")
+    return columns, sizes, rows
+
+
+def write_totaltable(long_path: str, csv_path: str) -> int:
+    """
+    Write the wide totaltable of a long-format result file.
+
+    The table is written to a temporary file and renamed, so readers never
+    see a partial table.
+
+    Args:
+        long_path: File of "column,size,bandwidth" lines
+        csv_path: Totaltable to write
+
+    Returns:
+        int: Number of pair columns written; nothing is written for an empty file
+    """
+    columns, sizes, rows = read_long(long_path)
+    if not columns:
+        return 0
+    out_dir = os.path.dirname(os.path.abspath(csv_path))
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    os.fchmod(fd, 0o644)  # mkstemp creates 0600
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as table:
+            table.write(",".join(["Size"] + columns) + "\n")
+            for index in sorted(range(len(sizes)), key=lambda i: int(sizes[i])):
+                row = rows[index]
+                table.write(",".join([sizes[index]] + row + [''] * (len(columns) - len(row))) + "\n")
+        os.replace(tmp_path, csv_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(columns)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Assemble the wide OSU totaltable from long-format '
+                                                 '"column,size,bandwidth" results')
+    parser.add_argument('long_file', help='Long-format results appended by osu_mb.sh')
+    parser.add_argument('totaltable', help='Totaltable CSV to write (e.g. <TESTID>-totaltable.csv)')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        write_totaltable(args.long_file, args.totaltable)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -13,22 +13,19 @@ link_executables() {
     # cd $olddir
 }
 
-# SAVE FULL OSU_BW output to columns of csv.
-save_full_rslt() {
+# SAVE FULL OSU_BW output: append a pair's "column,size,bandwidth" lines to the
+# run's long-format file (RUN_RSLT_LONG) without touching the results so far.
+append_full_rslt() {
     fulloutput=$1
-    result_csv=$2
-    header=$3
-    tmp_file=/tmp/output_osu.tmp
-    echo $header > $tmp_file
-    
-    awk '/# Size.*Bandwidth/ {flag=1; next} flag && /^[0-9]+[[:space:]]+[0-9.]+/ {print $1","$2}' "$fulloutput" >> $tmp_file
-    if [[ -f $result_csv ]]; then
-        paste -d',' "$result_csv" <(cat $tmp_file | cut -d',' -f2) > ${tmp_file}.2
-        mv ${tmp_file}.2 ${tmp_file}
-    fi
+    column=$2
+    awk -v column="$column" '/# Size.*Bandwidth/ {flag=1; next} flag && /^[0-9]+[[:space:]]+[0-9.]+/ {print column","$1","$2}' "$fulloutput" >> $RUN_RSLT_LONG
+}
 
-    mv $tmp_file $result_csv
-    rm -rf ${tmp_file} ${tmp_file}.2
+# Assemble the wide totaltable (Size plus a column per pair) from the long-format file in one pass.
+write_full_rslt() {
+    if [[ -s $RUN_RSLT_LONG ]]; then
+        python3 ${THISDIR}/osuTotaltable.py $RUN_RSLT_LONG $RUN_RSLT_FULL
+    fi
 }
 
 THISFILE=${BASH_SOURCE[0]}
@@ -59,6 +56,9 @@ universal_opts
 : ${SIZE_MAX:=67108864}
 : ${VALIDATE:=false}
 : ${HISET:=''} # SET NODE TO TEST AGAINST ALL OTHER NODES.
+: ${CONCURRENT_PAIRS:=false} # RUN NODE-DISJOINT PAIRS OF osu_bw/osu_bibw AT ONCE.
+: ${AVOID_SHARED_LINKS:=false} # ALSO KEEP PAIRS SHARING AN ISL APART.
+: ${MAX_PAIRS:=0} # MOST PAIRS AT ONCE, 0 FOR NO LIMIT.
 
 mkdir -p $LOGDIR
 
@@ -102,9 +102,11 @@ set_mpi_flags $NNODES $PPN
 set_logs $TEST "NNODES: $NNODES - PROCS_PER_NODE: $PPN"
 
 if [[ $PROFILE == 'true' ]]; then
-    PROFILER=$THISDIR/pmaCountersFromSwitch.sh
+    # Streams each sample to disk, so the samples taken so far survive the job ending first
+    PROFILER="$THISDIR/pmaCounterCollector.py --stream"
     PROFILER_FIELDS="Xmit Pkts, Rcv Pkts, Xmit Time Cong, Xmit Wait, Rcv Bubble"
-    $PROFILER 0 3 30 10 $PROFILER_FIELDS $SWITCH_COUNTER_OUT $SWITCH_COUNTER_RAW &
+    $PROFILER 0 3 30 10 "$PROFILER_FIELDS" $SWITCH_COUNTER_OUT $SWITCH_COUNTER_RAW &
+    PROFILER_PID=$!
 fi
 
 : ${HISET:=$NODELIST}
@@ -114,28 +116,55 @@ if [[ $TEST == osu_bw || $TEST == osu_bibw ]]; then
         rm -f $RUN_LOG
         exit 1
     fi
+    sched_opts=""
+    if [[ $TEST == osu_bibw ]]; then sched_opts="--bidirectional"; fi
+    rounds=$(pair_rounds $sched_opts) || { echo "ERROR: cannot schedule the ${TEST} pairs"; exit 1; }
+    mapfile -t ROUNDS <<< "$rounds"
     echo "init_host,dest_host,bw" > $RUN_RSLT
-    for hi in $HISET; do
-        echo "${TEST^^} - $hi"
+    export RUN_RSLT_LONG=$(mktemp ${TMPDIR:-/tmp}/${NAME}_totaltable.XXXXXX)
+    echo "Full results accumulate in ${RUN_RSLT_LONG}"
+    # Also on failure, so the pairs measured so far are kept
+    trap 'stop_profiler; write_full_rslt && rm -f $RUN_RSLT_LONG' EXIT
+    for k in ${!ROUNDS[@]}; do
+        pairs=(${ROUNDS[$k]})
+        echo "${TEST^^} - round $(( k+1 ))/${#ROUNDS[@]}: ${#pairs[@]} pairs"
         si=${SECONDS}
-        for h in $NODELIST; do
-            if [[ $h == $hi ]]; then continue; fi
+        pids=()
+        for pair in ${pairs[@]}; do
+            hi=${pair%,*}
+            h=${pair#*,}
             echo "$hi,$h"
+            mpirun ${RUN_ARGS} -host "${hi},${h}" ${CMD} ${CMD_ARGS} &> ${RUN_TMP}-${hi}-${h} &
+            pids+=($!)
+        done
+        wait ${pids[@]}
+        # Log and record the pairs one by one, so each keeps its own block in RUN_LOG
+        # Every pair of the round is recorded before a failure cancels the test
+        failed=0
+        for pair in ${pairs[@]}; do
+            hi=${pair%,*}
+            h=${pair#*,}
+            pair_tmp=${RUN_TMP}-${hi}-${h}
             echo "mpirun ${RUN_ARGS} -host ${hi},${h} ${CMD} ${CMD_ARGS}" &>> $RUN_LOG
-            mpirun ${RUN_ARGS} -host "${hi},${h}" ${CMD} ${CMD_ARGS} &> $RUN_TMP
-            bw_num=$(awk '/262144/ {print $NF}' $RUN_TMP)
-            cat $RUN_TMP >> $RUN_LOG
+            bw_num=$(awk '/262144/ {print $NF}' $pair_tmp)
+            cat $pair_tmp >> $RUN_LOG
             if [[ -z $bw_num ]]; then
                 echo "TEST $hi,$h FAILED!!!:"
-                echo "CANCELLING TEST"
-                cat $RUN_TMP
-                exit 1
+                cat $pair_tmp
+                rm -f $pair_tmp
+                failed=1
+                continue
             fi
             echo "$hi,$h,$bw_num" >> $RUN_RSLT
-            save_full_rslt $RUN_TMP $RUN_RSLT_FULL "Size,${hi}-${h}"
+            append_full_rslt $pair_tmp "${hi}-${h}"
+            rm -f $pair_tmp
         done
         sf=$(( SECONDS-si ))
-        echo "$hi took $sf seconds."
+        echo "Round $(( k+1 )) took $sf seconds."
+        if [[ $failed -ne 0 ]]; then
+            echo "CANCELLING TEST"
+            exit 1
+        fi
     done
 fi
 
@@ -151,3 +180,5 @@ if [[ $TEST == osu_alltoall || $TEST == osu_mbw_mr ]]; then
     if [[ $PROFILE == 'true' ]]; then opa_counter >> $NIC_COUNTER_OUT; fi
 
 fi
+
+stop_profiler
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Pairwise Sweep Scheduler
+
+The osu_bw/osu_bibw loop in osu_mb.sh and the pairwise loop in uniband.sh
+measure every (init_host, dest_host) pair with its own mpirun, one after
+the other, so an N-node sweep takes N*(N-1) serial runs. This script
+plans the sweep as rounds of pairs that can run at the same time and
+prints one round per line, as space separated "init,dest" pairs:
+
+    ./pairScheduler.py --nodes $NODELIST --hiset $HISET --concurrent
+
+Without --concurrent every round holds a single pair, in the order of the
+original loops (each HISET node against every other node). With it, the
+pairs follow a round-robin tournament (the circle method, once in each
+direction), so a round never uses a node twice and an all-pairs sweep
+takes 2*(N-1) rounds instead of N*(N-1) runs.
+
+Disjoint nodes still share ISLs. ``--avoid-shared-links`` also keeps
+pairs whose routes leave a switch through the same port out of one round,
+so concurrent pairs do not perturb each other. The routes come from
+``opareport -o route`` (as in opa-fm-connections.sh), one query per pair,
+run ``--jobs`` at a time. ``--routes FILE`` keeps their output: pairs
+already in FILE are not queried again, and ``--opareport`` replaces the
+tool, e.g. with a script printing recorded output.
+"""
+
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = 16  # opareport route queries at once
+
+Pair = Tuple[str, str]  # (init_host, dest_host)
+Link = Tuple[str, str]  # (switch GUID, egress port)
+
+# One port of a route: "[->] <GUID> <port> <FI|SW> <name> ..."
+_HOP = re.compile(r'(0x[0-9a-fA-F]+)\s+(\d+)\s+(FI|SW)\s+(\S+)')
+
+
+def split_nodes(values: Iterable[str]) -> List[str]:
+    """Node names from arguments holding one or more comma or whitespace separated names, duplicates dropped."""
+    nodes = []
+    for value in values:
+        for node in re.split(r'[,\s]+', value):
+            if node and node not in nodes:
+                nodes.append(node)
+    return nodes
+
+
+def sweep_pairs(nodes: Sequence[str], hiset: Optional[Sequence[str]] = None) -> List[Pair]:
+    """The pairs of the original loops, in their order: each ``hiset`` node against every other node."""
+    return [(hi, h) for hi in (hiset or nodes) for h in nodes if h != hi]
+
+
+def tournament(nodes: Sequence[str]) -> Iterator[List[Pair]]:
+    """
+    Round-robin tournament over ``nodes``, by the circle method.
+
+    The first node stays put while the others rotate. Every round pairs
+    each node at most once (one sits out when the count is odd). The
+    second half repeats the first with the directions swapped, so every
+    ordered pair is played exactly once in 2*(N-1) rounds.
+    """
+    players: List[Optional[str]] = list(nodes)
+    if len(players) % 2:
+        players.append(None)
+    half = len(players) // 2
+    rounds = []
+    for _ in range(len(players) - 1):
+        rounds.append([(players[i], players[-1 - i]) for i in range(half)
+                       if players[i] is not None and players[-1 - i] is not None])
+        players.insert(1, players.pop())
+    for leg in (0, 1):
+        for number, games in enumerate(rounds):
+            # Alternate who sends first so no node is always the initiator
+            flip = (number + leg) % 2
+            yield [(b, a) if flip else (a, b) for a, b in games]
+
+
+def schedule_rounds(pairs: Sequence[Pair], links: Optional[Dict[Pair, FrozenSet[Link]]] = None,
+                    max_pairs: int = 0) -> List[List[Pair]]:
+    """
+    Pack pairs into rounds, first fit in the given order.
+
+    A pair goes to the first round in which neither of its nodes is busy,
+    that holds fewer than ``max_pairs`` pairs (0: no limit), and none of
+    whose pairs' links it uses. Given in tournament order, an all-pairs
+    sweep without links fills exactly the tournament's rounds.
+
+    Args:
+        pairs: Pairs to run
+        links: Links each pair uses; pairs missing from it use none
+        max_pairs: Most pairs per round, 0 for no limit
+
+    Returns:
+        The rounds, each a list of pairs
+    """
+    rounds: List[List[Pair]] = []
+    round_links: List[Set[Link]] = []
+    busy: Dict[str, Set[int]] = {}
+    first_free: Dict[str, int] = {}  # Every earlier round uses the node
+    for pair in pairs:
+        pair_links = links.get(pair, frozenset()) if links else frozenset()
+        busy_a = busy.setdefault(pair[0], set())
+        busy_b = busy.setdefault(pair[1], set())
+        index = max(first_free.get(pair[0], 0), first_free.get(pair[1], 0))
+        while True:
+            if index == len(rounds):
+                rounds.append([])
+                round_links.append(set())
+            if (index not in busy_a and index not in busy_b and not (max_pairs and len(rounds[index]) >= max_pairs)
+                    and round_links[index].isdisjoint(pair_links)):
+                break
+            index += 1
+        rounds[index].append(pair)
+        round_links[index].update(pair_links)
+        for node, node_busy in ((pair[0], busy_a), (pair[1], busy_b)):
+            node_busy.add(index)
+            free = first_free.get(node, 0)
+            while free in node_busy:
+                free += 1
+            first_free[node] = free
+    return rounds
+
+
+def plan_sweep(nodes: Sequence[str], hiset: Optional[Sequence[str]] = None, concurrent: bool = False,
+               links: Optional[Dict[Pair, FrozenSet[Link]]] = None, max_pairs: int = 0) -> List[List[Pair]]:
+    """
+    Rounds of the sweep of ``hiset`` against ``nodes``.
+
+    Args:
+        nodes: Every node of the sweep (NODELIST)
+        hiset: Nodes to test against all others (HISET); default: all of ``nodes``
+        concurrent: Run node-disjoint pairs together; otherwise one pair per round
+        links: Links each pair uses, to keep pairs sharing one apart
+        max_pairs: Most pairs per round, 0 for no limit
+
+    Returns:
+        The rounds, each a list of pairs, covering every pair once
+    """
+    pairs = sweep_pairs(nodes, hiset)
+    if not concurrent:
+        return [[pair] for pair in pairs]
+    wanted = set(pairs)
+    players = list(nodes) + [node for node in (hiset or []) if node not in nodes]
+    ordered = [pair for games in tournament(players) for pair in games if pair in wanted]
+    return schedule_rounds(ordered, links, max_pairs)
+
+
+def parse_routes(report: str) -> Dict[Pair, FrozenSet[Link]]:
+    """
+    Switch egress ports used by each route in ``opareport -o route`` output.
+
+    Every port line names its GUID, port number, node type and node name.
+    A route runs from an HFI port line to the next HFI port line, with the
+    ports in (egress, ingress) pairs in between. Only links between two
+    switches are kept; the HFI links belong to the pair's own nodes. The
+    output of many queries may be concatenated, and every path between
+    the same two nodes adds its links.
+
+    Returns:
+        {(source node, destination node): frozenset of (switch GUID, egress port)}
+    """
+    routes: Dict[Pair, Set[Link]] = {}
+    hops: List[Tuple[str, str, str, str]] = []
+    for line in report.splitlines():
+        match = _HOP.search(line)
+        if match is None:
+            continue
+        hop = match.groups()
+        if hop[2] == "FI" and len(hops) % 2 == 1:
+            hops.append(hop)
+            links = routes.setdefault((hops[0][3], hop[3]), set())
+            for egress, ingress in zip(hops[0::2], hops[1::2]):
+                if egress[2] == "SW" and ingress[2] == "SW":
+                    links.add((egress[0].lower(), egress[1]))
+            hops = []
+        elif hop[2] == "FI":
+            hops = [hop]
+        elif hops:
+            hops.append(hop)
+    return {pair: frozenset(links) for pair, links in routes.items()}
+
+
+def _query_route(opareport: str, pair: Pair, hfi: str) -> Tuple[Pair, int, str]:
+    command = [opareport, "-o", "route", "-S", f"nodepat:{pair[0]} hfi1_{hfi}", "-D", f"nodepat:{pair[1]} hfi1_{hfi}"]
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except OSError:
+        return pair, 127, ""
+    return pair, result.returncode, result.stdout
+
+
+def load_routes(pairs: Iterable[Pair], routes_file: Optional[str] = None, opareport: str = "opareport",
+                hfi: str = "0", jobs: int = DEFAULT_JOBS) -> Dict[Pair, FrozenSet[Link]]:
+    """
+    ISL egress ports of each pair's route.
+
+    Args:
+        pairs: Pairs whose routes are needed
+        routes_file: Saved ``opareport -o route`` output; routes missing from
+            it are queried and appended to it
+        opareport: opareport to run
+        hfi: HFI number of the routes' end points (hfi1_<hfi>)
+        jobs: Queries run at once
+
+    Returns:
+        {pair: frozenset of (switch GUID, egress port)}; a pair whose route
+        cannot be found uses no links
+    """
+    routes: Dict[Pair, FrozenSet[Link]] = {}
+    if routes_file and os.path.exists(routes_file):
+        with open(routes_file, 'r', encoding='utf-8') as saved:
+            routes = parse_routes(saved.read())
+    missing = list(dict.fromkeys(pair for pair in pairs if pair not in routes))
+    if missing:
+        outputs = []
+        failed = []
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            for pair, status, output in pool.map(lambda pair: _query_route(opareport, pair, hfi), missing):
+                if status != 0:
+                    failed.append((pair, status))
+                outputs.append(output)
+        if failed:
+            (src, dst), status = failed[0]
+            logger.warning(f"{opareport} -o route failed for {len(failed)} of {len(missing)} pairs "
+                           f"(e.g. {src} -> {dst}: status {status})")
+        report = "\n".join(outputs)
+        routes.update(parse_routes(report))
+        if routes_file:
+            with open(routes_file, 'a', encoding='utf-8') as saved:
+                saved.write(report + "\n")
+    unrouted = [pair for pair in missing if pair not in routes]
+    if unrouted:
+        logger.warning(f"No route found for {len(unrouted)} pairs (e.g. {unrouted[0][0]} -> {unrouted[0][1]}); "
+                       "they are scheduled as if they shared no links")
+    return routes
+
+
+def route_links(pairs: Iterable[Pair], routes: Dict[Pair, FrozenSet[Link]],
+                bidirectional: bool = False) -> Dict[Pair, FrozenSet[Link]]:
+    """Links each pair loads: its route, plus the way back when traffic flows both ways (osu_bibw)."""
+    links = {}
+    for pair in pairs:
+        used = routes.get(pair, frozenset())
+        if bidirectional:
+            used = used | routes.get((pair[1], pair[0]), frozenset())
+        links[pair] = used
+    return links
+
+
+def format_rounds(rounds: Sequence[Sequence[Pair]]) -> str:
+    """One line per round of space separated "init,dest" pairs."""
+    return "\n".join(" ".join(f"{a},{b}" for a, b in games) for games in rounds)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Plan a pairwise bandwidth sweep as rounds of pairs that can run '
+                                                 'concurrently; prints one round per line')
+    parser.add_argument('--nodes', nargs='+', required=True, metavar='NODE',
+                        help='Nodes of the sweep (NODELIST), space or comma separated')
+    parser.add_argument('--hiset', nargs='*', default=None, metavar='NODE',
+                        help='Nodes to test against every other node (HISET; default: all nodes)')
+    parser.add_argument('--concurrent', action='store_true',
+                        help='Run node-disjoint pairs in round-robin tournament rounds; '
+                             'without it every round is a single pair, in the order of the sequential loop')
+    parser.add_argument('--avoid-shared-links', action='store_true',
+                        help='With --concurrent, also keep pairs whose routes share an ISL out of the same round')
+    parser.add_argument('--bidirectional', action='store_true',
+                        help='Pairs load their route in both directions (osu_bibw)')
+    parser.add_argument('--max-pairs', type=int, default=0, metavar='N',
+                        help='Run at most N pairs per round (default: 0, no limit)')
+    parser.add_argument('--routes', default=None, metavar='FILE',
+                        help='opareport -o route output to reuse; routes missing from it are queried and appended')
+    parser.add_argument('--hfi', default='0', help='HFI number of the route end points (default: 0, i.e. hfi1_0)')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'opareport route queries run at once (default: {DEFAULT_JOBS})')
+    parser.add_argument('--opareport', default='opareport', metavar='PATH',
+                        help='opareport to run, e.g. a script replaying recorded output')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        nodes = split_nodes(args.nodes)
+        hiset = split_nodes(args.hiset) if args.hiset else None
+        links = None
+        if args.concurrent and args.avoid_shared_links:
+            pairs = sweep_pairs(nodes, hiset)
+            needed = pairs + [(b, a) for a, b in pairs] if args.bidirectional else pairs
+            routes = load_routes(needed, args.routes, args.opareport, args.hfi, args.jobs)
+            links = route_links(pairs, routes, args.bidirectional)
+        rounds = plan_sweep(nodes, hiset, args.concurrent, links, args.max_pairs)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if rounds:
+        print(format_rounds(rounds))
@@ -2,62 +2,214 @@
 """
 GPCNET Log Parser - Parses network test logs into JSON/CSV
 Usage: python parse_gpcnet.py <logfile> [--format json|csv]
+
+Batch mode: pass several logs, directories (searched for *-run.log) or
+globs, and every GPCNET run found is parsed on a process pool into one
+long-format table with one row per (run, test, table, name, metric):
+    python parse_gpcnet.py logs/ --format csv,npz --output all_runs --jobs 8
 """
 
 import json
 import csv
+import glob
+import logging
+import math
+import os
+import re
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Tuple
 
-def parse_gpcnet_log(filepath):
-    """Parse the entire GPCNET log file."""
-    with open(filepath, 'r') as f:
-        lines = f.readlines()
-    
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+LOG_PATTERN = "*-run.log"  # RUN_LOG name from set_logs in util.sh
+GPCNET_NAME = "GPCNET"  # First field of the first log line of gpcnet.sh runs
+# Columns of the long-format table; the run's test_info keys follow them
+LONG_COLUMNS = ("run", "test", "table", "name", "metric", "value", "unit")
+UNITS_HEADER = "Units"
+FORMATS = ("json", "csv", "npz")
+PER_TEST_INFO = ("mpi_line",)  # test_info entries that only hold the last test's value, covered by "test"
+
+# A number with an optional unit suffix, e.g. "2716.8", "1.3X", "12 %"
+_VALUE = re.compile(r'^([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?|[-+]?(?:inf|nan))\s*(\S*)$', re.IGNORECASE)
+
+Row = Dict[str, Any]
+
+
+def parse_value(cell: str) -> Tuple[float, str]:
+    """
+    Numeric value and unit suffix of a table cell.
+
+    Returns:
+        (value, suffix); NaN and the whole cell if it is not a number
+    """
+    match = _VALUE.match(cell.strip())
+    if match is None:
+        return math.nan, cell.strip()
+    return float(match.group(1)), match.group(2)
+
+
+def _split_cells(line: str) -> List[str]:
+    """Cells of a |-delimited table row, stripped, empty cells kept."""
+    return [cell.strip(' ') for cell in line.strip().strip('|').split('|')]
+
+
+def _parse_lines(lines: Iterable[str], run: str = "") -> Tuple[Dict[str, Any], List[Row]]:
+    """
+    Single pass over a GPCNET log.
+
+    Returns:
+        The nested dict of parse_gpcnet_log and the long-format rows of
+        gpcnet_rows (without the test_info columns)
+    """
     data = {
         'test_info': {},
     }
+    rows = []
     testexec = 'default'
-    tablerow=0
-    testheader=[]
-    for i in range(len(lines)):
-        line = lines[i].strip()
-        
+    test = testexec
+    titleline = ''
+    testheader = []
+    for i, line in enumerate(lines):
+        line = line.strip()
+
         # Parse test metadata
-        if i==0:
-            topData=line.split(' - ')
-            data['test_info']['date'] = topData[1]
-            data['test_info']['FMALGO'] = topData[2]
-        
+        if i == 0:
+            topData = line.split(' - ')
+            if len(topData) > 2:
+                data['test_info']['date'] = topData[1]
+                data['test_info']['FMALGO'] = topData[2]
+
         elif line.startswith("GPCNET"):
             splitline = line.split(' - ')
-            alloc_dict=dict([a.split(': ') for a in splitline])
-            testexec = alloc_dict.pop('GPCNET')
+            alloc_dict = dict(a.split(': ', 1) for a in splitline if ': ' in a)
+            testexec = alloc_dict.pop('GPCNET', testexec)
+            test = testexec
             data['test_info'].update(alloc_dict)
             data[testexec] = {}
-    
+
         elif line.startswith("mpirun"):
             data['test_info']['mpi_line'] = line
-        
-        # # Parse main tables
-        # if line.startswith('+----'):
-        #     continue
+            # The benchmark binary is the last word: numa_wrapper.sh <bin>
+            test = os.path.basename(line.split()[-1])
+
         elif line.count('|') == 2:
-            titleline=line.strip('|').strip(' ')
-            data[testexec][titleline] = {}
-        
-        elif 'Avg(Worst)' in line:
-            testheader = [k.strip(' ') for k in line.split('|') if k][1:]
+            titleline = line.strip('|').strip(' ')
+            data.setdefault(testexec, {})[titleline] = {}
 
         elif line.startswith('|'):
-            testresult=[k.strip(' ') for k in line.split('|') if k]
-            # print(testresult, testheader)
-            data[testexec][titleline][testresult[0]] = dict(zip(testheader, 
-                                                                testresult[1:]))
-    
+            cells = _split_cells(line)
+            if cells[0] == 'Name' or 'Avg(Worst)' in line:
+                testheader = cells[1:]
+                continue
+            if not cells[0]:
+                # Second header line under a spanning one (Congestion Impact Factor: Avg, 99%)
+                testheader = cells[1:]
+                continue
+            table = data.setdefault(testexec, {}).setdefault(titleline, {})
+            table[cells[0]] = {k: v for k, v in zip(testheader, cells[1:]) if k or v}
+
+            units = dict(zip(testheader, cells[1:])).get(UNITS_HEADER, "")
+            for metric, cell in zip(testheader, cells[1:]):
+                if not metric or metric == UNITS_HEADER:
+                    continue
+                value, suffix = parse_value(cell)
+                rows.append({"run": run, "test": test, "table": titleline, "name": cells[0],
+                             "metric": metric, "value": value, "unit": units or suffix})
+
+    return data, rows
+
+
+def parse_gpcnet_log(filepath):
+    """Parse the entire GPCNET log file."""
+    with open(filepath, 'r') as f:
+        data, _ = _parse_lines(f, filepath)
     return data
 
 
+def gpcnet_rows(filepath: str) -> List[Row]:
+    """
+    Long-format rows of one GPCNET log with numeric values.
+
+    Each table cell becomes one row: the run (log path), the benchmark
+    binary, table title, row name, column (metric), its value as a float
+    (NaN if not numeric) and its unit (the row's Units cell, else the
+    cell's suffix such as "X"). The run's test_info entries are added as
+    further columns. Logs of other benchmarks give no rows.
+    """
+    return _parse_file(filepath)[1]
+
+
+def _parse_file(filepath: str) -> Tuple[Dict[str, Any], List[Row]]:
+    """Process pool task: the nested dict and long-format rows of one log."""
+    with open(filepath, 'r', errors='replace') as f:
+        first = f.readline()
+        if first.split(' - ')[0].strip() != GPCNET_NAME:
+            return {}, []
+        f.seek(0)
+        data, rows = _parse_lines(f, filepath)
+    info = {key: value for key, value in data['test_info'].items() if key not in LONG_COLUMNS + PER_TEST_INFO}
+    for row in rows:
+        row.update(info)
+    return data, rows
+
+
+def find_logs(paths: List[str]) -> List[str]:
+    """Expand files, directories (searched recursively for LOG_PATTERN) and globs into sorted log paths."""
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            logs.extend(glob.glob(os.path.join(path, '**', LOG_PATTERN), recursive=True))
+        elif glob.has_magic(path):
+            logs.extend(glob.glob(path, recursive=True))
+        elif os.path.exists(path):
+            logs.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return sorted(set(logs))
+
+
+def parse_gpcnet_logs(paths: List[str], jobs: int = 1) -> Tuple[Dict[str, Dict[str, Any]], List[Row]]:
+    """
+    Parse many GPCNET logs on ``jobs`` worker processes.
+
+    Args:
+        paths: Log files, directories or globs, see find_logs
+        jobs: Worker processes (1 parses in this process)
+
+    Returns:
+        ({log path: nested dict}, long-format rows of every log in path order);
+            logs of other benchmarks are skipped
+    """
+    logs = find_logs(paths)
+    if jobs > 1 and len(logs) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(logs))) as pool:
+            results = list(pool.map(_parse_file, logs, chunksize=max(1, len(logs) // (4 * jobs))))
+    else:
+        results = [_parse_file(log) for log in logs]
+
+    runs = {}
+    rows = []
+    for log, (data, log_rows) in zip(logs, results):
+        if not data:
+            logger.info(f"Skipping {log}: not a GPCNET log")
+            continue
+        runs[log] = data
+        rows.extend(log_rows)
+    return runs, rows
+
+
+def long_columns(rows: List[Row]) -> List[str]:
+    """LONG_COLUMNS followed by every test_info key in order of first appearance."""
+    columns = dict.fromkeys(LONG_COLUMNS)
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
 def write_json(data, output_file):
     """Write data to JSON file."""
     with open(output_file, 'w') as f:
@@ -65,25 +217,88 @@ def write_json(data, output_file):
     print(f"Written to {output_file}")
 
 
+def write_csv(rows: List[Row], output_file: str) -> None:
+    """Write long-format rows to a CSV file; NaN values are left empty."""
+    columns = long_columns(rows)
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, restval='')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "value": "" if math.isnan(row["value"]) else row["value"]})
+    print(f"Written to {output_file}")
+
+
+def write_columnar(rows: List[Row], output_file: str) -> None:
+    """
+    Write long-format rows column by column to a compressed NumPy ``.npz``.
+
+    ``value`` is a float64 array and every other column a string array.
+    Arrays are stored as c0, c1, ... with their names in ``columns``, so
+    any column name is allowed; read_columnar restores the names.
+    """
+    import numpy as np
+
+    columns = long_columns(rows)
+    arrays = {"columns": np.array(columns)}
+    for i, column in enumerate(columns):
+        if column == "value":
+            arrays[f"c{i}"] = np.array([row["value"] for row in rows], dtype=np.float64)
+        else:
+            arrays[f"c{i}"] = np.array([str(row.get(column, "")) for row in rows], dtype=np.str_)
+    with open(output_file, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    print(f"Written to {output_file}")
+
+
+def read_columnar(input_file: str) -> Dict[str, Any]:
+    """Columns written by write_columnar, as {name: NumPy array}."""
+    import numpy as np
+
+    with np.load(input_file) as archive:
+        return {str(column): archive[f"c{i}"] for i, column in enumerate(archive["columns"])}
+
+
 def main():
     parser = argparse.ArgumentParser(description='Parse GPCNET log files')
-    parser.add_argument('logfile', help='Path to GPCNET log file')
-    parser.add_argument('--format', choices=['json', 'csv', 'both'], default='json',
-                       help='Output format (default: json)')
+    parser.add_argument('logfile', nargs='+',
+                        help=f'GPCNET log file(s), directories (searched for {LOG_PATTERN}) or globs')
+    parser.add_argument('--format', default='json',
+                        help=f"Comma-separated output formats: {', '.join(FORMATS)}, or 'both' for json,csv "
+                             "(default: json). csv and npz hold the long-format table")
     parser.add_argument('--output', default='gpcnet_results',
                        help='Output file name (without extension)')
-    
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help='Parse logs on N worker processes (default: one per CPU)')
+
     args = parser.parse_args()
-    
-    print(f"Parsing {args.logfile}...")
-    data = parse_gpcnet_log(args.logfile)
-    
-    if args.format in ['json', 'both']:
-        write_json(data, f"{args.output}.json")
-    
-    if args.format in ['csv', 'both']:
-        write_csv(data, args.output)
-    
+    formats = ['json', 'csv'] if args.format == 'both' else args.format.split(',')
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        parser.error(f"unknown format(s) {', '.join(unknown)}; choose from {', '.join(FORMATS)}")
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    print(f"Parsing {' '.join(args.logfile)}...")
+    try:
+        runs, rows = parse_gpcnet_logs(args.logfile, args.jobs)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if not runs:
+        print("Error: no GPCNET logs found")
+        sys.exit(1)
+    print(f"Parsed {len(runs)} runs into {len(rows)} rows")
+
+    if 'json' in formats:
+        # A single log keeps the original layout; several are keyed by log path
+        write_json(next(iter(runs.values())) if len(runs) == 1 else runs, f"{args.output}.json")
+
+    if 'csv' in formats:
+        write_csv(rows, f"{args.output}.csv")
+
+    if 'npz' in formats:
+        write_columnar(rows, f"{args.output}.npz")
+
     print("Done!")
 
 
@@ -1,31 +1,333 @@
 #!/usr/bin/env python3
+"""
+OSU Totaltable Summarizer - Summarizes OSU bandwidth sweeps
+Usage: python parse_osumb.py <totaltable.csv> [...]
 
-# PROVIDE THE RELATIVE PATH TO THE CSV FILE
+A totaltable (RUN_RSLT_FULL, assembled by osuTotaltable.py in osu_mb.sh) has
+one row per message size and one bandwidth column per host pair. Every
+given table (files, directories searched for *-totaltable.csv, or globs)
+is loaded into one run x size x pair array, and summarized in one pass:
+
+    <output>-per_size.csv  distribution over all runs and pairs at each message size
+    <output>-per_pair.csv  distribution over runs of each pair at one message size
+    <TESTID>-extrasummary.csv next to each table, the per-run summary of
+                           earlier versions (per-pair mean/max/geomean/sum
+                           over sizes, described across pairs)
+
+Each parsed table is kept in a memory-mapped <csv>.osucache sidecar.
+For all-pairs sweeps on large node counts, --mmap DIR also assembles the
+combined array on disk and summarizes it in bounded-memory chunks.
+"""
+
+import argparse
+import glob
+import json
+import logging
 import os
 import os.path as op
 import sys
+import warnings
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
-from scipy.stats import gmean
-
-if __name__=="__main__":
-
-    thispath=op.dirname(op.realpath(__file__))
-    csvpath=op.join(thispath,op.sys.argv[1])
-    df1=pd.read_csv(csvpath)
-    df1.set_index('Size',inplace=True)
-    summarydf=pd.DataFrame(df1.mean())
-    summarydf.columns=['mean']
-    summarydf['max']=df1.max()
-    summarydf['geomean']=gmean(df1)
-    summarydf['sum']=df1.sum()
-    finalsummary=summarydf.describe()
-    finals=finalsummary.T
-    finals['std_dev_ratio']=(finalsummary.T['std']/finalsummary.T['mean']*100)
-    finalsummary=finals.T
-
-    newcsv = "-".join(csvpath.split('-')[:-1])
-    newcsv += "extrasummary.csv"
-    print(csvpath)
-    print(newcsv)
-
-    finalsummary.to_csv(newcsv, float_format='%.2f')
\ No newline at end of file
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+TABLE_SUFFIX = "-totaltable.csv"  # RUN_RSLT_FULL name from set_logs in util.sh
+EXTRA_SUMMARY_SUFFIX = "-extrasummary.csv"
+CACHE_SUFFIX = ".osucache"  # Sidecar directory next to the CSV holding the parsed array
+CACHE_INDEX = "index.json"
+CACHE_VERSION = 1
+CUBE_FILE = "osu_cube.npy"
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_VALUES = 1 << 22  # Values reduced at once (32 MiB of float64)
+LEGACY_COLUMNS = ("mean", "max", "geomean", "sum")
+
+
+@dataclass
+class OsuTables:
+    """Bandwidth of many totaltables on common axes; NaN where a run lacks a size or pair."""
+    runs: List[str]  # Totaltable paths
+    sizes: np.ndarray  # Message sizes in bytes, ascending
+    pairs: List[str]  # "${hi}-${h}" column names in order of first appearance
+    values: np.ndarray  # (run, size, pair) bandwidth, possibly a memmap
+
+
+def _cache_dir(csv_path: str) -> str:
+    return csv_path + CACHE_SUFFIX
+
+
+def _load_cache(csv_path: str) -> Optional[Tuple[np.ndarray, List[str], np.ndarray]]:
+    """The sidecar's (sizes, pairs, memory-mapped values), or None if it is missing or stale."""
+    cache_dir = _cache_dir(csv_path)
+    try:
+        with open(op.join(cache_dir, CACHE_INDEX), 'r') as f:
+            index = json.load(f)
+        stat = os.stat(csv_path)
+        if (index.get("version") != CACHE_VERSION or index.get("size") != stat.st_size
+                or index.get("mtime_ns") != stat.st_mtime_ns):
+            return None
+        values = np.load(op.join(cache_dir, "values.npy"), mmap_mode='r')
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug(f"Ignoring cache {cache_dir}: {e}")
+        return None
+    sizes = np.asarray(index["sizes"], dtype=np.int64)
+    if values.shape != (len(sizes), len(index["pairs"])):
+        return None
+    return sizes, index["pairs"], values
+
+
+def _save_cache(csv_path: str, stat: os.stat_result, sizes: np.ndarray, pairs: List[str],
+                values: np.ndarray) -> None:
+    """Write the sidecar, array first and index last; failures only cost the next parse."""
+    cache_dir = _cache_dir(csv_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = op.join(cache_dir, f"values.npy.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, values)
+        os.replace(tmp_path, op.join(cache_dir, "values.npy"))
+        index = {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                 "sizes": sizes.tolist(), "pairs": pairs}
+        tmp_path = op.join(cache_dir, f"{CACHE_INDEX}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, op.join(cache_dir, CACHE_INDEX))
+    except OSError as e:
+        logger.warning(f"Could not write cache {cache_dir}: {e}")
+
+
+def read_totaltable(csv_path: str, use_cache: bool = True) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Message sizes, pair names and (size, pair) bandwidths of one totaltable.
+
+    With ``use_cache`` the array is saved to a ``<csv>.osucache`` sidecar
+    and memory-mapped from it while the CSV's size and mtime are unchanged.
+
+    Raises:
+        ValueError: If the file has no Size column or no rows
+    """
+    if use_cache:
+        cached = _load_cache(csv_path)
+        if cached is not None:
+            return cached
+    stat = os.stat(csv_path)
+    with open(csv_path, 'r') as f:
+        header = [column.strip() for column in f.readline().rstrip('\n').split(',')]
+        # Rows are parsed whole: all-pairs sweeps have tens of thousands of columns
+        rows = [np.array([cell.strip() or "nan" for cell in line.rstrip('\n').split(',')][:len(header)])
+                for line in f if line.strip()]
+    if header[0] != "Size" or not rows:
+        raise ValueError(f"{csv_path} is not an OSU totaltable (Size column and rows expected)")
+    table = np.full((len(rows), len(header)), np.nan)
+    for i, row in enumerate(rows):
+        table[i, :len(row)] = row.astype(np.float64)
+    sizes = table[:, 0].astype(np.int64)
+    pairs = header[1:]
+    values = np.ascontiguousarray(table[:, 1:])
+    if use_cache:
+        _save_cache(csv_path, stat, sizes, pairs, values)
+    return sizes, pairs, values
+
+
+def find_tables(paths: Sequence[str]) -> List[str]:
+    """Expand files, directories (searched recursively for *-totaltable.csv) and globs into sorted paths."""
+    tables = []
+    for path in paths:
+        if not op.exists(path) and not glob.has_magic(path):
+            # Earlier versions took the path relative to this script
+            path = op.join(op.dirname(op.realpath(__file__)), path)
+        if op.isdir(path):
+            tables.extend(glob.glob(op.join(path, '**', '*' + TABLE_SUFFIX), recursive=True))
+        elif glob.has_magic(path):
+            tables.extend(glob.glob(path, recursive=True))
+        elif op.exists(path):
+            tables.append(path)
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+    return sorted(set(tables))
+
+
+def load_totaltables(paths: Sequence[str], use_cache: bool = True, mmap_dir: Optional[str] = None) -> OsuTables:
+    """
+    Load totaltables into one (run, size, pair) array.
+
+    Args:
+        paths: Totaltable files, directories or globs, see find_tables
+        use_cache: Read and write the per-table sidecars
+        mmap_dir: Assemble the array in a .npy file in this directory instead of memory
+
+    Returns:
+        The tables on the union of their message sizes and pairs
+    """
+    runs = find_tables(paths)
+    if not runs:
+        raise ValueError("no totaltables found")
+    tables = [read_totaltable(run, use_cache) for run in runs]
+    sizes = np.unique(np.concatenate([table[0] for table in tables]))
+    pair_index = {pair: i for i, pair in enumerate(dict.fromkeys(p for table in tables for p in table[1]))}
+    shape = (len(runs), len(sizes), len(pair_index))
+
+    if mmap_dir is None:
+        values = np.full(shape, np.nan)
+    else:
+        os.makedirs(mmap_dir, exist_ok=True)
+        values = np.lib.format.open_memmap(op.join(mmap_dir, CUBE_FILE), mode='w+', dtype=np.float64, shape=shape)
+    for run, (run_sizes, run_pairs, run_values) in enumerate(tables):
+        rows = np.searchsorted(sizes, run_sizes)
+        columns = np.fromiter((pair_index[pair] for pair in run_pairs), dtype=np.intp, count=len(run_pairs))
+        if len(rows) == shape[1] and np.array_equal(columns, np.arange(shape[2])):
+            values[run] = run_values
+        else:
+            values[run] = np.nan
+            values[run][np.ix_(rows, columns)] = run_values
+    if mmap_dir is not None:
+        values.flush()
+    return OsuTables(runs, sizes, list(pair_index), values)
+
+
+def describe(values: np.ndarray, axis, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, np.ndarray]:
+    """
+    NaN-aware statistics of ``values`` reduced over ``axis``.
+
+    Returns:
+        {statistic: array}: count, mean, std (sample), cv (std / mean in %,
+        the std_dev_ratio of earlier versions), min, p<q> per percentile,
+        max, geomean (0 if any value is 0)
+    """
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        # All-NaN slices (a pair missing from every run) give NaN statistics
+        warnings.simplefilter("ignore", RuntimeWarning)
+        stats = {"count": np.sum(~np.isnan(values), axis=axis),
+                 "mean": np.nanmean(values, axis=axis),
+                 "std": np.nanstd(values, axis=axis, ddof=1)}
+        stats["cv"] = stats["std"] / stats["mean"] * 100
+        stats["min"] = np.nanmin(values, axis=axis)
+        for q, percentile in zip(percentiles, np.nanpercentile(values, percentiles, axis=axis)):
+            stats[f"p{q:g}"] = percentile
+        stats["max"] = np.nanmax(values, axis=axis)
+        stats["geomean"] = np.exp(np.nanmean(np.log(values), axis=axis))
+    return stats
+
+
+def _chunk(length: int, values_per_item: int) -> int:
+    return max(1, min(length, CHUNK_VALUES // max(1, values_per_item)))
+
+
+def per_size_summary(tables: OsuTables, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """Statistics over every run and pair at each message size, one row per size."""
+    runs, sizes, pairs = tables.values.shape
+    step = _chunk(sizes, runs * pairs)
+    parts = [pd.DataFrame(describe(tables.values[:, start:start + step, :], (0, 2), percentiles))
+             for start in range(0, sizes, step)]
+    summary = pd.concat(parts, ignore_index=True)
+    summary.insert(0, "size", tables.sizes)
+    return summary
+
+
+def per_pair_summary(tables: OsuTables, size: Optional[int] = None,
+                     percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """
+    Statistics of each pair over runs at one message size, one row per pair.
+
+    Args:
+        tables: Loaded totaltables
+        size: Message size; default the largest
+
+    Raises:
+        ValueError: If no table has that size
+    """
+    size = int(tables.sizes[-1]) if size is None else size
+    row = np.searchsorted(tables.sizes, size)
+    if row == len(tables.sizes) or tables.sizes[row] != size:
+        raise ValueError(f"no totaltable has message size {size}")
+    summary = pd.DataFrame(describe(np.asarray(tables.values[:, row, :]), 0, percentiles))
+    summary.insert(0, "size", size)
+    summary.insert(0, "pair", tables.pairs)
+    return summary
+
+
+def _legacy_summary(values: np.ndarray) -> pd.DataFrame:
+    """Legacy summary of one run's (size, pair) bandwidth, over the sizes and pairs that run has."""
+    # The union axes leave whole rows and columns of NaN where the run lacks a size or pair
+    values = values[~np.isnan(values).all(axis=1)]
+    values = values[:, ~np.isnan(values).all(axis=0)]
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        # (pair, statistic) over the sizes of each column, skipping sizes the pair did not report
+        per_pair = np.stack([np.nanmean(values, axis=0), np.nanmax(values, axis=0),
+                             np.exp(np.nanmean(np.log(values), axis=0)), np.nansum(values, axis=0)], axis=1)
+        stats = describe(per_pair, 0, (25, 50, 75))
+    rows = [stats[name] for name in ("count", "mean", "std", "min", "p25", "p50", "p75", "max", "cv")]
+    return pd.DataFrame(rows, columns=list(LEGACY_COLUMNS),
+                        index=["count", "mean", "std", "min", "25%", "50%", "75%", "max", "std_dev_ratio"])
+
+
+def legacy_summaries(tables: OsuTables) -> List[pd.DataFrame]:
+    """
+    The summary earlier versions wrote per totaltable, for every run.
+
+    Each pair's mean, max, geomean and sum over message sizes, described
+    across pairs (count, mean, std, min, quartiles, max), plus
+    std_dev_ratio = std / mean * 100. A run is summarized over its own
+    sizes and pairs only, so its summary does not depend on which other
+    tables were loaded with it, and empty cells are skipped throughout.
+    """
+    return [_legacy_summary(np.asarray(tables.values[run])) for run in range(len(tables.runs))]
+
+
+def extra_summary_path(csv_path: str) -> str:
+    """<TESTID>-extrasummary.csv next to <TESTID>-totaltable.csv."""
+    base = csv_path[:-len(TABLE_SUFFIX)] if csv_path.endswith(TABLE_SUFFIX) else op.splitext(csv_path)[0]
+    return base + EXTRA_SUMMARY_SUFFIX
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Summarize OSU totaltables across message sizes, pairs and runs')
+    parser.add_argument('totaltable', nargs='+',
+                        help=f'Totaltable CSVs, directories (searched for *{TABLE_SUFFIX}) or globs')
+    parser.add_argument('--output', default=None, metavar='PREFIX',
+                        help='Prefix of the per_size and per_pair CSVs (default: the TESTID path for one table, '
+                             'else osu_summary)')
+    parser.add_argument('--size', type=int, default=None,
+                        help='Message size of the per-pair summary (default: the largest)')
+    parser.add_argument('--percentiles', default=",".join(map(str, DEFAULT_PERCENTILES)),
+                        help=f'Comma-separated percentiles (default: {",".join(map(str, DEFAULT_PERCENTILES))})')
+    parser.add_argument('--mmap', default=None, metavar='DIR',
+                        help=f'Assemble the run x size x pair array in DIR/{CUBE_FILE} instead of memory')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Always parse the CSVs; do not read or write <csv>{CACHE_SUFFIX} sidecars')
+    parser.add_argument('--no-extrasummary', action='store_true',
+                        help=f'Do not write <TESTID>{EXTRA_SUMMARY_SUFFIX} next to each table')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        percentiles = [float(q) for q in args.percentiles.split(",")]
+        tables = load_totaltables(args.totaltable, not args.no_cache, args.mmap)
+        print(f"Loaded {len(tables.runs)} tables: {len(tables.sizes)} sizes x {len(tables.pairs)} pairs")
+
+        if not args.no_extrasummary:
+            for run, summary in zip(tables.runs, legacy_summaries(tables)):
+                summary.to_csv(extra_summary_path(run), float_format='%.2f')
+                print(extra_summary_path(run))
+
+        if args.output is None:
+            only = tables.runs[0]
+            args.output = (only[:-len(TABLE_SUFFIX)] if len(tables.runs) == 1 and only.endswith(TABLE_SUFFIX)
+                           else "osu_summary")
+        for name, summary in (("per_size", per_size_summary(tables, percentiles)),
+                              ("per_pair", per_pair_summary(tables, args.size, percentiles))):
+            summary.to_csv(f"{args.output}-{name}.csv", index=False, float_format='%.6g')
+            print(f"Written to {args.output}-{name}.csv")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
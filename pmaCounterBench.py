@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+pmaCounterGraphing Scaling Benchmark
+
+Generates synthetic PMA counter CSVs (see pmaCounterSynth) at several fabric
+sizes and times each pmaCounterGraphing stage separately:
+
+    - parse:       parse_pma_csv on the CSV text (sidecar cache off)
+    - cache_load:  parse_pma_csv from the sidecar written by a previous call
+    - extraction:  _extract_time_series for every (GUID, port, VL, attribute)
+    - graphs:      create_graphs (every PNG re-rendered)
+
+Each size runs in a fresh process so its peak RSS (``ru_maxrss``, a
+high-water mark) is not inflated by earlier sizes; the peak is sampled after
+every stage. Results are written as JSON, and ``--baseline`` compares them
+with an earlier run.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import matplotlib
+
+import pmaCounterGraphing
+from pmaCounterSynth import PATTERNS, SyntheticFabric, generate_pma_csv
+
+DEFAULT_SIZES = "8,32,128"  # Switch counts
+STAGES = ("generate", "parse", "cache_load", "extraction", "graphs")
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _time_extraction(data: pmaCounterGraphing.PmaCounterStore) -> int:
+    """Extract every series the way the graph functions do; returns the number extracted."""
+    count = 0
+    for guid in data.guids:
+        iterations = data.guid_iterations(guid)
+        for port in data.guid_ports(guid):
+            for vl in data.port_vls(guid, port):
+                for attr in data.attributes:
+                    pmaCounterGraphing._extract_time_series(data, guid, port, vl, attr, iterations)
+                    count += 1
+    return count
+
+
+def run_size(fabric: SyntheticFabric, workdir: str, jobs: int, graph_guids: Optional[int]) -> Dict[str, Any]:
+    """
+    Benchmark one fabric size in the current process.
+
+    Args:
+        fabric: Dataset to generate
+        workdir: Directory for the CSV, its sidecar and the PNGs
+        jobs: Render workers for create_graphs
+        graph_guids: Only graph the first N GUIDs (None: all, 0: skip graphs)
+
+    Returns:
+        Dict[str, Any]: Timings (seconds), peak RSS (MB) after each stage and counts
+    """
+    csv_path = os.path.join(workdir, f"pma_{fabric.switches}sw.csv")
+    seconds = {}
+    peak_rss = {}
+
+    def stage(name: str, func):
+        start = time.perf_counter()
+        result = func()
+        seconds[name] = time.perf_counter() - start
+        peak_rss[name] = _peak_rss_mb()
+        return result
+
+    rows = stage("generate", lambda: generate_pma_csv(csv_path, fabric))
+    data, attributes = stage("parse", lambda: pmaCounterGraphing.parse_pma_csv(csv_path, use_cache=False))
+    # Write the sidecar untimed, then time loading it
+    pmaCounterGraphing.parse_pma_csv(csv_path)
+    stage("cache_load", lambda: pmaCounterGraphing.parse_pma_csv(csv_path))
+
+    config = pmaCounterGraphing.config
+    config.output_dir = os.path.join(workdir, f"graphs_{fabric.switches}sw")
+    config.jobs = jobs
+    config.incremental = False
+    pmaCounterGraphing._configure_time_series_cache()
+    series = stage("extraction", lambda: _time_extraction(data))
+    cache_stats = pmaCounterGraphing._time_series_cache.take_stats()
+    pmaCounterGraphing._clear_performance_cache()
+
+    pngs = 0
+    if graph_guids != 0:
+        graph_data = data if graph_guids is None else data.select(data.guids[:graph_guids])
+        with contextlib.redirect_stdout(io.StringIO()):
+            stage("graphs", lambda: pmaCounterGraphing.create_graphs(graph_data, attributes))
+        pngs = pmaCounterGraphing._render_manifest.rendered
+
+    return {
+        "switches": fabric.switches,
+        "ports": fabric.ports,
+        "vl_rows": len(fabric.vls),
+        "iterations": fabric.iterations,
+        "rows": rows,
+        "csv_bytes": os.path.getsize(csv_path),
+        "series": series,
+        "graphed_guids": 0 if graph_guids == 0 else len(graph_data),
+        "pngs": pngs,
+        "seconds": seconds,
+        "peak_rss_mb": peak_rss,
+        "time_series_cache": cache_stats,
+    }
+
+
+def _run_in_fresh_process(fabric: SyntheticFabric, workdir: str, jobs: int,
+                          graph_guids: Optional[int]) -> Dict[str, Any]:
+    # spawn, not fork: a forked child would inherit (and report) this process's peak RSS
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_size, fabric, workdir, jobs, graph_guids).result()
+
+
+def _environment() -> Dict[str, Any]:
+    """Versions and host details recorded with every result file."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Per-size, per-stage time and peak RSS ratios against a baseline result file."""
+    previous = {entry["switches"]: entry for entry in baseline.get("results", [])}
+    lines = []
+    for entry in results["results"]:
+        old = previous.get(entry["switches"])
+        if old is None:
+            continue
+        for name in STAGES:
+            if name not in entry["seconds"] or name not in old["seconds"]:
+                continue
+            new_s, old_s = entry["seconds"][name], old["seconds"][name]
+            ratio = new_s / old_s if old_s else float('inf')
+            lines.append(f"{entry['switches']:>6} switches {name:<11} {old_s:9.3f}s -> {new_s:9.3f}s "
+                         f"({ratio:5.2f}x)  peak RSS {old['peak_rss_mb'][name]:8.1f} -> "
+                         f"{entry['peak_rss_mb'][name]:8.1f} MB")
+    return lines
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark pmaCounterGraphing stages on synthetic fabrics')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'Comma separated switch counts (default: {DEFAULT_SIZES})')
+    parser.add_argument('--ports', type=int, default=16, help='ISL ports per switch (default: 16)')
+    parser.add_argument('--vl-start', type=int, default=0, help='First data VL (default: 0)')
+    parser.add_argument('--vl-end', type=int, default=3, help='Last data VL (default: 3)')
+    parser.add_argument('--iterations', type=int, default=30, help='Samples per port (default: 30)')
+    parser.add_argument('--pattern', choices=PATTERNS, default='hotspot',
+                        help='Congestion pattern (default: hotspot)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Render workers for create_graphs (default: 1)')
+    parser.add_argument('--graph-guids', type=int, default=None, metavar='N',
+                        help='Only graph the first N switches of each size; 0 skips graphing (default: all)')
+    parser.add_argument('--workdir', default=None,
+                        help='Keep CSVs and PNGs here instead of a temporary directory')
+    parser.add_argument('--output', '-o', default='pma_benchmark.json',
+                        help='JSON results file (default: pma_benchmark.json)')
+    parser.add_argument('--baseline', default=None, help='Earlier results JSON to compare against')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        sizes = [int(size) for size in args.sizes.split(',')]
+        fabrics = [SyntheticFabric(switches=size, ports=args.ports, vl_start=args.vl_start, vl_end=args.vl_end,
+                                   iterations=args.iterations, pattern=args.pattern, seed=args.seed)
+                   for size in sizes]
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    results = {"environment": _environment(), "parameters": vars(args), "results": []}
+    with contextlib.ExitStack() as stack:
+        workdir = args.workdir or stack.enter_context(tempfile.TemporaryDirectory(prefix="pma_bench_"))
+        os.makedirs(workdir, exist_ok=True)
+        for fabric in fabrics:
+            print(f"Benchmarking {fabric.switches} switches ({fabric.rows} rows)...")
+            entry = _run_in_fresh_process(fabric, workdir, args.jobs, args.graph_guids)
+            entry["fabric"] = {key: value for key, value in asdict(fabric).items() if key != "attribute_names"}
+            results["results"].append(entry)
+            timings = ", ".join(f"{name} {value:.3f}s" for name, value in entry["seconds"].items())
+            print(f"  {timings}; peak RSS {max(entry['peak_rss_mb'].values()):.1f} MB")
+
+    with open(args.output, 'w', encoding='utf-8') as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            for line in compare(results, json.load(baseline_file)):
+                print(line)
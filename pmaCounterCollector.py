@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Concurrent PMA Counter Collector
+
+Drop-in replacement for ``pmaCountersFromSwitch.sh``: takes the same
+arguments and writes the same CSV and raw output files, but queries the
+switches in parallel instead of one port at a time.
+
+    ./pmaCounterCollector.py data_vl_start data_vl_end iterations time_between_queries \\
+        "selected_attributes" output_file [raw_output_file]
+
+The shell script runs one blocking ``opapmaquery -o getdatacounters`` per
+ISL, so on a large fabric one iteration takes far longer than
+``time_between_queries`` and the samples of the first and last switch are
+minutes apart. Here every switch is queried by its own thread (at most
+``--jobs`` at once), and each switch gets one query whose port mask
+selects all of its ISLs. The response is split back into one block per
+port. A switch whose multi-port response cannot be split (or whose query
+fails) is queried port by port from then on, exactly like the shell
+script.
+
+``--opapmaquery``, ``--opareport``, ``--opasaquery``,
+``--opaextractsellinks`` and ``--opaextractlids`` replace the OPA tools,
+e.g. with scripts that print recorded output, so the collector can be
+exercised without a fabric.
+"""
+
+import argparse
+import logging
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fabricTopology import FabricTopology, OpaTools, load_topology
+from pmaQueryParser import (MANAGEMENT_VL, RAW_HEADER, AttributeExtractor, PmaCsvFormatter, SampleTimes,
+                            attribute_names, csv_vls, raw_block, write_pma_csv)
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = 16  # Switches queried at once
+DEFAULT_PORTS_PER_QUERY = 64  # Every ISL of a typical switch in one getdatacounters query
+DEFAULT_FSYNC_INTERVAL = 30.0  # Seconds between fsyncs of the streamed outputs
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+ALIGN_POLL_INTERVAL = 0.05  # Seconds between checks for the --align-to file
+
+PortSample = Tuple[str, SampleTimes]  # (raw response, timestamps)
+
+# Start of each port's block in a getdatacounters response
+_PORT_NUMBER = re.compile(r'^\s*Port Number\s+(\d+)')
+
+
+def _run(command: List[str]) -> Tuple[int, str]:
+    """Run a command and return its exit status and stdout; stderr goes to ours."""
+    result = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+    return result.returncode, result.stdout
+
+
+def create_vl_mask(data_vl_start: int, data_vl_end: int) -> str:
+    """VL select mask for the data VLs plus VL 15, formatted like create_vl_mask."""
+    vl_mask = 1 << int(MANAGEMENT_VL)
+    for vl in range(data_vl_start, data_vl_end + 1):
+        vl_mask |= 1 << vl
+    return f"0x{vl_mask:X}"
+
+
+def port_mask(ports: Iterable[str]) -> str:
+    """Port select mask with a bit per port number."""
+    mask = 0
+    for port in ports:
+        mask |= 1 << int(port)
+    return f"0x{mask:X}"
+
+
+def split_port_blocks(output: str) -> Dict[int, str]:
+    """
+    Split a multi-port getdatacounters response into one block per port.
+
+    Each block is the response header (everything before the first
+    "Port Number" line) followed by that port's section, so it reads like
+    the response to a single-port query.
+    """
+    lines = output.splitlines()
+    starts = [(i, int(match.group(1))) for i, line in enumerate(lines)
+              for match in [_PORT_NUMBER.match(line)] if match]
+    if not starts:
+        return {}
+    header = lines[:starts[0][0]]
+    blocks = {}
+    for (start, port), (end, _) in zip(starts, starts[1:] + [(len(lines), None)]):
+        blocks[port] = "\n".join(header + lines[start:end]).rstrip("\n")
+    return blocks
+
+
+class SampleClock:
+    """
+    Monotonic clock that reports Unix time.
+
+    The offset between the two is taken once, so an NTP step during the
+    run can neither reorder the recorded timestamps nor stretch the
+    sampling schedule.
+    """
+    def __init__(self):
+        self._offset = time.time() - time.monotonic()
+
+    def wall(self, monotonic: float) -> float:
+        return monotonic + self._offset
+
+    def monotonic(self, wall: float) -> float:
+        return wall - self._offset
+
+
+class FixedRateSchedule:
+    """
+    Sample deadlines at ``start + k * period`` on the monotonic clock.
+
+    Unlike sleeping between samples, the period does not grow with the
+    time the queries take. A sample that finishes after the next deadline
+    is an overrun: the deadlines it ran past are skipped (and counted as
+    missed) so that later samples stay on the same grid.
+    """
+    def __init__(self, period: float, start: float):
+        if period <= 0:
+            raise ValueError("the sampling period must be positive")
+        self.period = period
+        self.next_deadline = start
+        self.samples = 0
+        self.overruns = 0
+        self.missed = 0
+        self.max_late = 0.0
+        self.max_overrun = 0.0
+
+    def start_sample(self, now: float) -> float:
+        """Record how late the next sample starts; returns its deadline."""
+        self.max_late = max(self.max_late, now - self.next_deadline)
+        return self.next_deadline
+
+    def finish_sample(self, now: float) -> None:
+        """Advance to the first deadline after ``now``, counting the ones the sample overran."""
+        self.samples += 1
+        self.next_deadline += self.period
+        if now > self.next_deadline:
+            overrun = now - self.next_deadline
+            skipped = int(overrun // self.period) + 1
+            self.overruns += 1
+            self.missed += skipped
+            self.max_overrun = max(self.max_overrun, overrun)
+            logger.warning(f"Sample {self.samples - 1} overran the {self.period:g} s period by {overrun:.3f} s, "
+                           f"skipping {skipped} deadline{'s' if skipped > 1 else ''}")
+            self.next_deadline += skipped * self.period
+
+    def summary(self) -> str:
+        return (f"{self.samples} samples every {self.period:g} s: {self.overruns} overran their period "
+                f"(worst by {self.max_overrun:.3f} s), {self.missed} deadlines missed, "
+                f"latest start {self.max_late * 1000:.1f} ms after its deadline")
+
+
+class PmaCollector:
+    """
+    Concurrent replacement for perform_queries/data_processing in pmaCountersFromSwitch.sh.
+
+    ``sample()`` queries every switch once and stores the raw responses and
+    their timestamps by (switch, port, iteration); ``write_csv`` and
+    ``write_raw`` then produce the same files as the shell script.
+    """
+    def __init__(self, topology: FabricTopology, data_vl_start: int, data_vl_end: int,
+                 jobs: int = DEFAULT_JOBS, ports_per_query: int = DEFAULT_PORTS_PER_QUERY,
+                 opapmaquery: str = "opapmaquery", keep_responses: bool = True,
+                 clock: Optional[SampleClock] = None):
+        if jobs < 1 or ports_per_query < 1:
+            raise ValueError("jobs and ports_per_query must be at least 1")
+        self.topology = topology
+        self.data_vl_start = data_vl_start
+        self.data_vl_end = data_vl_end
+        self.vl_mask = create_vl_mask(data_vl_start, data_vl_end)
+        self.jobs = jobs
+        self.ports_per_query = ports_per_query
+        self.opapmaquery = opapmaquery
+        self.iterations = 0
+        self.keep_responses = keep_responses
+        self.query_out: Dict[Tuple[str, str, int], str] = {}
+        self.query_times: Dict[Tuple[str, str, int], SampleTimes] = {}
+        self.clock = clock or SampleClock()
+        # Switches whose multi-port responses could not be split; queried per port
+        self._per_port_switches = set()
+        if ports_per_query == 1:
+            self._per_port_switches.update(topology.switches)
+
+    def _query(self, switch: str, ports: List[str]) -> Tuple[int, str]:
+        return _run([self.opapmaquery, "-o", "getdatacounters", "-n", port_mask(ports),
+                     "-w", self.vl_mask, "-l", self.topology.lids[switch]])
+
+    def _query_switch(self, switch: str) -> Dict[str, Tuple[str, float, float]]:
+        """Raw getdatacounters response and monotonic query start/end for every ISL of one switch."""
+        ports = self.topology.isl_ports[switch]
+        responses = {}
+        if switch not in self._per_port_switches:
+            wanted = sorted(set(ports), key=int)
+            for start in range(0, len(wanted), self.ports_per_query):
+                chunk = wanted[start:start + self.ports_per_query]
+                started = time.monotonic()
+                status, output = self._query(switch, chunk)
+                finished = time.monotonic()
+                blocks = split_port_blocks(output) if status == 0 else {}
+                if set(blocks) != {int(port) for port in chunk}:
+                    logger.warning(f"Multi-port query of switch {switch} ports {','.join(chunk)} "
+                                   f"{'failed' if status else 'could not be split per port'}; "
+                                   "querying its ports one at a time")
+                    self._per_port_switches.add(switch)
+                    responses.clear()
+                    break
+                responses.update((port, (blocks[int(port)], started, finished)) for port in chunk)
+        if switch in self._per_port_switches:
+            # Same query and (stdout only, exit status ignored) handling as perform_queries
+            for port in ports:
+                if port not in responses:
+                    started = time.monotonic()
+                    output = self._query(switch, [port])[1]
+                    responses[port] = (output.rstrip("\n"), started, time.monotonic())
+        return responses
+
+    def _for_each_switch(self, pool: ThreadPoolExecutor, func) -> Dict[str, object]:
+        switches = self.topology.switches
+        return dict(zip(switches, pool.map(func, switches)))
+
+    def clear_counters(self, pool: ThreadPoolExecutor) -> None:
+        """Clear the ISL counters of every switch, like initialization."""
+        def clear(switch: str) -> None:
+            _run([self.opapmaquery, "-o", "clearportstatus", "-n", port_mask(self.topology.isl_ports[switch]),
+                  "-l", self.topology.lids[switch]])
+        self._for_each_switch(pool, clear)
+
+    def sample(self, pool: ThreadPoolExecutor, scheduled: Optional[float] = None) -> Dict[Tuple[str, str], PortSample]:
+        """
+        Query every switch once (one iteration of perform_queries).
+
+        ``scheduled`` is the monotonic time the sample was due (default:
+        now); it becomes the Sample Time of every port.
+
+        Returns:
+            This iteration's (response, SampleTimes) by (switch, port). They
+            are also kept in query_out/query_times unless the collector was
+            created with ``keep_responses=False``.
+        """
+        sample_time = self.clock.wall(time.monotonic() if scheduled is None else scheduled)
+        iteration_out = {}
+        for switch, responses in self._for_each_switch(pool, self._query_switch).items():
+            for port in self.topology.isl_ports[switch]:
+                query_data, started, finished = responses[port]
+                iteration_out[(switch, port)] = (query_data, (sample_time, self.clock.wall(started),
+                                                              self.clock.wall(finished)))
+        if self.keep_responses:
+            for (switch, port), (query_data, times) in iteration_out.items():
+                self.query_out[(switch, port, self.iterations)] = query_data
+                self.query_times[(switch, port, self.iterations)] = times
+        self.iterations += 1
+        return iteration_out
+
+    def csv_formatter(self, selected_attributes: str, timestamps: bool = False) -> PmaCsvFormatter:
+        topology = self.topology
+        return PmaCsvFormatter(selected_attributes, topology.switches, topology.descriptions, topology.isl_ports,
+                               csv_vls(self.data_vl_start, self.data_vl_end), timestamps)
+
+    def write_csv(self, selected_attributes: str, output_file: str, timestamps: bool = False) -> None:
+        """Write the processed CSV in data_processing's row order, optionally with the timestamp columns."""
+        extractor = AttributeExtractor(attribute_names(selected_attributes))
+
+        def port_values(key: Tuple[str, str, int]) -> Optional[Dict[str, str]]:
+            query_data = self.query_out.get(key)
+            return extractor.section_values(query_data) if query_data else None
+
+        write_pma_csv(output_file, self.csv_formatter(selected_attributes, timestamps), self.iterations,
+                      port_values, self.query_times.get)
+
+    def write_raw(self, raw_output_file: str, timestamps: bool = False) -> None:
+        """Write every raw response in the shell script's raw output format, optionally with timestamps."""
+        with open(raw_output_file, 'w') as out:
+            out.write(f"{RAW_HEADER}\n")
+            for switch in self.topology.switches:
+                for port in self.topology.isl_ports[switch]:
+                    for i in range(self.iterations):
+                        key = (switch, port, i)
+                        out.write(raw_block(switch, port, i, self.query_out.get(key, ''),
+                                            self.query_times.get(key) if timestamps else None))
+
+
+class SampleWriter:
+    """
+    Appends each sample to the CSV and raw output files as soon as it is taken.
+
+    The CSV gets whole rows one iteration at a time, so it can be followed
+    with ``tail -f`` and holds every completed sample if the collector is
+    killed. Raw blocks are written in sample order (iteration, switch,
+    port) instead of the shell script's switch/port order; pmaQueryParser
+    reads both. Both files are flushed after every sample and fsynced at
+    most every ``fsync_interval`` seconds (0: after every sample).
+    """
+    def __init__(self, formatter: PmaCsvFormatter, extractor: AttributeExtractor, output_file: str,
+                 raw_output_file: Optional[str] = None, fsync_interval: float = DEFAULT_FSYNC_INTERVAL):
+        self.formatter = formatter
+        self.extractor = extractor
+        self.fsync_interval = fsync_interval
+        self._files = [open(output_file, 'w')]
+        self._files[0].write(formatter.header)
+        self._raw = None
+        if raw_output_file:
+            self._raw = open(raw_output_file, 'w')
+            self._raw.write(f"{RAW_HEADER}\n")
+            self._files.append(self._raw)
+        self._last_sync = time.monotonic()
+        self.flush()
+
+    def write_sample(self, iteration: int, port_samples: Dict[Tuple[str, str], PortSample]) -> None:
+        """Append one iteration's rows and raw blocks, then flush (and fsync when due)."""
+        def port_values(key: Tuple[str, str, int]) -> Optional[Dict[str, str]]:
+            query_data = port_samples[key[:2]][0] if key[:2] in port_samples else None
+            return self.extractor.section_values(query_data) if query_data else None
+
+        def port_times(key: Tuple[str, str, int]) -> Optional[SampleTimes]:
+            return port_samples[key[:2]][1] if key[:2] in port_samples else None
+
+        self._files[0].write(self.formatter.iteration_rows(iteration, port_values, port_times))
+        if self._raw is not None:
+            timestamps = self.formatter.timestamps
+            self._raw.write("".join([raw_block(switch, port, iteration, query_data, times if timestamps else None)
+                                     for (switch, port), (query_data, times) in port_samples.items()]))
+        self.flush()
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def flush(self) -> None:
+        for out in self._files:
+            out.flush()
+
+    def sync(self) -> None:
+        """Flush and fsync both files."""
+        self.flush()
+        for out in self._files:
+            os.fsync(out.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        self.sync()
+        for out in self._files:
+            out.close()
+
+
+def wait_for_start_file(path: str, not_before: float, stop: threading.Event, clock: SampleClock) -> Optional[float]:
+    """
+    Wait until ``path`` is created or touched at or after ``not_before``.
+
+    Args:
+        path: File touched by the job script when the benchmark starts
+        not_before: Unix time; an older file is left over from an earlier run
+        stop: Ends the wait early when set
+        clock: Converts the file's mtime to the monotonic clock
+
+    Returns:
+        Optional[float]: The file's mtime on the monotonic clock, None if stopped first
+    """
+    while not stop.is_set():
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None and mtime >= not_before:
+            return clock.monotonic(mtime)
+        stop.wait(ALIGN_POLL_INTERVAL)
+    return None
+
+
+def isl_counter_collection(data_vl_start: int, data_vl_end: int, iterations: int, time_between_queries: float,
+                           selected_attributes: str, output_file: str, raw_output_file: Optional[str] = None,
+                           jobs: int = DEFAULT_JOBS, ports_per_query: int = DEFAULT_PORTS_PER_QUERY,
+                           opapmaquery: str = "opapmaquery", tools: OpaTools = OpaTools(),
+                           stream: bool = False, fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+                           timestamps: bool = False, fixed_rate: bool = False,
+                           align_to: Optional[str] = None,
+                           refresh_topology: bool = False) -> Tuple[PmaCollector, Optional[FixedRateSchedule]]:
+    """
+    Python counterpart of islCounterCollection.
+
+    Clears the ISL counters, samples every switch ``iterations`` times with
+    ``time_between_queries`` seconds of sleep after each sample, then
+    writes ``output_file`` and, if given, ``raw_output_file``. With
+    ``stream`` every sample is appended to them as soon as it is taken (see
+    SampleWriter) and no responses are kept in memory.
+
+    With ``fixed_rate``, ``time_between_queries`` is instead the sampling
+    period of a FixedRateSchedule, and the TIMESTAMP_COLUMNS are written
+    as with ``timestamps``. With ``align_to``, the first sample waits
+    until that file is touched, and a fixed-rate schedule starts at its
+    mtime.
+
+    The topology comes from the fabricTopology snapshot, rediscovered
+    with ``tools`` only when the fabric changed or with ``refresh_topology``.
+
+    SIGTERM or SIGINT stops the collection after the sample in progress;
+    the samples taken so far are still written.
+
+    Returns:
+        The collector and, with ``fixed_rate``, its schedule (for the overrun counts)
+    """
+    launched = int(time.time())  # Whole seconds, for file systems with coarse mtimes
+    timestamps = timestamps or fixed_rate
+    if fixed_rate and time_between_queries <= 0:
+        raise ValueError("the sampling period must be positive with --fixed-rate")
+    topology = load_topology(tools, refresh=refresh_topology)
+    if not topology.switches:
+        raise RuntimeError("opareport found no switches")
+    collector = PmaCollector(topology, data_vl_start, data_vl_end, jobs, ports_per_query, opapmaquery,
+                             keep_responses=not stream)
+    writer = None
+    if stream:
+        writer = SampleWriter(collector.csv_formatter(selected_attributes, timestamps),
+                              AttributeExtractor(attribute_names(selected_attributes)),
+                              output_file, raw_output_file, fsync_interval)
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame) -> None:
+        logger.warning(f"Received {signal.Signals(signum).name}, stopping after the current sample")
+        stop.set()
+
+    schedule = None
+    previous_handlers = {signum: signal.signal(signum, request_stop) for signum in STOP_SIGNALS}
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            collector.clear_counters(pool)
+            start = time.monotonic()
+            if align_to:
+                start = wait_for_start_file(align_to, launched, stop, collector.clock) or start
+            if fixed_rate:
+                schedule = FixedRateSchedule(time_between_queries, start)
+            for _ in range(iterations):
+                if schedule is not None:
+                    # Like sleep, but a stop signal ends it early
+                    stop.wait(max(0.0, schedule.next_deadline - time.monotonic()))
+                if stop.is_set():
+                    break
+                scheduled = schedule.start_sample(time.monotonic()) if schedule is not None else None
+                port_samples = collector.sample(pool, scheduled)
+                if writer is not None:
+                    writer.write_sample(collector.iterations - 1, port_samples)
+                if schedule is not None:
+                    schedule.finish_sample(time.monotonic())
+                elif stop.wait(time_between_queries):
+                    break
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        collector.write_csv(selected_attributes, output_file, timestamps)
+        if raw_output_file:
+            collector.write_raw(raw_output_file, timestamps)
+    return collector, schedule
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Collect PMA counters from every fabric switch in parallel '
+                                                 '(same arguments and output as pmaCountersFromSwitch.sh)')
+    parser.add_argument('data_vl_start', type=int, help='First data VL')
+    parser.add_argument('data_vl_end', type=int, help='Last data VL')
+    parser.add_argument('iterations', type=int, help='Number of samples')
+    parser.add_argument('time_between_queries', type=float,
+                        help='Seconds to sleep after each sample (the sampling period with --fixed-rate)')
+    parser.add_argument('selected_attributes', help='Comma separated counter names, e.g. "Xmit Pkts, Xmit Wait"')
+    parser.add_argument('output_file', help='Processed CSV to write')
+    parser.add_argument('raw_output_file', nargs='?', default=None, help='Raw query outputs to write (optional)')
+    parser.add_argument('--jobs', '-j', type=int, default=DEFAULT_JOBS, metavar='N',
+                        help=f'Switches queried at once (default: {DEFAULT_JOBS})')
+    parser.add_argument('--ports-per-query', type=int, default=DEFAULT_PORTS_PER_QUERY, metavar='N',
+                        help=f'ISLs selected by one getdatacounters port mask; 1 queries port by port '
+                             f'like the shell script (default: {DEFAULT_PORTS_PER_QUERY})')
+    parser.add_argument('--stream', action='store_true',
+                        help='Append every sample to the output files as soon as it is taken instead of at the end '
+                             '(raw blocks are then in sample order)')
+    parser.add_argument('--fsync-interval', type=float, default=DEFAULT_FSYNC_INTERVAL, metavar='SECONDS',
+                        help=f'With --stream, fsync the outputs at most this often; 0 syncs every sample '
+                             f'(default: {DEFAULT_FSYNC_INTERVAL:g})')
+    parser.add_argument('--timestamps', action='store_true',
+                        help='Add Sample Time, Query Start and Query End columns (Unix seconds) to the CSV '
+                             'and the times to the raw block headers')
+    parser.add_argument('--fixed-rate', action='store_true',
+                        help='Start a sample every time_between_queries seconds on a monotonic clock, whatever '
+                             'the queries take, and report overrun periods (implies --timestamps)')
+    parser.add_argument('--align-to', default=None, metavar='FILE',
+                        help='Take the first sample once FILE is created or touched (e.g. just before mpirun); '
+                             'with --fixed-rate the schedule starts at its mtime')
+    parser.add_argument('--refresh-topology', action='store_true',
+                        help='Rediscover the fabric topology even if its snapshot is current')
+    parser.add_argument('--opapmaquery', default='opapmaquery', metavar='PATH',
+                        help='opapmaquery to run, e.g. a script replaying recorded output')
+    for tool in OpaTools.__dataclass_fields__:
+        parser.add_argument(f'--{tool}', default=tool, metavar='PATH',
+                            help=f'{tool} to run for the topology, e.g. a script replaying recorded output')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    tools = OpaTools(*(getattr(args, tool) for tool in OpaTools.__dataclass_fields__))
+    try:
+        collector, schedule = isl_counter_collection(args.data_vl_start, args.data_vl_end, args.iterations,
+                                                     args.time_between_queries, args.selected_attributes,
+                                                     args.output_file, args.raw_output_file, args.jobs,
+                                                     args.ports_per_query, args.opapmaquery, tools,
+                                                     args.stream, args.fsync_interval, args.timestamps,
+                                                     args.fixed_rate, args.align_to, args.refresh_topology)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Collected {collector.iterations} iterations from {len(collector.topology.switches)} switches "
+          f"into {args.output_file}")
+    if schedule is not None:
+        print(f"Schedule: {schedule.summary()}")
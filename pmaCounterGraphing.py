@@ -3,19 +3,32 @@
 PMA Counter Data Parser and Graphing Utilities
 
 This module provides functions to parse PMA counter CSV data, organize it
-into a multi-dimensional dictionary structure, and generate visualizations and graphs for analysis.
+into a columnar NumPy-backed store (readable like the legacy multi-dimensional
+dictionary), and generate visualizations and graphs for analysis.
 """
 
+import argparse
 import csv
-import gc
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import os
+import re
 import sys
 import logging
 import hashlib
-from typing import Dict, List, Tuple, Optional, Any, Union
+import io
+import json
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Tuple, Optional, Any, Union
 from dataclasses import dataclass
+import numpy as np
+import matplotlib
 import matplotlib.pyplot as plt
-from matplotlib.axes import Axes
 
 # Configure logging
 logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
@@ -33,8 +46,53 @@ TIGHT_LAYOUT_TOP = 0.96
 # Performance constants
 DEFAULT_MARKERSIZE = 3
 DEFAULT_LINEWIDTH = 1
+DEFAULT_TIME_SERIES_CACHE_MB = 64  # Byte bound of the TimeSeriesCache LRU
+MAX_LAYOUTS_PER_TEMPLATE = 64  # Remembered tight layouts per reusable figure
+PMA_COUNTER_BITS = 64  # opapmaquery getdatacounters counter width
+WRAP_FRACTION = 0.75  # A drop from above this fraction of the counter range is a wrap, not a reset
+DELTA_SUFFIX = " Delta"
+RATE_SUFFIX = " Rate"
+RATIO_SEPARATOR = " per "
+# Utilization ratios computed from per-interval deltas: (numerator, denominator)
+DERIVED_RATIOS = (
+    ("Xmit Wait", "Xmit Pkts"),
+    ("Xmit Time Cong", "Xmit Pkts"),
+    ("Rcv Bubble", "Rcv Pkts"),
+)
+MANIFEST_FILENAME = ".render_manifest.json"  # Content-hash manifest in config.output_dir
+MANIFEST_VERSION = 1
+HEATMAP_DIR = "heatmaps"  # Subdirectory of config.output_dir for --mode heatmap
+HEATMAP_INCHES_PER_ROW = 0.12
+HEATMAP_INCHES_PER_ITERATION = 0.15
+HEATMAP_MAX_HEIGHT = 80  # Inches; at the default DPI this stays under Agg's size limit
+HEATMAP_MAX_WIDTH = 40
+HEATMAP_COLORBAR_FRACTION = 0.03  # Share of the figure width given to the colorbar
+HEATMAP_MAX_ROW_LABELS = 150  # Beyond this only every n-th (switch, port) row is labelled
+HEATMAP_MAX_ITERATION_LABELS = 40
+DEFAULT_HEATMAP_SORT_ATTRIBUTE = "Xmit Wait"
+TRIAGE_DIR = "triage"  # Subdirectory of config.output_dir for --mode triage
+TRIAGE_ATTRIBUTES = ("Xmit Wait", "Xmit Time Cong", "Rcv Bubble")  # First one drives peak iteration and burstiness
+TRIAGE_TABLE = "congestion_triage.csv"
+DEFAULT_TRIAGE_TOP = 20
+LIVE_DIR = "live"  # Subdirectory of config.output_dir for --follow
+LIVE_TOP_PORTS = "top_congested_ports.png"
+LIVE_HEATMAP = "fabric_heatmap.png"
+LIVE_TABLE = "congestion_live.csv"
+DEFAULT_FOLLOW_INTERVAL = 10.0  # Seconds between --follow refreshes
+FOLLOW_STOP_SIGNALS = ("SIGTERM", "SIGINT")
 CSV_START_ROW = 2  # Start enumeration at 2 to match file line numbers (header=line 1, first data row=line 2)
+_DIGITS = re.compile(r'[0-9]')  # Tick label digits, normalized in layout signatures
 AVG_CHARS_PER_CELL = 20  # For CSV size estimation
+PARSE_BLOCK_ROWS = 65536  # Rows converted to NumPy per block while parsing
+DEFAULT_STREAM_MEMORY_BUDGET_MB = 512  # Pending-group memory cap for streaming mode
+STREAM_BUDGET_CHECK_ROWS = 8192  # Rows between memory budget checks while streaming
+PARSE_CACHE_SUFFIX = ".pmacache"  # Sidecar directory next to the CSV holding the parsed arrays
+PARSE_CACHE_INDEX = "index.json"
+PARSE_CACHE_VERSION = 2
+HASH_CHUNK_BYTES = 1 << 20
+PROFILE_ENV_VAR = "PMA_PROFILE"  # Set to 1 to print per-stage timings
+TRACE_ENV_VAR = "PMA_TRACE"  # Path of a Chrome trace-event JSON file to write
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
 
 @dataclass
 class PlotConfig:
@@ -51,31 +109,885 @@ class PlotConfig:
     use_fast_rendering: bool = True
     cache_time_series: bool = True
     optimize_memory: bool = True
-    cache_clear_interval: int = 5  # Clear cache every N GUIDs
+    time_series_cache_mb: float = DEFAULT_TIME_SERIES_CACHE_MB  # LRU bound for TimeSeriesCache
     individual_subplots: bool = True  # Generate each subplot as separate PNG
+    jobs: int = 1  # Worker processes for rendering (1 = serial)
+    reuse_figures: bool = True  # Re-fill one figure per graph kind/line count instead of one per PNG
+    incremental: bool = True  # Skip figures whose manifest digest is unchanged
+    
+    # Derived metrics (see add_derived_metrics)
+    derived_metrics: bool = False  # Add Delta/Rate/ratio attributes and graph them
+    sample_interval: Optional[float] = None  # Seconds between samples, enables Rate attributes (None: measured
+                                             # from the Query Start column when the CSV has timestamps)
+    time_axis: bool = True  # Plot against seconds since the first sample when the CSV has timestamps
+    
+    # Stage profiling (see StageProfiler), also enabled by the PMA_PROFILE/PMA_TRACE environment variables
+    profile: bool = os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+    trace_path: Optional[str] = os.environ.get(TRACE_ENV_VAR) or None  # Chrome trace-event JSON output
 
 # Global configuration instance
 config = PlotConfig()
 
-def parse_pma_csv(csv_file_path: str) -> Tuple[Dict[str, Any], List[str]]:
+class _NoStage:
+    """Shared do-nothing context manager returned while profiling is off."""
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_STAGE = _NoStage()
+
+
+def _current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _StageTimer:
+    __slots__ = ("_profiler", "_name", "_start")
+    
+    def __init__(self, profiler: 'StageProfiler', name: str):
+        self._profiler = profiler
+        self._name = name
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._profiler._record(self._name, self._start, time.perf_counter())
+        return False
+
+
+class StageProfiler:
+    """
+    Wall-clock timers and RSS samples around the main pipeline stages.
+
+    ``with _profiler.stage("savefig"): ...`` records one call of a stage.
+    While disabled, stage() returns a shared no-op context manager, so an
+    instrumented call costs one attribute check. With ``trace`` every call
+    is also kept as a Chrome trace event (chrome://tracing, Perfetto).
+    """
+    def __init__(self, enabled: bool = False, trace: bool = False):
+        self.configure(enabled, trace)
+    
+    def configure(self, enabled: bool, trace: bool = False) -> None:
+        """Turn profiling on or off and drop everything recorded so far."""
+        self.enabled = enabled or trace
+        self.trace = trace
+        self._durations = {}
+        self._peak_rss = {}
+        self._events = []
+        # Trace timestamps are wall-clock so events from worker processes line up
+        self._epoch_offset = time.time() - time.perf_counter()
+    
+    def stage(self, name: str):
+        """Context manager timing one call of ``name``."""
+        if not self.enabled:
+            return _NO_STAGE
+        return _StageTimer(self, name)
+    
+    def _record(self, name: str, start: float, end: float) -> None:
+        rss = _current_rss_bytes()
+        self._durations.setdefault(name, []).append(end - start)
+        if rss > self._peak_rss.get(name, 0):
+            self._peak_rss[name] = rss
+        if self.trace:
+            self._events.append({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                "ts": (start + self._epoch_offset) * 1e6, "dur": (end - start) * 1e6,
+                "args": {"rss_mb": round(rss / (1024 * 1024), 1)},
+            })
+    
+    def take_state(self) -> Dict[str, Any]:
+        """Hand this process's samples to the parent and reset them (worker side)."""
+        state = {"durations": self._durations, "peak_rss": self._peak_rss, "events": self._events}
+        self._durations = {}
+        self._peak_rss = {}
+        self._events = []
+        return state
+    
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        """Fold a worker's samples into this profiler (parent side)."""
+        for name, durations in state["durations"].items():
+            self._durations.setdefault(name, []).extend(durations)
+        for name, rss in state["peak_rss"].items():
+            self._peak_rss[name] = max(rss, self._peak_rss.get(name, 0))
+        self._events.extend(state["events"])
+    
+    def summary(self) -> str:
+        """Per-stage count, total, p50/p95 and peak RSS, slowest stage first."""
+        if not self._durations:
+            return "No profiled stages recorded."
+        header = (f"{'Stage':<24}{'Count':>8}{'Total s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+                  f"{'Max ms':>10}{'Peak RSS MB':>13}")
+        lines = [header, "-" * len(header)]
+        for name, durations in sorted(self._durations.items(), key=lambda item: -sum(item[1])):
+            ms = np.asarray(durations) * 1000
+            p50, p95 = np.percentile(ms, [50, 95])
+            lines.append(f"{name:<24}{len(ms):>8}{ms.sum() / 1000:>10.3f}{p50:>10.2f}{p95:>10.2f}"
+                         f"{ms.max():>10.2f}{self._peak_rss.get(name, 0) / (1024 * 1024):>13.1f}")
+        return "\n".join(lines)
+    
+    def write_trace(self, trace_path: str) -> None:
+        """Write the recorded calls as a Chrome trace-event JSON file."""
+        with open(trace_path, 'w', encoding='utf-8') as trace_file:
+            json.dump({"traceEvents": self._events, "displayTimeUnit": "ms"}, trace_file)
+
+# Global stage profiler instance, see _configure_profiling
+_profiler = StageProfiler(config.profile, config.trace_path is not None)
+
+
+class GraphRenderError(RuntimeError):
+    """Raised when a graph cannot be rendered, naming the GUID, graph type and port."""
+    def __init__(self, guid: str, graph_type: str, port: Optional[str], message: str):
+        super().__init__(guid, graph_type, port, message)
+        self.guid = guid
+        self.graph_type = graph_type
+        self.port = port
+        self.message = message
+
+    def __str__(self) -> str:
+        where = f"GUID {self.guid} {self.graph_type}"
+        where += f" port {self.port}" if self.port is not None else " (all ports)"
+        return f"Failed to render {where}: {self.message}"
+
+
+class _AttributeView(Mapping):
+    """Read-only ``{attribute: value}`` view of one (GUID, port, VL, iteration) cell."""
+    def __init__(self, store: 'PmaCounterStore', gi: int, pi: int, vi: int, ii: int):
+        self._store = store
+        self._key = (gi, pi, vi, ii)
+
+    def __getitem__(self, attribute: str) -> Union[int, float]:
+        ti = self._store.timestamp_index.get(attribute)
+        if ti is not None:
+            return self._store.timestamps[self._key + (ti,)].item()
+        array, ai = self._store.column(attribute)
+        return array[self._key + (ai,)].item()
+
+    def __iter__(self):
+        yield from self._store.attributes
+        yield from self._store.timestamp_columns
+
+    def __len__(self) -> int:
+        return len(self._store.attributes) + len(self._store.timestamp_columns)
+
+
+class _VLView(Mapping):
+    """Read-only ``{VL: {attribute: value}}`` view of one (GUID, iteration, port)."""
+    def __init__(self, store: 'PmaCounterStore', gi: int, ii: int, pi: int):
+        self._store = store
+        self._gi, self._ii, self._pi = gi, ii, pi
+
+    def _present(self) -> List[int]:
+        return np.flatnonzero(self._store.present[self._gi, self._pi, :, self._ii]).tolist()
+
+    def __getitem__(self, vl: str) -> _AttributeView:
+        vi = self._store.vl_index[vl]
+        if not self._store.present[self._gi, self._pi, vi, self._ii]:
+            raise KeyError(vl)
+        return _AttributeView(self._store, self._gi, self._pi, vi, self._ii)
+
+    def __iter__(self):
+        return (self._store.vls[vi] for vi in self._present())
+
+    def __len__(self) -> int:
+        return len(self._present())
+
+
+class _PortView(Mapping):
+    """Read-only ``{port: {VL: ...}}`` view of one (GUID, iteration)."""
+    def __init__(self, store: 'PmaCounterStore', gi: int, ii: int):
+        self._store = store
+        self._gi, self._ii = gi, ii
+
+    def _present(self) -> List[int]:
+        return np.flatnonzero(self._store.present[self._gi, :, :, self._ii].any(axis=1)).tolist()
+
+    def __getitem__(self, port: str) -> _VLView:
+        pi = self._store.port_index[port]
+        if not self._store.present[self._gi, pi, :, self._ii].any():
+            raise KeyError(port)
+        return _VLView(self._store, self._gi, self._ii, pi)
+
+    def __iter__(self):
+        return (self._store.ports[pi] for pi in self._present())
+
+    def __len__(self) -> int:
+        return len(self._present())
+
+
+class _GuidView(Mapping):
+    """Read-only ``{"Description": str, iteration: {port: ...}}`` view of one GUID."""
+    def __init__(self, store: 'PmaCounterStore', guid: str):
+        self._store = store
+        self._guid = guid
+        self._gi = store.guid_index[guid]
+
+    def __getitem__(self, key: str) -> Union[str, _PortView]:
+        if key == "Description":
+            return self._store.descriptions[self._guid]
+        ii = self._store.iteration_index[key]
+        if not self._store.present[self._gi, :, :, ii].any():
+            raise KeyError(key)
+        return _PortView(self._store, self._gi, ii)
+
+    def __iter__(self):
+        yield "Description"
+        yield from self._store.guid_iterations(self._guid)
+
+    def __len__(self) -> int:
+        return 1 + len(self._store.guid_iterations(self._guid))
+
+
+class PmaCounterStore(Mapping):
+    """
+    Columnar store for parsed PMA counter data.
+
+    All counter values live in one dense NumPy array indexed
+    ``values[guid, port, vl, iteration, attribute]`` with a boolean
+    ``present[guid, port, vl, iteration]`` mask marking which rows were in
+    the CSV. Each axis has a label list and a label->index map, so lookups
+    by GUID/port/VL/iteration/attribute string stay O(1) and whole series
+    come back as array slices instead of being gathered cell by cell.
+
+    The store is also a read-only Mapping that mimics the legacy nested
+    dictionary, so ``store[guid][iteration][port][vl][attribute]`` and
+    ``store[guid]["Description"]`` keep working for existing callers.
+
+    TIMESTAMP_COLUMNS are kept apart, in a float64 ``timestamps`` array
+    with the same leading axes, so the counters stay exact int64 (Unix
+    seconds are fractional and would promote them to float64, which is
+    inexact above 2**53). ``sample_times`` turns them into a time axis,
+    which stores derived from this one inherit.
+
+    Derived attributes (see add_derived_attributes) are fractional too and
+    live in a float64 ``derived`` array of their own. ``attributes`` lists
+    the ``values`` columns followed by the ``derived`` ones; ``column``
+    finds an attribute's array, so raw series keep their int64 dtype
+    whether or not derived columns were added.
+    """
+    def __init__(self, guids: List[str], descriptions: Dict[str, str], ports: List[str], vls: List[str],
+                 iterations: List[str], attributes: List[str], values: np.ndarray, present: np.ndarray,
+                 sample_times: Optional[np.ndarray] = None, timestamp_columns: Optional[List[str]] = None,
+                 timestamps: Optional[np.ndarray] = None, derived_attributes: Optional[List[str]] = None,
+                 derived: Optional[np.ndarray] = None):
+        self.guids = guids
+        self.descriptions = descriptions
+        self.ports = ports
+        self.vls = vls
+        self.iterations = iterations
+        self.value_attributes = list(attributes)
+        self.derived_attributes = list(derived_attributes or [])
+        self.attributes = self.value_attributes + self.derived_attributes
+        self.values = values
+        self.derived = derived
+        self.present = present
+        self._sample_times = sample_times
+        self.timestamp_columns = list(timestamp_columns or [])
+        self.timestamps = timestamps
+
+        self.guid_index = {label: i for i, label in enumerate(guids)}
+        self.port_index = {label: i for i, label in enumerate(ports)}
+        self.vl_index = {label: i for i, label in enumerate(vls)}
+        self.iteration_index = {label: i for i, label in enumerate(iterations)}
+        self.attribute_index = {label: i for i, label in enumerate(self.attributes)}
+        self.timestamp_index = {label: i for i, label in enumerate(self.timestamp_columns)}
+
+        # Per-GUID axis summaries, computed once from the presence mask
+        self._guid_iterations = {}
+        self._guid_ports = {}
+        for gi, guid in enumerate(guids):
+            self._guid_iterations[guid] = [iterations[i] for i in np.flatnonzero(present[gi].any(axis=(0, 1)))]
+            self._guid_ports[guid] = [ports[p] for p in np.flatnonzero(present[gi].any(axis=(1, 2)))]
+
+    # Mapping interface (legacy nested-dict view)
+    def __getitem__(self, guid: str) -> _GuidView:
+        if guid not in self.guid_index:
+            raise KeyError(guid)
+        return _GuidView(self, guid)
+
+    def __iter__(self):
+        return iter(self.guids)
+
+    def __len__(self) -> int:
+        return len(self.guids)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of the dense value array (guid, port, vl, iteration, attribute)."""
+        return self.values.shape
+
+    def column(self, attribute: str) -> Tuple[np.ndarray, int]:
+        """(array, index) holding an attribute: ``values`` for counters, ``derived`` for derived attributes."""
+        ai = self.attribute_index[attribute]
+        n_values = len(self.value_attributes)
+        return (self.values, ai) if ai < n_values else (self.derived, ai - n_values)
+
+    def guid_iterations(self, guid: str) -> List[str]:
+        """Iteration labels that have data for this GUID, in iteration order."""
+        return self._guid_iterations.get(guid, [])
+
+    def guid_ports(self, guid: str) -> List[str]:
+        """Port labels that have data for this GUID, in port order."""
+        return self._guid_ports.get(guid, [])
+
+    def sample_times(self) -> Optional[np.ndarray]:
+        """
+        Seconds from the first sample to each iteration, from the Sample Time column.
+
+        None when the CSV has no timestamps. Every port of a sample shares
+        its Sample Time, so one value per iteration is enough; iterations
+        without any row are NaN.
+        """
+        sample_time = self.timestamp(SAMPLE_TIME_COLUMN)
+        if self._sample_times is None and sample_time is not None:
+            stamps = np.where(self.present, sample_time, -np.inf)
+            times = stamps.max(axis=(0, 1, 2))
+            times[~np.isfinite(times)] = np.nan
+            if not np.isnan(times).all():
+                self._sample_times = times - np.nanmin(times)
+        return self._sample_times
+
+    def timestamp(self, column: str) -> Optional[np.ndarray]:
+        """(guid, port, vl, iteration) Unix seconds of one of TIMESTAMP_COLUMNS, or None if the CSV lacks it."""
+        ti = self.timestamp_index.get(column)
+        return None if ti is None else self.timestamps[..., ti]
+
+    def port_vls(self, guid: str, port: str) -> List[str]:
+        """VL labels recorded for a GUID/port, in CSV order."""
+        gi = self.guid_index[guid]
+        pi = self.port_index[port]
+        return [self.vls[v] for v in np.flatnonzero(self.present[gi, pi].any(axis=1))]
+
+    def get_value(self, guid: str, iteration: str, port: str, vl: str, attribute: str) -> Optional[Union[int, float]]:
+        """Return a single value, or None if the cell was not in the CSV."""
+        try:
+            key = (self.guid_index[guid], self.port_index[port], self.vl_index[vl], self.iteration_index[iteration])
+            if attribute in self.timestamp_index:
+                array, ai = self.timestamps, self.timestamp_index[attribute]
+            else:
+                array, ai = self.column(attribute)
+        except KeyError:
+            return None
+        if not self.present[key]:
+            return None
+        return array[key + (ai,)].item()
+
+    def _iteration_selector(self, iterations: Optional[List[str]]) -> Union[slice, List[int]]:
+        if iterations is None:
+            return slice(None)
+        return [self.iteration_index[it] for it in iterations]
+
+    def series(self, guid: str, port: str, vl: str, attribute: str, iterations: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Return one attribute's values over iterations for a GUID/port/VL.
+
+        Missing cells read as 0. ``iterations`` selects and orders the
+        iteration axis; None returns every iteration in the store.
+        """
+        sel = self._iteration_selector(iterations)
+        array, ai = self.column(attribute)
+        return array[self.guid_index[guid], self.port_index[port], self.vl_index[vl], sel, ai]
+
+    def port_attribute(self, guid: str, port: str, attribute: str, iterations: Optional[List[str]] = None) -> np.ndarray:
+        """Return a (vl, iteration) array of one attribute for one port across all VLs."""
+        sel = self._iteration_selector(iterations)
+        array, ai = self.column(attribute)
+        return array[self.guid_index[guid], self.port_index[port], :, sel, ai]
+
+    def vl_attribute(self, guid: str, vl: str, attribute: str, iterations: Optional[List[str]] = None) -> np.ndarray:
+        """Return a (port, iteration) array of one attribute on one VL across all ports of a GUID."""
+        sel = self._iteration_selector(iterations)
+        array, ai = self.column(attribute)
+        return array[self.guid_index[guid], :, self.vl_index[vl], sel, ai]
+
+
+    def select(self, guids: Optional[List[str]] = None, attributes: Optional[List[str]] = None) -> 'PmaCounterStore':
+        """
+        Return a new store holding only the given GUIDs and attributes.
+
+        The arrays are copied, so the result pickles to a fraction of the
+        full store when handed to a worker process.
+        """
+        guids = list(self.guids) if guids is None else list(guids)
+        attributes = list(self.attributes) if attributes is None else list(attributes)
+        gsel = [self.guid_index[guid] for guid in guids]
+        raw = [attribute for attribute in attributes if attribute not in self.derived_attributes]
+        derived = [attribute for attribute in attributes if attribute in self.derived_attributes]
+        values = self.values[gsel][..., [self.attribute_index[attribute] for attribute in raw]]
+        derived_values = None
+        if self.derived is not None:
+            derived_values = self.derived[gsel][..., [self.column(attribute)[1] for attribute in derived]]
+        present = self.present[gsel]
+        timestamps = None if self.timestamps is None else self.timestamps[gsel]
+        descriptions = {guid: self.descriptions[guid] for guid in guids}
+        return PmaCounterStore(guids, descriptions, list(self.ports), list(self.vls),
+                               list(self.iterations), raw, values, present, self.sample_times(),
+                               self.timestamp_columns, timestamps, derived, derived_values)
+
+
+    def select_ports(self, guid_ports: Dict[str, List[str]]) -> 'PmaCounterStore':
+        """
+        Return a new store holding only the given ports of the given GUIDs.
+
+        Other ports of those GUIDs are marked absent, so guid_ports() and
+        the graph functions only see the selected ones.
+        """
+        subset = self.select(list(guid_ports))
+        keep = np.zeros(subset.present.shape[:2], dtype=bool)
+        for gi, guid in enumerate(subset.guids):
+            keep[gi, [subset.port_index[port] for port in guid_ports[guid]]] = True
+        return PmaCounterStore(subset.guids, subset.descriptions, subset.ports, subset.vls, subset.iterations,
+                               subset.value_attributes, subset.values, subset.present & keep[:, :, None, None],
+                               subset.sample_times(), subset.timestamp_columns, subset.timestamps,
+                               subset.derived_attributes, subset.derived)
+
+
+    def with_attributes(self, attributes: List[str], extra: np.ndarray) -> 'PmaCounterStore':
+        """
+        Return a new store with extra derived attribute columns appended.
+
+        ``extra`` has shape (guid, port, vl, iteration, len(attributes)).
+        It goes into the float64 ``derived`` array; ``values`` is shared
+        unchanged, so the counters keep their exact int64 dtype.
+        """
+        extra = extra.astype(np.float64, copy=False)
+        derived = extra if self.derived is None else np.concatenate([self.derived, extra], axis=-1)
+        return PmaCounterStore(list(self.guids), dict(self.descriptions), list(self.ports), list(self.vls),
+                               list(self.iterations), list(self.value_attributes), self.values, self.present,
+                               self.sample_times(), self.timestamp_columns, self.timestamps,
+                               self.derived_attributes + list(attributes), derived)
+
+
+def _label_sort_key(label: str) -> Tuple[int, int, str]:
+    """Sort numeric labels numerically and everything else lexically after them."""
+    try:
+        return (0, int(label), label)
+    except ValueError:
+        return (1, 0, label)
+
+
+def _convert_value_block(cells: List[List[str]], first_row_num: int) -> np.ndarray:
+    """
+    Convert a block of attribute strings to a 2-D numeric array.
+
+    Tries int64 for the whole block, then float64. Only if both fail does it
+    fall back to per-cell conversion, logging and zeroing cells that are not numeric.
+    """
+    try:
+        return np.array(cells, dtype=np.str_).astype(np.int64)
+    except (ValueError, OverflowError):
+        pass
+    try:
+        return np.array(cells, dtype=np.str_).astype(np.float64)
+    except ValueError:
+        pass
+    block = np.zeros((len(cells), len(cells[0]) if len(cells) else 0), dtype=np.float64)
+    for r, row in enumerate(cells):
+        for c, value_str in enumerate(row):
+            try:
+                block[r, c] = float(value_str)
+            except ValueError:
+                logger.warning(f"Row {first_row_num + r} has non-numeric value '{value_str}'. Storing 0.")
+    return block
+
+
+class _StoreBuilder:
+    """
+    Accumulates CSV rows in blocks and assembles a PmaCounterStore.
+
+    ``columns`` are the CSV's attribute columns. TIMESTAMP_COLUMNS among
+    them are split off into float64 blocks of their own.
+    """
+    def __init__(self, columns: List[str], descriptions: Optional[Dict[str, str]] = None):
+        self.attributes = counter_attributes(columns)
+        self.timestamp_columns = [column for column in columns if column in TIMESTAMP_COLUMNS]
+        self._counter_positions = [i for i, column in enumerate(columns) if column not in TIMESTAMP_COLUMNS]
+        self._timestamp_positions = [i for i, column in enumerate(columns) if column in TIMESTAMP_COLUMNS]
+        # Shared between builders when streaming so description checks span groups
+        self.descriptions = {} if descriptions is None else descriptions
+        self._labels = {axis: {} for axis in ("guid", "port", "vl", "iteration")}
+        self._index_blocks = []
+        self._value_blocks = []
+        self._timestamp_blocks = []
+        self._rows = []
+        self._cells = []
+        self._first_row_num = CSV_START_ROW
+        self._spill_path = None
+
+    def _label(self, axis: str, label: str) -> int:
+        labels = self._labels[axis]
+        idx = labels.get(label)
+        if idx is None:
+            idx = labels[label] = len(labels)
+        return idx
+
+    def add_row(self, row_num: int, guid: str, description: str, port: str, iteration: str, vl: str,
+                cells: List[str]) -> None:
+        existing_description = self.descriptions.get(guid)
+        if existing_description is None:
+            self.descriptions[guid] = description
+        elif existing_description != description:
+            # Validate description consistency for the same GUID
+            logger.warning(f"Inconsistent description for GUID {guid}: "
+                           f"existing='{existing_description}', new='{description}'. "
+                           f"Keeping existing description.")
+        if not self._rows:
+            self._first_row_num = row_num
+        self._rows.append((self._label("guid", guid), self._label("port", port),
+                           self._label("vl", vl), self._label("iteration", iteration)))
+        self._cells.append(cells)
+        if len(self._rows) >= PARSE_BLOCK_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        """Convert the pending rows into index/value arrays."""
+        if not self._rows:
+            return
+        self._index_blocks.append(np.array(self._rows, dtype=np.int32))
+        cells = self._cells
+        if self._timestamp_positions:
+            table = np.array(cells, dtype=np.str_)
+            self._timestamp_blocks.append(_convert_value_block(table[:, self._timestamp_positions],
+                                                               self._first_row_num).astype(np.float64))
+            cells = table[:, self._counter_positions]
+        self._value_blocks.append(_convert_value_block(cells, self._first_row_num))
+        self._rows = []
+        self._cells = []
+
+    def resident_bytes(self) -> int:
+        """Estimate the memory held by this builder's pending rows and blocks."""
+        pending = len(self._rows) * (len(self.attributes) + 4) * AVG_CHARS_PER_CELL
+        blocks = sum(block.nbytes for block in self._index_blocks)
+        blocks += sum(block.nbytes for block in self._value_blocks)
+        blocks += sum(block.nbytes for block in self._timestamp_blocks)
+        return pending + blocks
+
+    def spill(self, spill_path: str) -> None:
+        """Append the converted blocks to a spill file and release them from memory."""
+        self.flush()
+        if not self._index_blocks:
+            return
+        with open(spill_path, 'ab') as spill_file:
+            for i, (idx, block) in enumerate(zip(self._index_blocks, self._value_blocks)):
+                np.save(spill_file, idx)
+                np.save(spill_file, block)
+                if self._timestamp_positions:
+                    np.save(spill_file, self._timestamp_blocks[i])
+        self._spill_path = spill_path
+        self._index_blocks = []
+        self._value_blocks = []
+        self._timestamp_blocks = []
+
+    def _restore(self) -> None:
+        """Reload spilled blocks ahead of any still held in memory."""
+        if self._spill_path is None:
+            return
+        index_blocks = []
+        value_blocks = []
+        timestamp_blocks = []
+        spill_size = os.path.getsize(self._spill_path)
+        with open(self._spill_path, 'rb') as spill_file:
+            while spill_file.tell() < spill_size:
+                index_blocks.append(np.load(spill_file))
+                value_blocks.append(np.load(spill_file))
+                if self._timestamp_positions:
+                    timestamp_blocks.append(np.load(spill_file))
+        os.remove(self._spill_path)
+        self._spill_path = None
+        self._index_blocks = index_blocks + self._index_blocks
+        self._value_blocks = value_blocks + self._value_blocks
+        self._timestamp_blocks = timestamp_blocks + self._timestamp_blocks
+
+    def build(self) -> PmaCounterStore:
+        self.flush()
+        self._restore()
+        guids = list(self._labels["guid"])
+        vls = list(self._labels["vl"])
+        ports = sorted(self._labels["port"], key=_label_sort_key)
+        iterations = sorted(self._labels["iteration"], key=_label_sort_key)
+
+        # Map insertion-order indices to sorted positions
+        port_remap = np.empty(len(ports), dtype=np.int32)
+        for new_idx, label in enumerate(ports):
+            port_remap[self._labels["port"][label]] = new_idx
+        iteration_remap = np.empty(len(iterations), dtype=np.int32)
+        for new_idx, label in enumerate(iterations):
+            iteration_remap[self._labels["iteration"][label]] = new_idx
+
+        is_float = any(block.dtype.kind == 'f' for block in self._value_blocks)
+        dtype = np.float64 if is_float else np.int64
+        dims = (len(guids), len(ports), len(vls), len(iterations))
+        values = np.zeros(dims + (len(self.attributes),), dtype=dtype)
+        present = np.zeros(dims, dtype=bool)
+        timestamps = None
+        if self._timestamp_positions:
+            timestamps = np.zeros(dims + (len(self.timestamp_columns),), dtype=np.float64)
+
+        for i, (idx, block) in enumerate(zip(self._index_blocks, self._value_blocks)):
+            key = (idx[:, 0], port_remap[idx[:, 1]], idx[:, 2], iteration_remap[idx[:, 3]])
+            values[key] = block
+            present[key] = True
+            if timestamps is not None:
+                timestamps[key] = self._timestamp_blocks[i]
+        self._index_blocks = []
+        self._value_blocks = []
+        self._timestamp_blocks = []
+
+        descriptions = {guid: self.descriptions[guid] for guid in guids}
+        return PmaCounterStore(guids, descriptions, ports, vls, iterations,
+                               self.attributes, values, present,
+                               timestamp_columns=self.timestamp_columns, timestamps=timestamps)
+
+
+# Required headers that must be present
+REQUIRED_HEADERS = ("GUID", "Description", "Port", "Iteration", "VL")
+
+# Unix-second columns written by pmaCounterCollector --timestamps: the scheduled time of the
+# sample and the start/end of each port's query. Parsed like attributes but never graphed.
+SAMPLE_TIME_COLUMN = "Sample Time"
+QUERY_START_COLUMN = "Query Start"
+TIMESTAMP_COLUMNS = (SAMPLE_TIME_COLUMN, QUERY_START_COLUMN, "Query End")
+
+PmaRow = Tuple[int, str, str, str, str, str, List[str]]
+
+
+def _read_pma_header(csv_reader: Iterator[List[str]]) -> Tuple[List[str], List[str]]:
+    """
+    Read and validate the header row.
+
+    Returns:
+        The stripped header list and the attribute column names (every
+        column that is not one of REQUIRED_HEADERS).
+
+    Raises:
+        ValueError: If the file is empty or required headers are missing
+    """
+    try:
+        headers = next(csv_reader)
+    except StopIteration:
+        raise ValueError("CSV file is empty or has no header")
+    headers = [h.strip() for h in headers]
+    
+    # Validate required headers are present
+    missing_headers = set(REQUIRED_HEADERS) - set(headers)
+    if missing_headers:
+        raise ValueError(f"Missing required headers: {missing_headers}")
+    
+    # Get the remaining attribute columns (excluding the required ones)
+    attribute_columns = [header for header in headers if header not in REQUIRED_HEADERS]
+    return headers, attribute_columns
+
+
+def counter_attributes(attributes: List[str]) -> List[str]:
+    """The attributes that are counters, i.e. everything except TIMESTAMP_COLUMNS."""
+    return [attr for attr in attributes if attr not in TIMESTAMP_COLUMNS]
+
+
+def _iter_pma_rows(csv_reader: Iterator[List[str]], headers: List[str], start_row: int = CSV_START_ROW) -> Iterator[PmaRow]:
+    """
+    Yield (row_num, guid, description, port, iteration, vl, cells) for each
+    well-formed data row, warning about and skipping malformed rows.
+    """
+    # Get indices for required columns
+    guid_idx = headers.index("GUID")
+    desc_idx = headers.index("Description")
+    port_idx = headers.index("Port")
+    iteration_idx = headers.index("Iteration")
+    vl_idx = headers.index("VL")
+    attribute_indices = [i for i, header in enumerate(headers) if header not in REQUIRED_HEADERS]
+    
+    for row_num, row in enumerate(csv_reader, start=start_row):  # row_num matches file line numbers
+        if len(row) != len(headers):
+            logger.warning(f"Row {row_num} has {len(row)} columns, expected {len(headers)}. Skipping.")
+            continue
+        
+        yield (row_num,
+               row[guid_idx].strip(),
+               row[desc_idx].strip(),
+               row[port_idx].strip(),
+               row[iteration_idx].strip(),
+               row[vl_idx].strip(),
+               [row[i].strip() for i in attribute_indices])
+
+
+def _parse_cache_dir(csv_file_path: str) -> str:
+    """Sidecar directory holding the parsed arrays of a CSV."""
+    return csv_file_path + PARSE_CACHE_SUFFIX
+
+
+def _file_sha256(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _HashingReader(io.RawIOBase):
+    """Raw binary reader that feeds every byte it returns into a SHA-256, so parsing and hashing share one read."""
+    def __init__(self, path: str):
+        self._raw = open(path, 'rb', buffering=0)
+        self.sha256 = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._raw.readinto(buffer)
+        if count:
+            self.sha256.update(memoryview(buffer)[:count])
+        return count
+
+    def hexdigest(self) -> str:
+        """SHA-256 of the whole file; reads (and hashes) whatever the parser left unread."""
+        chunk = bytearray(HASH_CHUNK_BYTES)
+        while self.readinto(chunk):
+            pass
+        return self.sha256.hexdigest()
+
+    def close(self) -> None:
+        self._raw.close()
+        super().close()
+
+
+def _write_json_atomic(path: str, payload: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as json_file:
+        json.dump(payload, json_file)
+    os.replace(tmp_path, path)
+
+
+def _load_parse_cache(csv_file_path: str) -> Optional[PmaCounterStore]:
+    """
+    Load the sidecar written by _save_parse_cache, or None if it is missing or stale.
+
+    The sidecar is current when the CSV's size matches and either its
+    mtime matches or (e.g. after a copy or touch) its SHA-256 still does.
+    The arrays are memory-mapped read-only, so nothing is read until used.
+    """
+    cache_dir = _parse_cache_dir(csv_file_path)
+    index_path = os.path.join(cache_dir, PARSE_CACHE_INDEX)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as index_file:
+            index = json.load(index_file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable parse cache {index_path}: {e}")
+        return None
+    
+    stat = os.stat(csv_file_path)
+    if index.get("version") != PARSE_CACHE_VERSION or index.get("size") != stat.st_size:
+        return None
+    if index.get("mtime_ns") != stat.st_mtime_ns:
+        if _file_sha256(csv_file_path) != index.get("sha256"):
+            return None
+        # Same contents under a new mtime: refresh the key so the next load skips hashing
+        index["mtime_ns"] = stat.st_mtime_ns
+        try:
+            _write_json_atomic(index_path, index)
+        except OSError:
+            pass
+    
+    labels = index["labels"]
+    try:
+        values = np.load(os.path.join(cache_dir, "values.npy"), mmap_mode='r')
+        present = np.load(os.path.join(cache_dir, "present.npy"), mmap_mode='r')
+        timestamps = None
+        if labels["timestamp"]:
+            timestamps = np.load(os.path.join(cache_dir, "timestamps.npy"), mmap_mode='r')
+    except (OSError, ValueError) as e:
+        # Zero-size arrays cannot be mapped, and a half-written sidecar is simply rebuilt
+        logger.debug(f"Cannot map parse cache {cache_dir}: {e}")
+        return None
+    dims = tuple(len(labels[axis]) for axis in ("guid", "port", "vl", "iteration"))
+    if present.shape != dims or values.shape != dims + (len(labels["attribute"]),):
+        return None
+    if timestamps is not None and timestamps.shape != dims + (len(labels["timestamp"]),):
+        return None
+    
+    return PmaCounterStore(labels["guid"], index["descriptions"], labels["port"], labels["vl"],
+                           labels["iteration"], labels["attribute"], values, present,
+                           timestamp_columns=labels["timestamp"], timestamps=timestamps)
+
+
+def _save_parse_cache(csv_file_path: str, store: PmaCounterStore, stat: os.stat_result, sha256: str) -> None:
+    """
+    Write ``store`` as a sidecar next to the CSV, keyed on the CSV's state before parsing.
+
+    The arrays are written first and the index last, so an interrupted
+    write leaves no index (or an old one whose shapes no longer match).
+    Failures are logged and otherwise ignored: the sidecar is only a cache.
+    """
+    cache_dir = _parse_cache_dir(csv_file_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        arrays = [("values.npy", store.values), ("present.npy", store.present)]
+        if store.timestamp_columns:
+            arrays.append(("timestamps.npy", store.timestamps))
+        for name, array in arrays:
+            tmp_path = os.path.join(cache_dir, f"{name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'wb') as array_file:
+                np.save(array_file, array)
+            os.replace(tmp_path, os.path.join(cache_dir, name))
+        index = {
+            "version": PARSE_CACHE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256,
+            "labels": {"guid": store.guids, "port": store.ports, "vl": store.vls,
+                       "iteration": store.iterations, "attribute": store.value_attributes,
+                       "timestamp": store.timestamp_columns},
+            "descriptions": store.descriptions,
+        }
+        _write_json_atomic(os.path.join(cache_dir, PARSE_CACHE_INDEX), index)
+    except OSError as e:
+        logger.warning(f"Could not write parse cache {cache_dir}: {e}")
+
+
+def parse_pma_csv(csv_file_path: str, use_cache: bool = True) -> Tuple[PmaCounterStore, List[str]]:
     """
-    Parse PMA counter CSV file into a multi-dimensional dictionary structure.
+    Parse PMA counter CSV file into a columnar PmaCounterStore.
+    
+    With ``use_cache`` the parsed arrays are saved to a ``<csv>.pmacache``
+    sidecar directory, and later calls map them back in instead of
+    re-parsing for as long as the CSV is unchanged (same size, and same
+    mtime or SHA-256). The store's arrays are then read-only memmaps.
     
     Args:
         csv_file_path (str): Path to the CSV file to parse
+        use_cache (bool): Load from / write to the sidecar cache
         
     Returns:
-        Tuple[Dict[str, Any], List[str]]: A tuple containing:
-            - Dict[str, Any]: Multi-dimensional dictionary with structure:
+        Tuple[PmaCounterStore, List[str]]: A tuple containing:
+            - PmaCounterStore: Dense value array indexed
+                (guid, port, vl, iteration, attribute). It can also be read
+                like the legacy nested dictionary:
                 data[GUID][iteration][port][VL][attribute] = value
                 Special keys:
                 - data[GUID]["Description"] = description string
-            - List[str]: List of attribute column names found in the CSV file
+            - List[str]: List of counter attribute column names found in the
+                CSV file (TIMESTAMP_COLUMNS are in the store but not listed)
     
     Example:
         data, attribute_columns = parse_pma_csv("pmaOut.csv")
         # Access specific value
-        xmit_pkts = data["0xd0066a0106000015"]["0"]["57"]["Overall"]["Xmit Pkts"]
+        xmit_pkts = data.get_value("0xd0066a0106000015", "0", "57", "Overall", "Xmit Pkts")
+        # All iterations of Xmit Wait for port 57, one row per VL
+        xmit_wait = data.port_attribute("0xd0066a0106000015", "57", "Xmit Wait")
         # Get description
         desc = data["0xd0066a0106000015"]["Description"]
         
@@ -87,111 +999,279 @@ def parse_pma_csv(csv_file_path: str) -> Tuple[Dict[str, Any], List[str]]:
     if not os.path.exists(csv_file_path):
         raise FileNotFoundError(f"CSV file not found: {csv_file_path}")
     
-    # Initialize the main data structure
-    data = {}
+    if use_cache:
+        with _profiler.stage("parse_cache_load"):
+            store = _load_parse_cache(csv_file_path)
+        if store is not None:
+            logger.info(f"Loaded parsed data from {_parse_cache_dir(csv_file_path)}")
+            return store, counter_attributes(store.attributes)
+        # Key the sidecar on the file as it was before parsing started
+        stat = os.stat(csv_file_path)
     
-    # Required headers that must be present
-    required_headers = {"GUID", "Description", "Port", "Iteration", "VL"}
-    
-    with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
-        # Read the header line
+    # The sidecar's SHA-256 is taken from the bytes the parser reads, not from a second pass
+    hashing = _HashingReader(csv_file_path)
+    with _profiler.stage("parse_pma_csv"), io.TextIOWrapper(io.BufferedReader(hashing, HASH_CHUNK_BYTES),
+                                                            newline='', encoding='utf-8') as csvfile:
         csv_reader = csv.reader(csvfile)
-        try:
-            headers = next(csv_reader)
-        except StopIteration:
-            raise ValueError("CSV file is empty or has no header")
-        headers = [h.strip() for h in headers]
-        
-        # Validate required headers are present
-        header_set = set(headers)
-        missing_headers = required_headers - header_set
-        if missing_headers:
-            raise ValueError(f"Missing required headers: {missing_headers}")
-        
-        # Get indices for required columns
-        guid_idx = headers.index("GUID")
-        desc_idx = headers.index("Description")
-        port_idx = headers.index("Port")
-        iteration_idx = headers.index("Iteration")
-        vl_idx = headers.index("VL")
-        
-        # Get the remaining attribute columns (excluding the required ones)
-        attribute_columns = []
-        attribute_indices = []
-        for i, header in enumerate(headers):
-            if header not in required_headers:
-                attribute_columns.append(header)
-                attribute_indices.append(i)
+        headers, attribute_columns = _read_pma_header(csv_reader)
+        builder = _StoreBuilder(attribute_columns)
         
         # Process each data row
-        for row_num, row in enumerate(csv_reader, start=CSV_START_ROW):  # row_num matches file line numbers
-            if len(row) != len(headers):
-                logger.warning(f"Row {row_num} has {len(row)} columns, expected {len(headers)}. Skipping.")
-                continue
-                
-            try:
-                # Extract key values
-                guid = row[guid_idx].strip()
-                description = row[desc_idx].strip()
-                port = row[port_idx].strip()
-                iteration = row[iteration_idx].strip()
-                vl = row[vl_idx].strip()
-                
-                # Initialize nested structure if needed
-                if guid not in data:
-                    data[guid] = {"Description": description}
-                else:
-                    # Validate description consistency for the same GUID
-                    existing_description = data[guid]["Description"]
-                    if existing_description != description:
-                        logger.warning(f"Inconsistent description for GUID {guid}: "
-                                     f"existing='{existing_description}', new='{description}'. "
-                                     f"Keeping existing description.")
+        for row in _iter_pma_rows(csv_reader, headers):
+            builder.add_row(*row)
+        
+        store = builder.build()
+        sha256 = hashing.hexdigest()
+    if use_cache:
+        with _profiler.stage("parse_cache_save"):
+            _save_parse_cache(csv_file_path, store, stat, sha256)
+    
+    # Return both data and available attribute columns
+    return store, counter_attributes(attribute_columns)
+
+
+def iter_pma_groups(csv_file_path: str, group_by: str = "guid",
+                    memory_budget_mb: float = DEFAULT_STREAM_MEMORY_BUDGET_MB) -> Iterator[Tuple[Tuple[str, ...], PmaCounterStore]]:
+    """
+    Stream a PMA counter CSV and yield one small PmaCounterStore per group.
+
+    Rows are folded into per-group builders as they are read. A group is
+    yielded as soon as it is known to be complete: when the Iteration
+    column goes backwards on a row from a different group (the file is
+    grouped by GUID or port), every other open group has seen its last
+    iteration. Files in the iteration-major order written by
+    ``pmaCountersFromSwitch.sh data_processing`` only complete at EOF, so
+    whenever the pending groups exceed ``memory_budget_mb`` the largest
+    ones are spilled to a temporary directory and reloaded one at a time
+    when they are yielded.
+
+    Args:
+        csv_file_path: Path to the CSV file to parse
+        group_by: "guid" to yield one store per switch, or "port" to yield
+            one store per (GUID, port)
+        memory_budget_mb: Approximate cap on memory held by pending groups
+
+    Yields:
+        (group_key, store) where group_key is (guid,) or (guid, port)
+
+    Raises:
+        FileNotFoundError: If the CSV file doesn't exist
+        ValueError: If required headers are missing or group_by is unknown
+    """
+    if group_by not in ("guid", "port"):
+        raise ValueError(f"group_by must be 'guid' or 'port', got '{group_by}'")
+    if not os.path.exists(csv_file_path):
+        raise FileNotFoundError(f"CSV file not found: {csv_file_path}")
+    
+    budget_bytes = int(memory_budget_mb * 1024 * 1024)
+    spill_dir = None
+    builders = {}
+    emitted = set()
+    descriptions = {}
+    
+    def _complete(key: Tuple[str, ...]) -> Tuple[Tuple[str, ...], PmaCounterStore]:
+        emitted.add(key)
+        return key, builders.pop(key).build()
+    
+    try:
+        with open(csv_file_path, 'r', newline='', encoding='utf-8') as csvfile:
+            csv_reader = csv.reader(csvfile)
+            headers, attribute_columns = _read_pma_header(csv_reader)
+            
+            last_key = None
+            last_iteration = None
+            rows_since_check = 0
+            for row in _iter_pma_rows(csv_reader, headers):
+                guid, port, iteration = row[1], row[3], row[4]
+                key = (guid,) if group_by == "guid" else (guid, port)
+                iteration_key = _label_sort_key(iteration)
                 
-                # Initialize iteration level
-                if iteration not in data[guid]:
-                    data[guid][iteration] = {}
+                # An iteration reset on a new group closes every other open group
+                if (last_key is not None and key != last_key
+                        and iteration_key < last_iteration):
+                    for open_key in [k for k in builders if k != key]:
+                        yield _complete(open_key)
+                last_key = key
+                last_iteration = iteration_key
                 
-                # Initialize port level
-                if port not in data[guid][iteration]:
-                    data[guid][iteration][port] = {}
+                builder = builders.get(key)
+                if builder is None:
+                    if key in emitted:
+                        logger.warning(f"Group {key} reappeared after it was emitted. "
+                                       f"Later rows are emitted as a separate group.")
+                    builder = builders[key] = _StoreBuilder(attribute_columns, descriptions)
+                builder.add_row(*row)
                 
-                # Initialize VL level
-                if vl not in data[guid][iteration][port]:
-                    data[guid][iteration][port][vl] = {}
+                rows_since_check += 1
+                if rows_since_check < STREAM_BUDGET_CHECK_ROWS:
+                    continue
+                rows_since_check = 0
                 
-                # Store attribute values
-                for attr_name, attr_idx in zip(attribute_columns, attribute_indices):
-                    value_str = row[attr_idx].strip()
-                    
-                    # Try to convert to appropriate data type
-                    try:
-                        # Try integer first
-                        value = int(value_str)
-                    except ValueError:
-                        try:
-                            # Try float
-                            value = float(value_str)
-                        except ValueError:
-                            # Keep as string
-                            value = value_str
-                    
-                    data[guid][iteration][port][vl][attr_name] = value
-                    
-            except (IndexError, ValueError) as e:
-                logger.warning(f"Error processing row {row_num}: {e}. Skipping.")
-                continue
+                # Enforce the memory budget: compact first, then spill the largest groups
+                if sum(b.resident_bytes() for b in builders.values()) <= budget_bytes:
+                    continue
+                for b in builders.values():
+                    b.flush()
+                by_size = sorted(builders.items(), key=lambda item: item[1].resident_bytes(), reverse=True)
+                resident = sum(b.resident_bytes() for _, b in by_size)
+                for spill_key, b in by_size:
+                    if resident <= budget_bytes // 2:
+                        break
+                    if spill_dir is None:
+                        spill_dir = tempfile.mkdtemp(prefix="pma_stream_")
+                    resident -= b.resident_bytes()
+                    spill_name = "_".join(spill_key).replace(os.sep, "_") + ".npy"
+                    b.spill(os.path.join(spill_dir, spill_name))
+        
+        # Everything still open is complete at EOF
+        for open_key in list(builders):
+            yield _complete(open_key)
+    finally:
+        if spill_dir is not None:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+
+def _previous_sample_index(present: np.ndarray) -> np.ndarray:
+    """Iteration index of the last present sample before each iteration (-1 if none), same shape as ``present``."""
+    positions = np.where(present, np.arange(present.shape[-1]), -1)
+    last_present = np.maximum.accumulate(positions, axis=-1)
+    return np.concatenate([np.full(last_present.shape[:-1] + (1,), -1), last_present[..., :-1]], axis=-1)
+
+
+def query_intervals(data: PmaCounterStore) -> Optional[np.ndarray]:
+    """
+    Measured seconds between consecutive queries of every series, from the Query Start column.
+
+    Returns:
+        Optional[np.ndarray]: (guid, port, vl, iteration) intervals, NaN for
+            the first sample of a series (nothing to measure from) and for
+            missing samples; None when the CSV has no timestamps
+    """
+    starts = data.timestamp(QUERY_START_COLUMN)
+    if starts is None:
+        return None
+    previous_idx = _previous_sample_index(data.present)
+    previous = np.take_along_axis(starts, np.maximum(previous_idx, 0), axis=3)
+    intervals = starts - previous
+    intervals[(previous_idx < 0) | ~data.present] = np.nan
+    return intervals
+
+
+def _per_second(deltas: np.ndarray, interval: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Divide (guid, port, vl, iteration, attribute) deltas by their interval in seconds.
+
+    ``interval`` is one number, one per iteration or one per (guid, port,
+    vl, iteration) as from query_intervals. Rates without a finite
+    interval are 0.
+    """
+    seconds = np.broadcast_to(np.asarray(interval, dtype=np.float64), deltas.shape[:4])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = deltas / seconds[..., None]
+    rates[~np.isfinite(rates)] = 0
+    return rates
+
+
+def _sample_interval(data: PmaCounterStore) -> Optional[Union[float, np.ndarray]]:
+    """Seconds between samples: PlotConfig.sample_interval if set, else query_intervals (None without timestamps)."""
+    if config.sample_interval is not None:
+        return config.sample_interval
+    return query_intervals(data)
+
+
+def _counter_deltas(values: np.ndarray, present: np.ndarray, counter_bits: int) -> Tuple[np.ndarray, int, int]:
+    """
+    Per-interval deltas of cumulative counters along the iteration axis.
+
+    ``values`` is (guid, port, vl, iteration, attribute) and ``present`` is
+    (guid, port, vl, iteration). Counters are cleared before the first
+    sample, so the first delta is the first value. Missing samples are
+    bridged from the last present one and read as a delta of 0. A drop
+    from above ``WRAP_FRACTION`` of the counter range is a wrap; any
+    other drop is a reset and the new value is the delta since the reset.
+
+    Returns:
+        (deltas as float64, number of resets, number of wraps)
+    """
+    current = values.astype(np.float64)
+    previous_idx = _previous_sample_index(present)
+    previous = np.take_along_axis(current, np.maximum(previous_idx, 0)[..., None], axis=3)
+    previous[previous_idx < 0] = 0
     
-    # Return both data and available attribute columns
-    return data, attribute_columns
+    deltas = current - previous
+    dropped = deltas < 0
+    counter_range = float(2 ** counter_bits)
+    wrapped = dropped & (previous >= counter_range * WRAP_FRACTION)
+    reset = dropped & ~wrapped
+    deltas = np.where(wrapped, current + (counter_range - previous), deltas)
+    deltas = np.where(reset, current, deltas)
+    deltas[~present] = 0
+    return deltas, int(reset[present].sum()), int(wrapped[present].sum())
+
+
+def is_derived_attribute(attribute: str) -> bool:
+    """True for attributes produced by add_derived_metrics."""
+    return attribute.endswith((DELTA_SUFFIX, RATE_SUFFIX)) or RATIO_SEPARATOR in attribute
+
+
+def add_derived_metrics(data: PmaCounterStore, interval: Optional[Union[float, np.ndarray]] = None,
+                        counter_bits: int = PMA_COUNTER_BITS) -> PmaCounterStore:
+    """
+    Append per-interval deltas, per-second rates and utilization ratios.
+
+    pmaCountersFromSwitch.sh clears the port counters and then records
+    cumulative totals, so the raw columns only ever grow. For every
+    numeric raw attribute (TIMESTAMP_COLUMNS aside) this adds, computed in
+    one pass over all GUIDs, ports and VLs:
+        - "<attr> Delta": change since the previous sample
+        - "<attr> Rate": Delta per second (only when ``interval`` is given)
+    and for each DERIVED_RATIOS pair with both columns present:
+        - "<numerator> per <denominator>": ratio of the two Deltas (0 when
+          the denominator did not move)
+    
+    Args:
+        data: The parsed PMA counter store
+        interval: Seconds between samples: one number, one value per
+            iteration, or per (guid, port, vl, iteration) as returned by
+            query_intervals
+        counter_bits: Width of the hardware counters, used to detect wraps
+    
+    Returns:
+        PmaCounterStore: A new store with the derived attributes appended
+    """
+    raw_attributes = [attr for attr in counter_attributes(data.attributes) if not is_derived_attribute(attr)]
+    raw_idx = [data.attribute_index[attr] for attr in raw_attributes]
+    deltas, resets, wraps = _counter_deltas(data.values[..., raw_idx], data.present, counter_bits)
+    if resets or wraps:
+        logger.warning(f"Detected {resets} counter resets and {wraps} counter wraps while computing deltas")
+    
+    names = [f"{attr}{DELTA_SUFFIX}" for attr in raw_attributes]
+    columns = [deltas]
+    
+    if interval is not None:
+        rates = _per_second(deltas, interval)
+        names += [f"{attr}{RATE_SUFFIX}" for attr in raw_attributes]
+        columns.append(rates)
+    
+    position = {attr: i for i, attr in enumerate(raw_attributes)}
+    for numerator, denominator in DERIVED_RATIOS:
+        if numerator not in position or denominator not in position:
+            continue
+        num = deltas[..., position[numerator]]
+        den = deltas[..., position[denominator]]
+        ratio = np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+        names.append(f"{numerator}{RATIO_SEPARATOR}{denominator}")
+        columns.append(ratio[..., None])
+    
+    return data.with_attributes(names, np.concatenate(columns, axis=-1))
 
 
-def get_available_attributes(data: Dict[str, Any]) -> List[str]:
+def get_available_attributes(data: PmaCounterStore) -> List[str]:
     """
     Get available attributes from the parsed data structure.
     
     Args:
-        data (Dict[str, Any]): The parsed data structure
+        data (PmaCounterStore): The parsed data structure
         
     Returns:
         List[str]: Available attribute names
@@ -203,45 +1283,110 @@ def get_available_attributes(data: Dict[str, Any]) -> List[str]:
     if not data:
         raise ValueError("Data dictionary is empty - no attributes can be extracted")
     
-    # Get attributes from the first available data point
-    for guid in data.keys():
-        iterations = [k for k in data[guid].keys() if k != "Description"]
-        if iterations:
-            ports = list(data[guid][iterations[0]].keys())
-            if ports:
-                vls = list(data[guid][iterations[0]][ports[0]].keys())
-                if vls:
-                    return list(data[guid][iterations[0]][ports[0]][vls[0]].keys())
+    # Attributes are shared by every row, so any recorded row is enough
+    if data.present.any() and counter_attributes(data.attributes):
+        return counter_attributes(data.attributes)
     
     # If we get here, data structure exists but contains no valid measurement data
     raise ValueError("Data dictionary contains no valid measurement data - no attributes found")
 
 
 class TimeSeriesCache:
-    """Encapsulated cache for time series data to improve performance and organization."""
-    def __init__(self):
-        self._cache = {}
-    
-    def get(self, guid: str, port: str, vl: str, attr_name: str, iterations_hash: str) -> Optional[List[Union[int, float]]]:
-        """Get cached time series data."""
-        # Use tuple as cache key to prevent collisions
-        cache_key = (guid, port, vl, attr_name, iterations_hash)
-        return self._cache.get(cache_key)
-    
-    def put(self, guid: str, port: str, vl: str, attr_name: str, iterations_hash: str, values: List[Union[int, float]]) -> None:
-        """Store time series data in cache."""
-        # Use tuple as cache key to prevent collisions
-        cache_key = (guid, port, vl, attr_name, iterations_hash)
+    """
+    LRU cache of extracted time series, bounded by the bytes of the cached arrays.
+
+    Keys are (guid, port, vl, attribute, iteration axis key). The axis key
+    comes from ``axis_key``, which recognises an iteration list it has seen
+    before by identity, so a lookup never re-hashes the list. Hit, miss,
+    eviction and resident-byte counters are kept for the end-of-run summary.
+    """
+    def __init__(self, max_bytes: int = DEFAULT_TIME_SERIES_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        # id(iterations) -> (iterations, key); holding the list keeps its id from being reused
+        self._axes_by_id = {}
+        # tuple(iterations) -> key, so equal lists share cache entries
+        self._axes = {}
+        self.resident_bytes = 0
+        self.reset_stats()
+    
+    def reset_stats(self) -> None:
+        """Zero the hit/miss/eviction counters and the peak resident size."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.peak_bytes = self.resident_bytes
+    
+    def axis_key(self, iterations: List[str]) -> int:
+        """Small integer standing for an iteration list; lists must not be mutated after use."""
+        entry = self._axes_by_id.get(id(iterations))
+        if entry is not None and entry[0] is iterations:
+            return entry[1]
+        key = self._axes.setdefault(tuple(iterations), len(self._axes))
+        self._axes_by_id[id(iterations)] = (iterations, key)
+        return key
+    
+    def get(self, guid: str, port: str, vl: str, attr_name: str, axis_key: int) -> Optional[np.ndarray]:
+        """Get cached time series data, marking it most recently used."""
+        cache_key = (guid, port, vl, attr_name, axis_key)
+        values = self._cache.get(cache_key)
+        if values is None:
+            self.misses += 1
+            return None
+        self._cache.move_to_end(cache_key)
+        self.hits += 1
+        return values
+    
+    def put(self, guid: str, port: str, vl: str, attr_name: str, axis_key: int, values: np.ndarray) -> None:
+        """Store time series data, evicting least recently used entries to stay within max_bytes."""
+        if values.nbytes > self.max_bytes:
+            return
+        cache_key = (guid, port, vl, attr_name, axis_key)
+        previous = self._cache.pop(cache_key, None)
+        if previous is not None:
+            self.resident_bytes -= previous.nbytes
+        while self._cache and self.resident_bytes + values.nbytes > self.max_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self.resident_bytes -= evicted.nbytes
+            self.evictions += 1
         self._cache[cache_key] = values
+        self.resident_bytes += values.nbytes
+        self.peak_bytes = max(self.peak_bytes, self.resident_bytes)
     
     def clear(self) -> None:
-        """Clear all cached data."""
+        """Clear all cached data and forget the iteration lists seen so far."""
         self._cache.clear()
+        self._axes_by_id.clear()
+        self._axes.clear()
+        self.resident_bytes = 0
     
     def size(self) -> int:
         """Get current cache size."""
         return len(self._cache)
-
+    
+    def take_stats(self) -> Dict[str, int]:
+        """Hand this process's counters to the parent and reset them (worker side)."""
+        stats = {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                 "peak_bytes": self.peak_bytes}
+        self.reset_stats()
+        return stats
+    
+    def merge_stats(self, stats: Dict[str, int]) -> None:
+        """Fold a worker's counters into this cache's (parent side)."""
+        self.hits += stats["hits"]
+        self.misses += stats["misses"]
+        self.evictions += stats["evictions"]
+        self.peak_bytes = max(self.peak_bytes, stats["peak_bytes"])
+    
+    def summary(self) -> str:
+        """One line of counters for the end-of-run report."""
+        lookups = self.hits + self.misses
+        hit_rate = 100.0 * self.hits / lookups if lookups else 0.0
+        mb = 1024 * 1024
+        return (f"Time series cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), "
+                f"{self.evictions} evictions, {self.resident_bytes / mb:.2f} MB resident "
+                f"(peak {self.peak_bytes / mb:.2f} MB of {self.max_bytes / mb:g} MB)")
+
 # Global cache instance
 _time_series_cache = TimeSeriesCache()
 
@@ -253,7 +1398,8 @@ class DirectoryCache:
     def ensure_directory(self, dir_path: str) -> None:
         """Create directory if it hasn't been created yet."""
         if dir_path not in self._created_dirs:
-            os.makedirs(dir_path, exist_ok=True)
+            with _profiler.stage("ensure_directory"):
+                os.makedirs(dir_path, exist_ok=True)
             self._created_dirs.add(dir_path)
     
     def clear(self) -> None:
@@ -267,350 +1413,1690 @@ class DirectoryCache:
 # Global directory cache instance
 _directory_cache = DirectoryCache()
 
-def _extract_time_series(data: Dict[str, Any], guid: str, port: str, vl: str, attr_name: str, iterations: List[str]) -> List[Union[int, float]]:
+class FigureTemplate:
+    """
+    A figure with a fixed number of lines that is re-filled and re-saved for each PNG.
+
+    Creating a figure, its axes and artists costs far more than drawing a
+    few hundred points, so one template is built per graph kind and line
+    count and its Line2D data, labels, title and limits are updated in
+    place. ``tight_layout`` and the tight bounding box are computed once
+    per layout signature (title line count, y label, y tick label widths)
+    and restored when a later PNG has the same signature.
+    """
+    def __init__(self, n_lines: int, axis: List[Union[str, float]]):
+        self.fig = plt.figure(figsize=(config.min_fig_width, config.min_fig_height))
+        self.ax = self.fig.gca()
+        self.axis = tuple(axis)
+        placeholder = np.zeros(len(axis))
+        self.lines = [self.ax.plot(axis, placeholder, marker='o', markersize=DEFAULT_MARKERSIZE,
+                                   linewidth=DEFAULT_LINEWIDTH)[0]
+                      for _ in range(n_lines)]
+        self.ax.set_xlabel('Time (s)' if axis and not isinstance(axis[0], str) else 'Iteration')
+        self.ax.grid(True)
+        self._labels = None
+        # Layout signature -> (subplot params, padded tight bbox)
+        self._layouts = {}
+        self._geometry = None
+
+    def set_series(self, series: List[Tuple[str, np.ndarray]]) -> None:
+        """Replace the y data and legend label of every line."""
+        for line, (label, values) in zip(self.lines, series):
+            line.set_ydata(values)
+            line.set_label(label)
+        labels = tuple(label for label, _ in series)
+        if labels != self._labels:
+            self.ax.legend()
+            self._labels = labels
+
+    def set_text(self, title: str, ylabel: str) -> None:
+        self.ax.set_title(title)
+        self.ax.set_ylabel(ylabel)
+
+    def _layout_signature(self) -> Tuple[Any, ...]:
+        """
+        Everything the tight layout depends on that changes between PNGs.
+
+        Digits are normalized because DejaVu Sans digits share one advance
+        width, so "0 200 400" and "0 500 900" lay out identically. The title
+        only matters by its line count unless it is wider than the axes.
+        Only the tick labels drawn count: the locator also returns ticks
+        just outside the view limits, which matplotlib formats (they set
+        the offset) but does not draw.
+        """
+        renderer = self.fig.canvas.get_renderer()
+        title = self.ax.get_title()
+        if self.ax.title.get_window_extent(renderer).width <= self.ax.bbox.width:
+            title_key = title.count('\n')
+        else:
+            title_key = title
+        yaxis = self.ax.yaxis
+        formatter = yaxis.get_major_formatter()
+        locs = yaxis.get_majorticklocs()
+        low, high = sorted(self.ax.get_ylim())
+        # Axis._update_ticks keeps the ticks within the view interval, up to rounding
+        slack = 1e-10 * (high - low)
+        ticks = frozenset(_DIGITS.sub('0', label) for loc, label in zip(locs, formatter.format_ticks(locs))
+                          if low - slack <= loc <= high + slack)
+        return (title_key, self.ax.get_ylabel(), ticks, _DIGITS.sub('0', formatter.get_offset()))
+
+    def save(self, output_path: str) -> None:
+        """Rescale to the current data, lay out if needed and write the PNG."""
+        self.ax.relim()
+        self.ax.autoscale_view()
+        geometry = self._layout_signature()
+        layout = self._layouts.get(geometry)
+        if layout is None:
+            # tight_layout refines the current subplot params; start from a fresh figure's
+            # so the result is bit-identical to laying out a new figure
+            with _profiler.stage("tight_layout"):
+                self.fig.subplots_adjust(**{side: plt.rcParams[f'figure.subplot.{side}']
+                                            for side in ('left', 'bottom', 'right', 'top')})
+                self.fig.tight_layout()
+                # tight_layout leaves a placeholder engine that makes every savefig do a dry-run draw
+                self.fig.set_layout_engine(None)
+                # Same steps savefig(bbox_inches='tight') runs, done once per geometry
+                self.fig.draw_without_rendering()
+                bbox = self.fig.get_tightbbox(self.fig.canvas.get_renderer()).padded(
+                    plt.rcParams['savefig.pad_inches'])
+            pars = self.fig.subplotpars
+            layout = ((pars.left, pars.bottom, pars.right, pars.top), bbox)
+            if len(self._layouts) >= MAX_LAYOUTS_PER_TEMPLATE:
+                self._layouts.pop(next(iter(self._layouts)))
+            self._layouts[geometry] = layout
+            self._geometry = geometry
+        elif geometry != self._geometry:
+            left, bottom, right, top = layout[0]
+            self.fig.subplots_adjust(left=left, bottom=bottom, right=right, top=top)
+            self._geometry = geometry
+        with _profiler.stage("savefig"):
+            self.fig.savefig(output_path, dpi=config.dpi, bbox_inches=layout[1])
+
+    def close(self) -> None:
+        plt.close(self.fig)
+
+
+class FigureTemplateCache:
+    """Cache of reusable figure templates keyed by graph kind and line count."""
+    def __init__(self):
+        self._templates = {}
+    
+    def get(self, kind: str, n_lines: int, axis: List[Union[str, float]]) -> FigureTemplate:
+        """Return the template for this kind/line count, rebuilding it if the x axis (see _x_axis) changed."""
+        key = (kind, n_lines)
+        template = self._templates.get(key)
+        if template is not None and template.axis != tuple(axis):
+            # Categorical x axes keep every label they have seen, so start over
+            template.close()
+            template = None
+        if template is None:
+            template = FigureTemplate(n_lines, axis)
+            if config.reuse_figures:
+                self._templates[key] = template
+        return template
+    
+    def release(self, template: FigureTemplate) -> None:
+        """Close a template that is not cached (figure reuse disabled)."""
+        if template not in self._templates.values():
+            template.close()
+    
+    def discard(self, kind: str, n_lines: int) -> None:
+        """Drop a template whose state may be inconsistent after an error."""
+        template = self._templates.pop((kind, n_lines), None)
+        if template is not None:
+            template.close()
+    
+    def clear(self) -> None:
+        """Close every cached figure."""
+        for template in self._templates.values():
+            template.close()
+        self._templates.clear()
+    
+    def size(self) -> int:
+        """Get number of cached templates."""
+        return len(self._templates)
+
+# Global figure template cache instance
+_figure_templates = FigureTemplateCache()
+
+class RenderManifest:
+    """
+    Content-hash manifest of rendered PNGs, stored in config.output_dir.
+
+    Each figure's digest covers its title, y label, iteration axis, every
+    plotted series (key plus values) and the PlotConfig fields that change
+    the pixels. A figure whose digest matches the previous run and whose
+    PNG still exists is skipped. When a run finishes, PNGs from the
+    previous manifest that were not produced again (vanished GUIDs/ports)
+    are pruned.
+    """
+    def __init__(self):
+        self._previous = {}
+        self._current = {}
+        self._output_dir = None
+        self._config_key = b""
+        self.rendered = 0
+        self.skipped = 0
+    
+    def _path(self) -> str:
+        return os.path.join(self._output_dir, MANIFEST_FILENAME)
+    
+    def load(self, output_dir: str) -> None:
+        """Start a session: read the previous manifest (if any) and reset counters."""
+        self._output_dir = output_dir
+        self._previous = {}
+        self._current = {}
+        self.rendered = 0
+        self.skipped = 0
+        rendering = (config.min_fig_width, config.min_fig_height, config.dpi, config.use_fast_rendering,
+                     matplotlib.__version__)
+        self._config_key = repr(rendering).encode('utf-8')
+        try:
+            with open(self._path(), 'r', encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable render manifest {self._path()}: {e}")
+            return
+        if manifest.get("version") == MANIFEST_VERSION:
+            self._previous = manifest.get("figures", {})
+    
+    def digest(self, title: str, ylabel: str, series: List['Series'], axis: List[Union[str, float]]) -> str:
+        """Hash everything that determines a figure's pixels."""
+        h = hashlib.sha256(self._config_key)
+        h.update(repr((title, ylabel, _iterations_key(axis))).encode('utf-8'))
+        for key, label, values in series:
+            h.update(repr((key, label, values.dtype.str)).encode('utf-8'))
+            h.update(np.ascontiguousarray(values).tobytes())
+        return h.hexdigest()
+    
+    def _relpath(self, output_path: str) -> str:
+        return os.path.relpath(output_path, self._output_dir)
+    
+    def is_current(self, output_path: str, digest: str) -> bool:
+        """True (and recorded as kept) if the PNG on disk already has this digest."""
+        if not config.incremental:
+            return False
+        rel = self._relpath(output_path)
+        if self._previous.get(rel) != digest or not os.path.exists(output_path):
+            return False
+        self._current[rel] = digest
+        self.skipped += 1
+        return True
+    
+    def record(self, output_path: str, digest: str) -> None:
+        """Record a freshly rendered PNG."""
+        self._current[self._relpath(output_path)] = digest
+        self.rendered += 1
+    
+    def take_state(self) -> Dict[str, Any]:
+        """Hand this process's records to the parent and reset them (worker side)."""
+        state = {"figures": self._current, "rendered": self.rendered, "skipped": self.skipped}
+        self._current = {}
+        self.rendered = 0
+        self.skipped = 0
+        return state
+    
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        """Fold a worker's records into this manifest (parent side)."""
+        self._current.update(state["figures"])
+        self.rendered += state["rendered"]
+        self.skipped += state["skipped"]
+    
+    def finish(self, prune: bool = True, owns: Optional[Callable[[str], bool]] = None) -> int:
+        """
+        Write the manifest for this run.
+        
+        With ``prune`` the PNGs listed last time but not produced this time
+        are deleted, along with directories left empty. Without it their
+        entries are carried over untouched. ``owns`` limits pruning to the
+        relative paths this run is responsible for (e.g. only heatmaps);
+        stale entries it rejects are carried over as well.
+        
+        Returns:
+            int: Number of stale PNGs removed
+        """
+        pruned = 0
+        stale = [rel for rel in self._previous if rel not in self._current]
+        kept = [rel for rel in stale if owns is not None and not owns(rel)]
+        if prune:
+            for rel in stale:
+                if owns is not None and not owns(rel):
+                    continue
+                path = os.path.join(self._output_dir, rel)
+                try:
+                    os.remove(path)
+                    pruned += 1
+                except FileNotFoundError:
+                    continue
+                # Remove directories emptied by the prune, never the output dir itself
+                parent = os.path.dirname(path)
+                while os.path.abspath(parent) != os.path.abspath(self._output_dir):
+                    try:
+                        os.rmdir(parent)
+                    except OSError:
+                        break
+                    parent = os.path.dirname(parent)
+            figures = {**{rel: self._previous[rel] for rel in kept}, **self._current}
+        else:
+            figures = {**{rel: self._previous[rel] for rel in stale}, **self._current}
+        
+        tmp_path = self._path() + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump({"version": MANIFEST_VERSION, "figures": figures}, manifest_file,
+                      indent=0, sort_keys=True)
+        os.replace(tmp_path, self._path())
+        self._previous = figures
+        self._current = {}
+        return pruned
+
+# Global render manifest instance
+_render_manifest = RenderManifest()
+
+def _iterations_key(iterations: List[Union[str, float]]) -> str:
+    """Deterministic hash of the iteration (or time) axis, preserving order (order matters for results)."""
+    iterations_str = ','.join(map(str, iterations))
+    return hashlib.sha256(iterations_str.encode('utf-8')).hexdigest()
+
+
+def _extract_time_series(data: PmaCounterStore, guid: str, port: str, vl: str, attr_name: str, iterations: List[str]) -> np.ndarray:
     """Extract time series data for a specific port, VL, and attribute with caching."""
+    # Called once per series, so skip even the no-op context manager when not profiling
+    if _profiler.enabled:
+        with _profiler.stage("extract_time_series"):
+            return _extract_time_series_cached(data, guid, port, vl, attr_name, iterations)
+    return _extract_time_series_cached(data, guid, port, vl, attr_name, iterations)
+
+
+def _extract_time_series_cached(data: PmaCounterStore, guid: str, port: str, vl: str, attr_name: str, iterations: List[str]) -> np.ndarray:
+    """Time series lookup behind _extract_time_series."""
     if config.cache_time_series:
-        # Create a deterministic hash preserving iteration order (order matters for results)
-        iterations_str = ','.join(iterations)
-        iterations_hash = hashlib.sha256(iterations_str.encode('utf-8')).hexdigest()
+        axis_key = _time_series_cache.axis_key(iterations)
         
-        cached_values = _time_series_cache.get(guid, port, vl, attr_name, iterations_hash)
+        cached_values = _time_series_cache.get(guid, port, vl, attr_name, axis_key)
         if cached_values is not None:
             return cached_values
     
-    values = []
-    for iteration in iterations:
-        value = get_value(data, guid, iteration, port, vl, attr_name)
-        values.append(value if value is not None else 0)
+    # Missing cells are stored as 0 in the dense array
+    values = data.series(guid, port, vl, attr_name, iterations)
     
     if config.cache_time_series:
-        _time_series_cache.put(guid, port, vl, attr_name, iterations_hash, values)
+        _time_series_cache.put(guid, port, vl, attr_name, axis_key, values)
     
     return values
 
 
-def _plot_vl_data(ax: Axes, data: Dict[str, Any], guid: str, port: str, attr_name: str, iterations: List[str], sample_vls: List[str]) -> None:
-    """Plot VL data for a specific port and attribute with optimizations."""
-    for vl in sample_vls:
-        values = _extract_time_series(data, guid, port, vl, attr_name, iterations)
-        label = vl if vl == "Overall" else f'VL {vl}'
-        ax.plot(iterations, values, label=label, marker='o', markersize=DEFAULT_MARKERSIZE, linewidth=DEFAULT_LINEWIDTH)
+# (series key, legend label, values) for one plotted line
+Series = Tuple[Tuple[str, ...], str, np.ndarray]
+
+
+def _vl_series(data: PmaCounterStore, guid: str, port: str, attr_name: str, iterations: List[str], sample_vls: List[str]) -> List[Series]:
+    """Extract one series per VL for a specific port and attribute."""
+    return [((guid, port, vl, attr_name), _format_vl_title(vl),
+             _extract_time_series(data, guid, port, vl, attr_name, iterations))
+            for vl in sample_vls]
+
+
+def _port_series(data: PmaCounterStore, guid: str, ports: List[str], attr_name: str, vl: str, iterations: List[str]) -> List[Series]:
+    """Extract one series per port for a specific VL and attribute."""
+    return [((guid, port, vl, attr_name), f'Port {port}',
+             _extract_time_series(data, guid, port, vl, attr_name, iterations))
+            for port in ports]
+
+
+def _plot_vl_data(template: FigureTemplate, series: List[Series]) -> None:
+    """Plot VL data for a specific port and attribute with optimizations."""
+    with _profiler.stage("plot_vl_data"):
+        template.set_series([(label, values) for _, label, values in series])
+
+
+def _x_axis(data: PmaCounterStore, iterations: List[str]) -> List[Union[str, float]]:
+    """X values of a graph: seconds since the first sample when the CSV has timestamps, else the iteration labels."""
+    times = data.sample_times() if config.time_axis else None
+    if times is None:
+        return iterations
+    return [float(times[data.iteration_index[it]]) for it in iterations]
+
+
+def _setup_subplot(template: FigureTemplate, title: str, ylabel: str) -> None:
+    """Setup common subplot properties."""
+    template.set_text(title, ylabel)
+
+
+def _plot_port_comparison(template: FigureTemplate, series: List[Series]) -> None:
+    """Plot port comparison data for overall graphs with optimizations."""
+    with _profiler.stage("plot_port_comparison"):
+        template.set_series([(label, values) for _, label, values in series])
+
+
+def _format_vl_title(vl: str) -> str:
+    """Format VL for display in titles."""
+    return vl if vl == "Overall" else f"VL {vl}"
+
+
+def _create_individual_subplot(data: PmaCounterStore, guid: str, port: str, attr_name: str, iterations: List[str], sample_vls: List[str], output_prefix: str) -> None:
+    """Create individual subplot as its own PNG, reusing the VL figure template."""
+    try:
+        description = get_description(data, guid) or "Unknown"
+        title = f'GUID {guid} Port {port} {attr_name}\n{description}'
+        
+        # Create directory structure: pmaCounterGraphs/guid_<GUID>/<graph_type>/port_<PORT>
+        guid_dir = os.path.join(config.output_dir, f'guid_{guid}')
+        type_dir = os.path.join(guid_dir, output_prefix)
+        port_dir = os.path.join(type_dir, f'port_{port}')
+        
+        # Save with descriptive filename in port subdirectory
+        filename = f'{output_prefix}_{attr_name.replace(" ", "_")}.png'
+        output_path = os.path.join(port_dir, filename)
+        
+        series = _vl_series(data, guid, port, attr_name, iterations, sample_vls)
+        axis = _x_axis(data, iterations)
+        digest = _render_manifest.digest(title, attr_name, series, axis)
+        if _render_manifest.is_current(output_path, digest):
+            return
+        
+        template = _figure_templates.get("vl", len(sample_vls), axis)
+        _plot_vl_data(template, series)
+        _setup_subplot(template, title, attr_name)
+        _directory_cache.ensure_directory(port_dir)
+        template.save(output_path)
+        _figure_templates.release(template)
+        _render_manifest.record(output_path, digest)
+    except Exception as e:
+        _figure_templates.discard("vl", len(sample_vls))
+        raise GraphRenderError(guid, output_prefix, port, str(e)) from e
+    
+
+def _create_individual_comparison_subplot(data: PmaCounterStore, guid: str, ports: List[str], attr_name: str, vl: str, iterations: List[str], output_prefix: str) -> None:
+    """Create individual port comparison subplot as its own PNG, reusing the port figure template."""
+    try:
+        description = get_description(data, guid) or "Unknown"
+        title_vl = _format_vl_title(vl)
+        title = f'GUID {guid} {title_vl} {attr_name} (All Ports)\n{description}'
+        
+        # Create directory structure: pmaCounterGraphs/guid_<GUID>/<graph_type> (overall graphs in type dir)
+        guid_dir = os.path.join(config.output_dir, f'guid_{guid}')
+        type_dir = os.path.join(guid_dir, output_prefix)
+        
+        # Save with descriptive filename in type subdirectory
+        vl_safe = vl.replace(" ", "_")
+        filename = f'{output_prefix}_{vl_safe}_{attr_name.replace(" ", "_")}_all_ports.png'
+        output_path = os.path.join(type_dir, filename)
+        
+        series = _port_series(data, guid, ports, attr_name, vl, iterations)
+        axis = _x_axis(data, iterations)
+        digest = _render_manifest.digest(title, attr_name, series, axis)
+        if _render_manifest.is_current(output_path, digest):
+            return
+        
+        template = _figure_templates.get("port", len(ports), axis)
+        _plot_port_comparison(template, series)
+        _setup_subplot(template, title, attr_name)
+        _directory_cache.ensure_directory(type_dir)
+        template.save(output_path)
+        _figure_templates.release(template)
+        _render_manifest.record(output_path, digest)
+    except Exception as e:
+        _figure_templates.discard("port", len(ports))
+        raise GraphRenderError(guid, output_prefix, None, str(e)) from e
+
+
+
+
+def _get_common_data_structure(data: PmaCounterStore, guid: str) -> Tuple[List[str], List[str], List[str]]:
+    """Extract common data structure elements."""
+    iterations = data.guid_iterations(guid)
+    ports = data.guid_ports(guid)
+    sample_vls = data.port_vls(guid, ports[0])
+    return iterations, ports, sample_vls
+
+
+def get_value(data: PmaCounterStore, guid: str, iteration: str, port: str, vl: str, attribute: str) -> Optional[Union[int, float]]:
+    """
+    Safely retrieve a value from the parsed data structure.
+    
+    Args:
+        data: The parsed data structure
+        guid: GUID identifier
+        iteration: Iteration number
+        port: Port number
+        vl: VL identifier
+        attribute: Attribute name
+        
+    Returns:
+        The value if found, None otherwise
+    """
+    value = data.get_value(guid, iteration, port, vl, attribute)
+    if value is None:
+        logger.debug(f"Key not found: {(guid, iteration, port, vl, attribute)}")
+    return value
+
+def get_description(data: PmaCounterStore, guid: str) -> Optional[str]:
+    """
+    Retrieve the description for a given GUID.
+    
+    Args:
+        data: The parsed data structure
+        guid: GUID identifier
+
+    Returns:
+        The description if found, None otherwise
+    """
+    try:
+        return data.descriptions[guid]
+    except KeyError as e:
+        logger.debug(f"Key not found: {e}")
+        return None
+    
+
+def create_xmit_rcv_pkt_graphs(data: PmaCounterStore, guid: str, available_attributes: List[str]) -> None:
+    """
+    Create individual graphs of transmitted and received packets over iterations for a specific GUID and port.
+    Each port/attribute combination gets its own PNG file for optimal performance.
+    Only creates graphs for attributes that exist in the data.
+
+    Args:
+        data: The parsed PMA counter store
+        guid: The GUID to graph data for
+        available_attributes: List of available attribute column names
+    """
+    description = get_description(data, guid)
+    if description is None:
+        logger.info(f"No description found for GUID {guid}. Cannot create packet graphs.")
+        return
+    
+    # Check which packet attributes are available
+    packet_attrs = []
+    if "Xmit Pkts" in available_attributes:
+        packet_attrs.append("Xmit Pkts")
+    if "Rcv Pkts" in available_attributes:
+        packet_attrs.append("Rcv Pkts")
+    
+    # If no packet attributes available, don't create graphs
+    if not packet_attrs:
+        logger.info(f"No packet attributes (Xmit Pkts, Rcv Pkts) found for GUID {guid}. Skipping packet graphs.")
+        return
+        
+    iterations, ports, sample_vls = _get_common_data_structure(data, guid)
+    
+    # Create individual subplot for each port/attribute combination
+    for port in ports:
+        for attr_name in packet_attrs:
+            _create_individual_subplot(data, guid, port, attr_name, iterations, sample_vls, "packets")
+    
+    # Create comparison graphs showing all ports for each packet attribute
+    for attr_name in packet_attrs:
+        _create_individual_comparison_subplot(data, guid, ports, attr_name, config.comparison_vl, iterations, "packets")
+
+def create_congestion_graphs(data: PmaCounterStore, guid: str, available_attributes: List[str]) -> None:
+    """
+    Create individual graphs of congestion metrics over iterations for a specific GUID and port.
+    Each port/attribute combination gets its own PNG file for optimal performance.
+    Only creates graphs for attributes that exist in the data.
+
+    Args:
+        data: The parsed PMA counter store
+        guid: The GUID to graph data for
+        available_attributes: List of available attribute column names
+    """
+    description = get_description(data, guid)
+    if description is None:
+        logger.info(f"No description found for GUID {guid}. Cannot create congestion graphs.")
+        return
+    
+    # Check which congestion attributes are available
+    congestion_attrs = []
+    if "Xmit Time Cong" in available_attributes:
+        congestion_attrs.append("Xmit Time Cong")
+    if "Xmit Wait" in available_attributes:
+        congestion_attrs.append("Xmit Wait")
+    if "Congestion Discards" in available_attributes:
+        congestion_attrs.append("Congestion Discards")
+    
+    # If no congestion attributes available, don't create graphs
+    if not congestion_attrs:
+        logger.info(f"No congestion attributes (Xmit Time Cong, Xmit Wait, Congestion Discards) found for GUID {guid}. Skipping congestion graphs.")
+        return
+        
+    iterations, ports, sample_vls = _get_common_data_structure(data, guid)
+    
+    # Create individual subplot for each port/attribute combination
+    for port in ports:
+        for attr_name in congestion_attrs:
+            _create_individual_subplot(data, guid, port, attr_name, iterations, sample_vls, "congestion")
+    
+    # Create comparison graphs showing all ports for each congestion attribute
+    for attr_name in congestion_attrs:
+        _create_individual_comparison_subplot(data, guid, ports, attr_name, config.comparison_vl, iterations, "congestion")
+
+def create_bubble_graphs(data: PmaCounterStore, guid: str, available_attributes: List[str]) -> None:
+    """
+    Create graphs of bubble metrics over iterations for a specific GUID and port.
+    Each port gets subplots for different bubble attributes, with all VLs plotted.
+    Additional subplots show Overall data across all ports for each attribute.
+    Only creates graphs if at least one bubble attribute exists in the data.
+
+    Args:
+        data: The parsed PMA counter store
+        guid: The GUID to graph data for
+        available_attributes: List of available attribute column names
+    """
+    description = get_description(data, guid)
+    if description is None:
+        logger.info(f"No description found for GUID {guid}. Cannot create bubble graph.")
+        return
+    
+    # Check which core bubble attributes are available (excluding Error Counter Summary)
+    core_bubble_attrs = []
+    if "Rcv Bubble" in available_attributes:
+        core_bubble_attrs.append("Rcv Bubble")
+    if "Xmit Wasted BW" in available_attributes:
+        core_bubble_attrs.append("Xmit Wasted BW")
+    if "Xmit Wait Data" in available_attributes:
+        core_bubble_attrs.append("Xmit Wait Data")
+    
+    # Check if Error Counter Summary is available
+    has_error_counter = "Error Counter Summary" in available_attributes
+    
+    # If no core bubble attributes and no Error Counter Summary, skip the graph
+    if not core_bubble_attrs and not has_error_counter:
+        logger.info(f"No bubble attributes (Rcv Bubble, Xmit Wasted BW, Xmit Wait Data, Error Counter Summary) found for GUID {guid}. Skipping bubble graphs.")
+        return
+        
+    iterations, ports, sample_vls = _get_common_data_structure(data, guid)
+    
+    # Create individual subplot for each port/core bubble attribute combination
+    for port in ports:
+        for attr_name in core_bubble_attrs:
+            _create_individual_subplot(data, guid, port, attr_name, iterations, sample_vls, "bubble")
+    
+    # Create comparison graphs showing all ports for each bubble attribute
+    for attr_name in core_bubble_attrs:
+        _create_individual_comparison_subplot(data, guid, ports, attr_name, config.comparison_vl, iterations, "bubble")
+    
+    # Special handling for Error Counter Summary (always uses Overall VL)
+    if has_error_counter:
+        _create_individual_comparison_subplot(data, guid, ports, "Error Counter Summary", "Overall", iterations, "bubble")
+
+
+
+
+def create_derived_graphs(data: PmaCounterStore, guid: str, available_attributes: List[str]) -> None:
+    """
+    Create graphs of derived metrics (deltas, rates, ratios) for a specific GUID.
+    Each port/derived attribute combination gets its own PNG file, plus a
+    comparison graph across all ports for each derived attribute.
+    Only creates graphs if add_derived_metrics has been applied.
+
+    Args:
+        data: The parsed PMA counter store
+        guid: The GUID to graph data for
+        available_attributes: List of available attribute column names
+    """
+    description = get_description(data, guid)
+    if description is None:
+        logger.info(f"No description found for GUID {guid}. Cannot create derived graphs.")
+        return
+    
+    derived_attrs = [attr for attr in available_attributes if is_derived_attribute(attr)]
+    if not derived_attrs:
+        logger.info(f"No derived attributes found for GUID {guid}. Skipping derived graphs.")
+        return
+    
+    iterations, ports, sample_vls = _get_common_data_structure(data, guid)
+    
+    # Create individual subplot for each port/derived attribute combination
+    for port in ports:
+        for attr_name in derived_attrs:
+            _create_individual_subplot(data, guid, port, attr_name, iterations, sample_vls, "derived")
+    
+    # Create comparison graphs showing all ports for each derived attribute
+    for attr_name in derived_attrs:
+        _create_individual_comparison_subplot(data, guid, ports, attr_name, config.comparison_vl, iterations, "derived")
+
+
+
+
+def _clear_performance_cache() -> None:
+    """Clear performance caches to free memory."""
+    cache_size = _time_series_cache.size()
+    dir_cache_size = _directory_cache.size()
+    template_count = _figure_templates.size()
+    
+    _time_series_cache.clear()
+    _directory_cache.clear()
+    _figure_templates.clear()
+    
+    logger.debug(f"Cleared {cache_size} cached time series entries, {dir_cache_size} directory entries "
+                 f"and {template_count} figure templates")
+
+def _configure_rendering() -> None:
+    """Validate the configuration and set up matplotlib for batch PNG output."""
+    # Initialize directory cache for this graph generation session
+    _directory_cache.clear()
+    
+    # Validate configuration before proceeding
+    _validate_config()
+    
+    _render_manifest.load(config.output_dir)
+    _configure_time_series_cache()
+    _configure_matplotlib()
+
+
+def _configure_profiling() -> None:
+    """Apply config.profile/config.trace_path, dropping earlier samples."""
+    _profiler.configure(config.profile, config.trace_path is not None)
+
+
+def _configure_time_series_cache() -> None:
+    """Apply config.time_series_cache_mb and start counting from zero."""
+    _time_series_cache.max_bytes = int(config.time_series_cache_mb * 1024 * 1024)
+    _time_series_cache.reset_stats()
+
+
+def _is_heatmap_path(rel: str) -> bool:
+    """True for manifest entries written by create_heatmaps."""
+    return rel.split(os.sep, 1)[0] == HEATMAP_DIR
+
+
+def _is_graph_path(rel: str) -> bool:
+    """True for manifest entries written by the per-GUID graph functions."""
+    return not _is_heatmap_path(rel)
+
+
+def _finish_rendering(prune: bool, owns: Callable[[str], bool] = _is_graph_path) -> None:
+    """Write the render manifest and report what was rendered, skipped and pruned."""
+    pruned = _render_manifest.finish(prune, owns)
+    print(f"Rendered {_render_manifest.rendered} PNGs, skipped {_render_manifest.skipped} unchanged, "
+          f"pruned {pruned} stale")
+    # The heatmap path reads whole arrays and never looks series up; its all-zero report would mislead
+    if config.cache_time_series and _time_series_cache.hits + _time_series_cache.misses:
+        print(_time_series_cache.summary())
+
+
+def _configure_matplotlib() -> None:
+    """Configure matplotlib for better performance with individual plots."""
+    if config.use_fast_rendering:
+        plt.rcParams['figure.max_open_warning'] = 0
+        plt.rcParams['font.size'] = 9  # Slightly larger for individual plots
+        plt.rcParams['lines.markersize'] = 4
+        plt.rcParams['lines.linewidth'] = 1.5
+        # Use non-interactive backend for better performance
+        plt.switch_backend('Agg')
+
+
+def _create_guid_graphs(data: PmaCounterStore, guid: str, available_attributes: List[str]) -> None:
+    """Create every graph type for one GUID."""
+    # Each function creates multiple individual PNG files
+    for create_type_graphs in GRAPH_TYPES.values():
+        create_type_graphs(data, guid, available_attributes)
+
+
+# Graph type (output subdirectory) -> function rendering it for one GUID
+GRAPH_TYPES = {
+    "packets": create_xmit_rcv_pkt_graphs,
+    "congestion": create_congestion_graphs,
+    "bubble": create_bubble_graphs,
+    "derived": create_derived_graphs,
+}
+
+# Attributes each graph type can read; workers only receive these columns
+GRAPH_TYPE_ATTRIBUTES = {
+    "packets": ("Xmit Pkts", "Rcv Pkts"),
+    "congestion": ("Xmit Time Cong", "Xmit Wait", "Congestion Discards"),
+    "bubble": ("Rcv Bubble", "Xmit Wasted BW", "Xmit Wait Data", "Error Counter Summary"),
+    "derived": (),  # every attribute for which is_derived_attribute() holds
+}
+
+RenderTask = Tuple[PmaCounterStore, str, str]
+
+
+def _render_tasks(data: PmaCounterStore, guid: str) -> Iterator[RenderTask]:
+    """Yield one (slice, guid, graph_type) task per graph type with data for this GUID."""
+    for graph_type, type_attributes in GRAPH_TYPE_ATTRIBUTES.items():
+        if graph_type == "derived":
+            attributes = [attr for attr in data.attributes if is_derived_attribute(attr)]
+        else:
+            attributes = [attr for attr in type_attributes if attr in data.attribute_index]
+        if attributes:
+            yield data.select([guid], attributes), guid, graph_type
+
+
+def _init_render_worker(worker_config: PlotConfig) -> None:
+    """Process pool initializer: adopt the parent's configuration and backend."""
+    global config
+    config = worker_config
+    _render_manifest.load(config.output_dir)
+    _configure_time_series_cache()
+    _configure_profiling()
+    _configure_matplotlib()
+
+
+def _render_worker(data: PmaCounterStore, guid: str, graph_type: str) -> Tuple[str, str, Dict[str, Any], Dict[str, int], Dict[str, Any]]:
+    """Render one graph type for one GUID inside a worker process.
+    
+    Returns the worker's manifest records, cache counters and profiler
+    samples so the parent writes one manifest and reports one set of
+    counters and timings.
+    """
+    try:
+        GRAPH_TYPES[graph_type](data, guid, data.attributes)
+    except GraphRenderError:
+        raise
+    except Exception as e:
+        raise GraphRenderError(guid, graph_type, None, str(e)) from e
+    finally:
+        # Each task brings its own slice, nothing is reused across tasks
+        _time_series_cache.clear()
+    return (guid, graph_type, _render_manifest.take_state(), _time_series_cache.take_stats(),
+            _profiler.take_state())
+
+
+def _run_parallel(tasks: Iterator[RenderTask], jobs: int, total: Optional[int] = None) -> None:
+    """
+    Render tasks on a process pool of ``jobs`` workers.
+
+    At most ``2 * jobs`` tasks are in flight, so slices produced lazily
+    (e.g. by the streaming parser) are not all held in memory at once.
+    Every failure is logged with its GUID/graph type/port, then a
+    RuntimeError is raised once the remaining tasks have finished.
+    """
+    failures = []
+    done_count = 0
+    
+    def _collect(done) -> None:
+        nonlocal done_count
+        for future in done:
+            done_count += 1
+            try:
+                guid, graph_type, manifest_state, cache_stats, profile_state = future.result()
+            except GraphRenderError as e:
+                logger.error(str(e))
+                failures.append(e)
+                continue
+            _render_manifest.merge_state(manifest_state)
+            _time_series_cache.merge_stats(cache_stats)
+            _profiler.merge_state(profile_state)
+            if config.use_fast_rendering:
+                progress = f"{done_count}/{total}" if total else str(done_count)
+                print(f"Finished {progress}: GUID {guid} {graph_type}")
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                             initargs=(config,)) as pool:
+        pending = set()
+        for task in tasks:
+            pending.add(pool.submit(_render_worker, *task))
+            if len(pending) >= 2 * jobs:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                _collect(done)
+        done, _ = wait(pending)
+        _collect(done)
+    
+    if failures:
+        raise RuntimeError(f"{len(failures)} graph task(s) failed, first: {failures[0]}")
+
+
+def create_graphs(data: PmaCounterStore, available_attributes: List[str], prune: bool = True) -> None:
+    """Create individual graphs from the parsed PMA data with performance optimizations.
+    
+    Figures whose inputs match the render manifest from the previous run
+    are skipped, see RenderManifest.
+    
+    Args:
+        data: The parsed PMA counter store
+        available_attributes: List of available attribute column names
+        prune: Delete PNGs from the previous run that this run did not produce
+        
+    Raises:
+        ValueError: If configuration is invalid
+        OSError: If output directory cannot be created
+    """
+    _configure_rendering()
+    
+    guids = list(data.keys())
+    
+    if config.jobs > 1:
+        tasks = [task for guid in guids for task in _render_tasks(data, guid)]
+        print(f"Generating individual subplot PNG files for {len(guids)} GUIDs "
+              f"({len(tasks)} tasks on {config.jobs} workers)...")
+        _run_parallel(iter(tasks), config.jobs, len(tasks))
+        _clear_performance_cache()
+        _finish_rendering(prune)
+        print(f"Individual subplot generation complete. Files saved to: {config.output_dir}")
+        return
+    
+    print(f"Generating individual subplot PNG files for {len(guids)} GUIDs...")
+    
+    for i, guid in enumerate(guids):
+        if config.use_fast_rendering:
+            print(f"Processing GUID {i+1}/{len(guids)}: {guid}")
+        
+        # The time series cache evicts old GUIDs' series itself, see TimeSeriesCache
+        _create_guid_graphs(data, guid, available_attributes)
+    
+    # Final cleanup
+    _clear_performance_cache()
+    _finish_rendering(prune)
+    print(f"Individual subplot generation complete. Files saved to: {config.output_dir}")
+
+
+def create_graphs_streaming(csv_file_path: str, memory_budget_mb: float = DEFAULT_STREAM_MEMORY_BUDGET_MB) -> List[str]:
+    """Stream the CSV one GUID at a time and graph each GUID as soon as it is complete.
+    
+    Only the GUID being rendered (plus whatever pending rows fit in
+    ``memory_budget_mb``) is held in memory, see iter_pma_groups.
+    
+    Args:
+        csv_file_path: Path to the CSV file to parse
+        memory_budget_mb: Approximate cap on memory held by pending GUIDs
+        
+    Returns:
+        List[str]: Attribute column names found in the CSV file
+        
+    Raises:
+        FileNotFoundError: If the CSV file doesn't exist
+        ValueError: If configuration or CSV headers are invalid
+        OSError: If output directory cannot be created
+    """
+    _configure_rendering()
+    
+    print(f"Streaming {csv_file_path} with a {memory_budget_mb:g} MB memory budget...")
+    
+    available_attributes = []
+    comparison_checked = False
+    guid_count = 0
+    
+    def _groups() -> Iterator[Tuple[str, PmaCounterStore]]:
+        nonlocal available_attributes, comparison_checked, guid_count
+        for (guid,), group in iter_pma_groups(csv_file_path, "guid", memory_budget_mb):
+            if config.derived_metrics:
+                group = add_derived_metrics(group, _sample_interval(group))
+            available_attributes = counter_attributes(group.attributes)
+            if not comparison_checked:
+                # Validate against the first complete GUID and fall back if necessary
+                if not _validate_comparison_vl(group, config.comparison_vl):
+                    logger.warning(f"Comparison VL '{config.comparison_vl}' not found in data. Using 'Overall' as fallback.")
+                    config.comparison_vl = "Overall"
+                comparison_checked = True
+            guid_count += 1
+            yield guid, group
+    
+    if config.jobs > 1:
+        # The comparison VL is settled before the first task is submitted, so workers see the final value
+        _run_parallel((task for guid, group in _groups() for task in _render_tasks(group, guid)), config.jobs)
+    else:
+        for guid, group in _groups():
+            if config.use_fast_rendering:
+                print(f"Processing GUID {guid_count}: {guid}")
+            
+            _create_guid_graphs(group, guid, available_attributes)
+            
+            # Series are keyed by GUID, so a GUID's entries are never reused by the next group
+            _time_series_cache.clear()
+    
+    _clear_performance_cache()
+    _finish_rendering(prune=True)
+    print(f"Streamed {guid_count} GUIDs. Files saved to: {config.output_dir}")
+    return available_attributes
+
+def _heatmap_rows(data: PmaCounterStore) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Every recorded (GUID, port) pair as a heatmap row.
+
+    Rows are ordered by switch description, then GUID, then port (ports
+    are already in natural order in the store).
+
+    Returns:
+        (GUID indices, port indices, row labels)
+    """
+    pairs = np.argwhere(data.present.any(axis=(2, 3)))
+    order = sorted(range(len(pairs)),
+                   key=lambda r: (data.descriptions.get(data.guids[pairs[r, 0]], ""),
+                                  data.guids[pairs[r, 0]], pairs[r, 1]))
+    pairs = pairs[order].reshape(-1, 2)
+    labels = [f"{data.descriptions.get(data.guids[gi], '') or data.guids[gi]} p{data.ports[pi]}"
+              for gi, pi in pairs]
+    return pairs[:, 0], pairs[:, 1], labels
+
+
+def _congestion_totals(data: PmaCounterStore, attribute: str) -> np.ndarray:
+    """
+    Total of ``attribute`` over the run for every (GUID, port, VL).
+
+    Raw counters are cumulative, so their total is the sum of the
+    per-interval deltas (which accounts for resets and wraps); derived
+    attributes are already per interval and are summed directly.
+    """
+    array, ai = data.column(attribute)
+    if is_derived_attribute(attribute):
+        values = np.where(data.present, array[..., ai], 0)
+    else:
+        values = _counter_deltas(array[..., [ai]], data.present, PMA_COUNTER_BITS)[0][..., 0]
+    return values.sum(axis=-1, dtype=np.float64)
 
 
-def _setup_subplot(ax: Axes, title: str, ylabel: str) -> None:
-    """Setup common subplot properties."""
-    ax.set_title(title)
-    ax.legend()
-    ax.set_xlabel('Iteration')
-    ax.set_ylabel(ylabel)
-    ax.grid(True)
+def _tick_positions(count: int, max_labels: int) -> np.ndarray:
+    """Evenly spaced tick positions, at most ``max_labels`` of them."""
+    step = max(1, -(-count // max_labels))
+    return np.arange(0, count, step)
 
 
-def _plot_port_comparison(ax: Axes, data: Dict[str, Any], guid: str, ports: List[str], attr_name: str, vl: str, iterations: List[str]) -> None:
-    """Plot port comparison data for overall graphs with optimizations."""
-    for port in ports:
-        values = _extract_time_series(data, guid, port, vl, attr_name, iterations)
-        ax.plot(iterations, values, label=f'Port {port}', marker='o', markersize=DEFAULT_MARKERSIZE, linewidth=DEFAULT_LINEWIDTH)
+class HeatmapFigure:
+    """
+    One heatmap figure per VL, re-filled for each attribute.
+
+    Rows, row labels and iteration ticks are shared by every attribute of a
+    VL, so only the image data, color limits and title change between PNGs.
+    As with FigureTemplate, the tick labels (not the image) dominate the
+    drawing cost, so building them once per VL is what keeps a fabric-wide
+    run to a few seconds.
+    """
+    def __init__(self, row_labels: List[str], iterations: List[str]):
+        n_rows, n_iterations = len(row_labels), len(iterations)
+        height = min(HEATMAP_MAX_HEIGHT, max(config.min_fig_height, n_rows * HEATMAP_INCHES_PER_ROW + 2))
+        width = min(HEATMAP_MAX_WIDTH, max(config.min_fig_width, n_iterations * HEATMAP_INCHES_PER_ITERATION + 4))
+        self.fig, self.ax = plt.subplots(figsize=(width, height))
+        self.image = self.ax.imshow(np.ma.masked_all((n_rows, n_iterations)), aspect='auto',
+                                    interpolation='nearest', cmap='viridis')
+        # Default colorbars are 20:1, a sliver on a tall fabric-wide figure; span the full height
+        self.fig.colorbar(self.image, ax=self.ax, fraction=HEATMAP_COLORBAR_FRACTION, pad=0.01,
+                          aspect=height / (HEATMAP_COLORBAR_FRACTION * width))
+        
+        rows = _tick_positions(n_rows, HEATMAP_MAX_ROW_LABELS)
+        self.ax.set_yticks(rows)
+        self.ax.set_yticklabels([row_labels[r] for r in rows], fontsize=6)
+        columns = _tick_positions(n_iterations, HEATMAP_MAX_ITERATION_LABELS)
+        self.ax.set_xticks(columns)
+        self.ax.set_xticklabels([iterations[c] for c in columns], fontsize=7)
+        self.ax.set_xlabel('Iteration')
+        self._laid_out = False
+    
+    def save(self, matrix: np.ma.MaskedArray, title: str, output_path: str) -> None:
+        """Draw ``matrix`` (row x iteration) and save it."""
+        self.image.set_data(matrix)
+        if matrix.count():
+            self.image.set_clim(matrix.min(), matrix.max())
+        # An explicit y skips matplotlib's per-draw title placement over every tick label
+        self.ax.set_title(title, y=1.0)
+        # Rows and ticks are shared by every attribute, so lay out once and drop the
+        # layout engine so savefig does not draw a second time
+        if not self._laid_out:
+            with _profiler.stage("tight_layout"):
+                self.fig.tight_layout()
+                self.fig.set_layout_engine(None)
+            self._laid_out = True
+        with _profiler.stage("savefig"):
+            self.fig.savefig(output_path, dpi=config.dpi)
+    
+    def close(self) -> None:
+        plt.close(self.fig)
 
 
-def _format_vl_title(vl: str) -> str:
-    """Format VL for display in titles."""
-    return vl if vl == "Overall" else f"VL {vl}"
+def create_heatmaps(data: PmaCounterStore, attributes: Optional[List[str]] = None,
+                    sort_attribute: Optional[str] = None, prune: bool = True) -> None:
+    """
+    Create one fabric-wide heatmap per attribute and VL.
 
+    Each heatmap has one row per (switch description, port) and one column
+    per iteration, drawn with a single imshow, so a whole fabric takes a
+    few dozen PNGs instead of one per GUID/port/attribute. Cells that were
+    not recorded are left blank. Heatmaps go to <output_dir>/heatmaps and
+    take part in the render manifest like the per-port graphs.
 
-def _create_individual_subplot(data: Dict[str, Any], guid: str, port: str, attr_name: str, iterations: List[str], sample_vls: List[str], output_prefix: str) -> None:
-    """Create individual subplot as its own figure."""
-    plt.figure(figsize=(config.min_fig_width, config.min_fig_height))
-    ax = plt.gca()
+    Args:
+        data: The parsed PMA counter store
+        attributes: Attributes to draw (default: every counter attribute in the store)
+        sort_attribute: If given, order rows by the total of this attribute
+            over the run on each VL, most congested first
+        prune: Delete heatmaps from the previous run that this run did not produce
+
+    Raises:
+        ValueError: If configuration is invalid
+        OSError: If output directory cannot be created
+    """
+    _configure_rendering()
     
-    _plot_vl_data(ax, data, guid, port, attr_name, iterations, sample_vls)
+    attributes = counter_attributes(data.attributes) if attributes is None else [
+        attr for attr in attributes if attr in data.attribute_index]
+    row_guids, row_ports, row_labels = _heatmap_rows(data)
     
-    description = get_description(data, guid) or "Unknown"
-    title = f'GUID {guid} Port {port} {attr_name}\n{description}'
-    _setup_subplot(ax, title, attr_name)
+    totals = None
+    if sort_attribute is not None:
+        if sort_attribute in data.attribute_index:
+            totals = _congestion_totals(data, sort_attribute)[row_guids, row_ports]
+        else:
+            logger.warning(f"Sort attribute '{sort_attribute}' not found in data. Heatmap rows are not sorted.")
     
-    # Create directory structure: pmaCounterGraphs/guid_<GUID>/<graph_type>/port_<PORT>
-    guid_dir = os.path.join(config.output_dir, f'guid_{guid}')
-    type_dir = os.path.join(guid_dir, output_prefix)
-    port_dir = os.path.join(type_dir, f'port_{port}')
-    _directory_cache.ensure_directory(port_dir)
+    heatmap_dir = os.path.join(config.output_dir, HEATMAP_DIR)
+    print(f"Generating heatmaps for {len(row_labels)} ports, {len(data.vls)} VLs "
+          f"and {len(attributes)} attributes...")
     
-    # Save with descriptive filename in port subdirectory
-    filename = f'{output_prefix}_{attr_name.replace(" ", "_")}.png'
-    output_path = os.path.join(port_dir, filename)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=config.dpi, bbox_inches='tight')
-    plt.close()
+    for vi, vl in enumerate(data.vls):
+        vl_present = data.present[row_guids, row_ports, vi, :]
+        rows = np.flatnonzero(vl_present.any(axis=1))
+        if not len(rows):
+            continue
+        if totals is not None:
+            rows = rows[np.argsort(-totals[rows, vi], kind='stable')]
+        labels = [row_labels[r] for r in rows]
+        missing = ~vl_present[rows]
+        guids, ports = row_guids[rows], row_ports[rows]
+        title_vl = _format_vl_title(vl)
+        vl_safe = title_vl.replace(" ", "_")
+        figure = None
+        
+        try:
+            for attr_name in attributes:
+                array, ai = data.column(attr_name)
+                matrix = np.ma.masked_array(array[guids, ports, vi, :, ai], mask=missing)
+                title = f'{attr_name} {title_vl} ({len(rows)} ports)'
+                if totals is not None:
+                    title += f', sorted by total {sort_attribute}'
+                output_path = os.path.join(heatmap_dir, f'heatmap_{vl_safe}_{attr_name.replace(" ", "_")}.png')
+                
+                series = [((HEATMAP_DIR, vl, attr_name), '\n'.join(labels), matrix.data),
+                          ((HEATMAP_DIR, vl), 'missing', missing)]
+                digest = _render_manifest.digest(title, 'Iteration', series, data.iterations)
+                if _render_manifest.is_current(output_path, digest):
+                    continue
+                
+                if figure is None:
+                    figure = HeatmapFigure(labels, data.iterations)
+                _directory_cache.ensure_directory(heatmap_dir)
+                figure.save(matrix, title, output_path)
+                _render_manifest.record(output_path, digest)
+        finally:
+            if figure is not None:
+                figure.close()
     
+    _finish_rendering(prune, _is_heatmap_path)
+    print(f"Heatmap generation complete. Files saved to: {heatmap_dir}")
 
-def _create_individual_comparison_subplot(data: Dict[str, Any], guid: str, ports: List[str], attr_name: str, vl: str, iterations: List[str], output_prefix: str) -> None:
-    """Create individual port comparison subplot as its own figure."""
-    plt.figure(figsize=(config.min_fig_width, config.min_fig_height))
-    ax = plt.gca()
-    
-    _plot_port_comparison(ax, data, guid, ports, attr_name, vl, iterations)
+def _normalized(values: np.ndarray) -> np.ndarray:
+    """Scale the last axis of ``values`` so each column's fabric-wide maximum is 1."""
+    column_max = values.max(axis=tuple(range(values.ndim - 1)))
+    return np.divide(values, column_max, out=np.zeros_like(values), where=column_max > 0)
+
+
+class CongestionTally:
+    """
+    Per-series congestion summaries behind rank_congestion, updated in batches of iterations.
+
+    Totals, peaks (and the iteration of the first attribute's peak) and the
+    running mean and variance of the first attribute's deltas are kept per
+    (guid, port, vl), so ``--follow`` only has to add the iterations that
+    arrived since the last refresh. Batches are merged with Chan's parallel
+    variance formula; a single batch gives exactly the two-pass result.
+    """
+    def __init__(self, attributes: List[str], shape: Tuple[int, int, int]):
+        self.attributes = attributes
+        self.totals = np.zeros(shape + (len(attributes),))
+        self.peaks = np.zeros(shape + (len(attributes),))
+        self.peak_iteration = np.zeros(shape, dtype=np.int64)
+        self.samples = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
     
-    description = get_description(data, guid) or "Unknown"
-    title_vl = _format_vl_title(vl)
-    title = f'GUID {guid} {title_vl} {attr_name} (All Ports)\n{description}'
-    _setup_subplot(ax, title, attr_name)
+    def add(self, deltas: np.ndarray, rates: np.ndarray, present: np.ndarray, first_iteration: int = 0) -> None:
+        """
+        Fold in a batch of iterations.
+
+        Args:
+            deltas: (guid, port, vl, iteration, attribute) per-sample deltas, 0 where not present
+            rates: ``deltas`` per second, or ``deltas`` itself without intervals
+            present: (guid, port, vl, iteration) mask of the batch
+            first_iteration: Iteration index of the batch's first column
+        """
+        self.totals += deltas.sum(axis=3)
+        peaks = rates.max(axis=3)
+        primary = rates[..., 0]
+        later_peak = primary.max(axis=-1) > self.peaks[..., 0]
+        self.peak_iteration = np.where(later_peak, primary.argmax(axis=-1) + first_iteration, self.peak_iteration)
+        np.maximum(self.peaks, peaks, out=self.peaks)
+        
+        samples = present.sum(axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = deltas[..., 0].sum(axis=-1) / samples
+            m2 = (np.where(present, deltas[..., 0] - mean[..., None], 0) ** 2).sum(axis=-1)
+            total = self.samples + samples
+            shift = mean - self.mean
+            merged_mean = self.mean + shift * samples / total
+            merged_m2 = self.m2 + m2 + shift ** 2 * self.samples * samples / total
+        first = self.samples == 0
+        self.mean = np.where(samples == 0, self.mean, np.where(first, mean, merged_mean))
+        self.m2 = np.where(samples == 0, self.m2, np.where(first, m2, merged_m2))
+        self.samples = total
     
-    # Create directory structure: pmaCounterGraphs/guid_<GUID>/<graph_type> (overall graphs in type dir)
-    guid_dir = os.path.join(config.output_dir, f'guid_{guid}')
-    type_dir = os.path.join(guid_dir, output_prefix)
-    _directory_cache.ensure_directory(type_dir)
+    def expand(self, index: Tuple[np.ndarray, np.ndarray, np.ndarray], shape: Tuple[int, int, int]) -> None:
+        """Move the summaries onto a larger (guid, port, vl) grid; ``index`` gives each old label's new position."""
+        for name in ("totals", "peaks", "peak_iteration", "samples", "mean", "m2"):
+            old = getattr(self, name)
+            new = np.zeros(shape + old.shape[3:], dtype=old.dtype)
+            new[np.ix_(*index)] = old
+            setattr(self, name, new)
     
-    # Save with descriptive filename in type subdirectory
-    vl_safe = vl.replace(" ", "_")
-    filename = f'{output_prefix}_{vl_safe}_{attr_name.replace(" ", "_")}_all_ports.png'
-    output_path = os.path.join(type_dir, filename)
-    plt.tight_layout()
-    plt.savefig(output_path, dpi=config.dpi, bbox_inches='tight')
-    plt.close()
-
+    def rank(self, data: 'PmaCounterStore', top: int) -> List[Dict[str, Any]]:
+        """
+        The ``top`` most congested series, see rank_congestion.
 
+        Args:
+            data: Store (or LiveCounterStore) whose labels index the tally
+            top: Number of series to return
+        """
+        totals, peaks = self.totals, self.peaks
+        score = (_normalized(totals) + _normalized(peaks)).sum(axis=-1) / (2 * len(self.attributes))
+        samples = self.samples
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = self.m2 / samples
+            burstiness = np.where(self.mean > 0, np.sqrt(variance) / self.mean, 0)
+        
+        eligible = (samples > 0) & (score > 0)
+        overall = data.vl_index.get("Overall")
+        if overall is not None and len(data.vls) > 1:
+            eligible[:, :, overall] = False
+        candidates = np.flatnonzero(eligible)
+        flat_score = score.ravel()
+        if len(candidates) > top:
+            candidates = candidates[np.argpartition(-flat_score[candidates], top - 1)[:top]]
+        candidates = candidates[np.argsort(-flat_score[candidates], kind='stable')]
+        
+        ranked = []
+        for rank, (gi, pi, vi) in enumerate(zip(*np.unravel_index(candidates, score.shape)), start=1):
+            guid = data.guids[gi]
+            entry = {
+                "rank": rank,
+                "guid": guid,
+                "description": data.descriptions.get(guid, ""),
+                "port": data.ports[pi],
+                "vl": data.vls[vi],
+                "score": float(score[gi, pi, vi]),
+            }
+            for a, attr in enumerate(self.attributes):
+                entry[f"{attr} Total"] = float(totals[gi, pi, vi, a])
+                entry[f"{attr} Peak"] = float(peaks[gi, pi, vi, a])
+            entry["peak_iteration"] = data.iterations[self.peak_iteration[gi, pi, vi]]
+            entry["burstiness"] = float(burstiness[gi, pi, vi])
+            ranked.append(entry)
+        return ranked
 
 
-def _get_common_data_structure(data: Dict[str, Any], guid: str) -> Tuple[List[str], List[str], List[str]]:
-    """Extract common data structure elements."""
-    iterations = sorted(data[guid].keys())
-    iterations = [it for it in iterations if it != "Description"]
-    ports = sorted(data[guid][iterations[0]].keys())
-    sample_vls = list(data[guid][iterations[0]][ports[0]].keys())
-    return iterations, ports, sample_vls
+def rank_congestion(data: PmaCounterStore, top: int = DEFAULT_TRIAGE_TOP,
+                    interval: Optional[Union[float, np.ndarray]] = None) -> List[Dict[str, Any]]:
+    """
+    Rank every (GUID, port, VL) series by congestion in one vectorized pass.
 
+    For each TRIAGE_ATTRIBUTES column present, the per-sample deltas give
+    a total and a peak per series (the peak is a per-second rate when
+    ``interval`` is given). The score is the mean of those totals and peaks, each
+    normalized by its fabric-wide maximum, so it lies in [0, 1]. Burstiness
+    is the coefficient of variation of the first attribute's deltas, and
+    the peak iteration is where that attribute peaked. The Overall rows are
+    skipped when per-VL rows exist, so each congested VL is reported once.
 
-def get_value(data: Dict[str, Any], guid: str, iteration: str, port: str, vl: str, attribute: str) -> Optional[Union[int, float, str]]:
-    """
-    Safely retrieve a value from the parsed data structure.
-    
     Args:
-        data: The parsed data structure
-        guid: GUID identifier
-        iteration: Iteration number
-        port: Port number
-        vl: VL identifier
-        attribute: Attribute name
-        
+        data: The parsed PMA counter store
+        top: Number of series to return
+        interval: Seconds between samples, see add_derived_metrics
+
     Returns:
-        The value if found, None otherwise
-    """
-    try:
-        return data[guid][iteration][port][vl][attribute]
-    except KeyError as e:
-        logger.debug(f"Key not found: {e}")
-        return None
+        List[Dict[str, Any]]: The ``top`` highest-scoring series with a
+            non-zero score, most congested first
 
-def get_description(data: Dict[str, Any], guid: str) -> Optional[str]:
+    Raises:
+        ValueError: If none of TRIAGE_ATTRIBUTES is in the data
     """
-    Retrieve the description for a given GUID.
+    attributes = [attr for attr in TRIAGE_ATTRIBUTES if attr in data.attribute_index]
+    if not attributes:
+        raise ValueError(f"No congestion attributes ({', '.join(TRIAGE_ATTRIBUTES)}) found in data")
     
-    Args:
-        data: The parsed data structure
-        guid: GUID identifier
-
-    Returns:
-        The description if found, None otherwise
-    """
-    try:
-        return data[guid]["Description"]
-    except KeyError as e:
-        logger.debug(f"Key not found: {e}")
-        return None
+    columns = [data.attribute_index[attr] for attr in attributes]
+    deltas, _, _ = _counter_deltas(data.values[..., columns], data.present, PMA_COUNTER_BITS)
+    rates = deltas if interval is None else _per_second(deltas, interval)
     
+    tally = CongestionTally(attributes, data.present.shape[:3])
+    tally.add(deltas, rates, data.present)
+    return tally.rank(data, top)
+
+
+def _format_count(value: float) -> str:
+    """Whole counts without a fraction, rates with two decimals."""
+    return f"{value:.0f}" if float(value).is_integer() else f"{value:.2f}"
 
-def create_xmit_rcv_pkt_graphs(data: Dict[str, Any], guid: str, available_attributes: List[str]) -> None:
+
+def _format_triage_table(ranked: List[Dict[str, Any]]) -> str:
+    """Fixed-width text table of rank_congestion results."""
+    if not ranked:
+        return "No congested ports found."
+    metrics = [key for key in ranked[0] if key.endswith((" Total", " Peak"))]
+    header = (f"{'Rank':>4}  {'GUID':<18}  {'Description':<20}  {'Port':>4}  {'VL':>7}  {'Score':>6}  "
+              + "  ".join(f"{name:>{len(name)}}" for name in metrics) + f"  {'Peak Iter':>9}  {'Burst':>6}")
+    lines = [header, "-" * len(header)]
+    for entry in ranked:
+        lines.append(f"{entry['rank']:>4}  {entry['guid']:<18}  {entry['description'][:20]:<20}  "
+                     f"{entry['port']:>4}  {_format_vl_title(entry['vl']):>7}  {entry['score']:>6.3f}  "
+                     + "  ".join(f"{_format_count(entry[name]):>{len(name)}}" for name in metrics)
+                     + f"  {entry['peak_iteration']:>9}  {entry['burstiness']:>6.2f}")
+    return "\n".join(lines)
+
+
+def triage_congestion(data: PmaCounterStore, available_attributes: List[str],
+                      top: int = DEFAULT_TRIAGE_TOP) -> List[Dict[str, Any]]:
     """
-    Create individual graphs of transmitted and received packets over iterations for a specific GUID and port.
-    Each port/attribute combination gets its own PNG file for optimal performance.
-    Only creates graphs for attributes that exist in the data.
+    Rank congested ISLs, then graph only the hottest ports.
+
+    Prints the rank_congestion table and writes it as CSV to
+    <output_dir>/triage. The ports in the table then get the usual
+    individual and comparison graphs in that directory (which has its own
+    render manifest, so ports that drop out of the top K are pruned).
 
     Args:
-        data: The parsed PMA data structure
-        guid: The GUID to graph data for
+        data: The parsed PMA counter store
         available_attributes: List of available attribute column names
+        top: Number of (GUID, port, VL) series to report
+
+    Returns:
+        List[Dict[str, Any]]: The ranked series
+
+    Raises:
+        ValueError: If configuration is invalid or no congestion attributes exist
+        OSError: If output directory cannot be created
     """
-    description = get_description(data, guid)
-    if description is None:
-        logger.info(f"No description found for GUID {guid}. Cannot create packet graphs.")
-        return
-    
-    # Check which packet attributes are available
-    packet_attrs = []
-    if "Xmit Pkts" in available_attributes:
-        packet_attrs.append("Xmit Pkts")
-    if "Rcv Pkts" in available_attributes:
-        packet_attrs.append("Rcv Pkts")
+    interval = _sample_interval(data)
+    ranked = rank_congestion(data, top, interval)
+    print(f"Top {len(ranked)} congested (GUID, port, VL) series"
+          + (" (peaks are per-second rates)" if interval is not None else " (per-sample deltas)") + ":")
+    print(_format_triage_table(ranked))
     
-    # If no packet attributes available, don't create graphs
-    if not packet_attrs:
-        logger.info(f"No packet attributes (Xmit Pkts, Rcv Pkts) found for GUID {guid}. Skipping packet graphs.")
-        return
-        
-    iterations, ports, sample_vls = _get_common_data_structure(data, guid)
+    triage_dir = os.path.join(config.output_dir, TRIAGE_DIR)
+    _directory_cache.ensure_directory(triage_dir)
+    table_path = os.path.join(triage_dir, TRIAGE_TABLE)
+    with open(table_path, 'w', newline='', encoding='utf-8') as table_file:
+        fieldnames = list(ranked[0]) if ranked else ["rank", "guid", "description", "port", "vl", "score"]
+        writer = csv.DictWriter(table_file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(ranked)
+    print(f"Triage table saved to: {table_path}")
     
-    # Create individual subplot for each port/attribute combination
-    for port in ports:
-        for attr_name in packet_attrs:
-            _create_individual_subplot(data, guid, port, attr_name, iterations, sample_vls, "packets")
+    hot_ports = {}
+    for entry in ranked:
+        ports = hot_ports.setdefault(entry["guid"], [])
+        if entry["port"] not in ports:
+            ports.append(entry["port"])
+    if not hot_ports:
+        return ranked
     
-    # Create comparison graphs showing all ports for each packet attribute
-    for attr_name in packet_attrs:
-        _create_individual_comparison_subplot(data, guid, ports, attr_name, config.comparison_vl, iterations, "packets")
+    output_dir = config.output_dir
+    config.output_dir = triage_dir
+    try:
+        create_graphs(data.select_ports(hot_ports), available_attributes)
+    finally:
+        config.output_dir = output_dir
+    return ranked
 
-def create_congestion_graphs(data: Dict[str, Any], guid: str, available_attributes: List[str]) -> None:
+
+class LiveCounterStore:
     """
-    Create individual graphs of congestion metrics over iterations for a specific GUID and port.
-    Each port/attribute combination gets its own PNG file for optimal performance.
-    Only creates graphs for attributes that exist in the data.
+    A PMA counter CSV that is still being written, ingested as it grows.
 
-    Args:
-        data: The parsed PMA data structure
-        guid: The GUID to graph data for
-        available_attributes: List of available attribute column names
+    Each ``poll`` reads only the lines appended since the previous one.
+    Writers append whole iterations (``pmaCounterCollector.py --stream``
+    flushes after every sample), so rows of the newest iteration are held
+    back until a later iteration starts, or until ``poll(final=True)``.
+    Only the newly completed iterations are converted, turned into
+    TRIAGE_ATTRIBUTES deltas (bridged from each series' last earlier
+    sample) and per-second rates, and folded into a CongestionTally. The
+    arrays grow along the iteration axis with doubling capacity, and are
+    re-gridded only when a new GUID, port or VL shows up.
+
+    The label lists, label->index maps, ``values`` and ``present`` read
+    like a PmaCounterStore's, with values stored as float64.
     """
-    description = get_description(data, guid)
-    if description is None:
-        logger.info(f"No description found for GUID {guid}. Cannot create congestion graphs.")
-        return
+    def __init__(self, csv_file_path: str):
+        self.csv_file_path = csv_file_path
+        self._reset()
     
-    # Check which congestion attributes are available
-    congestion_attrs = []
-    if "Xmit Time Cong" in available_attributes:
-        congestion_attrs.append("Xmit Time Cong")
-    if "Xmit Wait" in available_attributes:
-        congestion_attrs.append("Xmit Wait")
-    if "Congestion Discards" in available_attributes:
-        congestion_attrs.append("Congestion Discards")
+    def _reset(self) -> None:
+        self._offset = 0
+        self._partial = b""
+        self._row_num = CSV_START_ROW
+        self._pending = []
+        self.headers = None
+        self.attributes = []
+        self.congestion_attributes = []
+        self.guids, self.ports, self.vls, self.iterations = [], [], [], []
+        self.guid_index, self.port_index, self.vl_index, self.iteration_index = {}, {}, {}, {}
+        self.attribute_index = {}
+        self.descriptions = {}
+        self.tally = None
+        self._values = np.zeros((0, 0, 0, 0, 0))
+        self._present = np.zeros((0, 0, 0, 0), dtype=bool)
+        self._deltas = np.zeros((0, 0, 0, 0, 0))
+        self._rates = np.zeros((0, 0, 0, 0, 0))
+        self._times = np.zeros(0)
+        self._last_values = np.zeros((0, 0, 0, 0))
+        self._last_present = np.zeros((0, 0, 0), dtype=bool)
     
-    # If no congestion attributes available, don't create graphs
-    if not congestion_attrs:
-        logger.info(f"No congestion attributes (Xmit Time Cong, Xmit Wait, Congestion Discards) found for GUID {guid}. Skipping congestion graphs.")
-        return
-        
-    iterations, ports, sample_vls = _get_common_data_structure(data, guid)
+    @property
+    def values(self) -> np.ndarray:
+        return self._values[:, :, :, :len(self.iterations)]
     
-    # Create individual subplot for each port/attribute combination
-    for port in ports:
-        for attr_name in congestion_attrs:
-            _create_individual_subplot(data, guid, port, attr_name, iterations, sample_vls, "congestion")
+    @property
+    def present(self) -> np.ndarray:
+        return self._present[:, :, :, :len(self.iterations)]
     
-    # Create comparison graphs showing all ports for each congestion attribute
-    for attr_name in congestion_attrs:
-        _create_individual_comparison_subplot(data, guid, ports, attr_name, config.comparison_vl, iterations, "congestion")
-
-def create_bubble_graphs(data: Dict[str, Any], guid: str, available_attributes: List[str]) -> None:
-    """
-    Create graphs of bubble metrics over iterations for a specific GUID and port.
-    Each port gets subplots for different bubble attributes, with all VLs plotted.
-    Additional subplots show Overall data across all ports for each attribute.
-    Only creates graphs if at least one bubble attribute exists in the data.
-
-    Args:
-        data: The parsed PMA data structure
-        guid: The GUID to graph data for
-        available_attributes: List of available attribute column names
-    """
-    description = get_description(data, guid)
-    if description is None:
-        logger.info(f"No description found for GUID {guid}. Cannot create bubble graph.")
-        return
+    @property
+    def deltas(self) -> np.ndarray:
+        """(guid, port, vl, iteration, congestion attribute) per-sample deltas."""
+        return self._deltas[:, :, :, :len(self.iterations)]
     
-    # Check which core bubble attributes are available (excluding Error Counter Summary)
-    core_bubble_attrs = []
-    if "Rcv Bubble" in available_attributes:
-        core_bubble_attrs.append("Rcv Bubble")
-    if "Xmit Wasted BW" in available_attributes:
-        core_bubble_attrs.append("Xmit Wasted BW")
-    if "Xmit Wait Data" in available_attributes:
-        core_bubble_attrs.append("Xmit Wait Data")
+    @property
+    def rates(self) -> np.ndarray:
+        """``deltas`` per second when intervals are known (see per_second), else the deltas themselves."""
+        return self._rates[:, :, :, :len(self.iterations)]
     
-    # Check if Error Counter Summary is available
-    has_error_counter = "Error Counter Summary" in available_attributes
+    @property
+    def per_second(self) -> bool:
+        return config.sample_interval is not None or QUERY_START_COLUMN in self.attribute_index
     
-    # If no core bubble attributes and no Error Counter Summary, skip the graph
-    if not core_bubble_attrs and not has_error_counter:
-        logger.info(f"No bubble attributes (Rcv Bubble, Xmit Wasted BW, Xmit Wait Data, Error Counter Summary) found for GUID {guid}. Skipping bubble graphs.")
-        return
+    def x_axis(self) -> List[Union[str, float]]:
+        """Seconds since the first sample when the CSV has timestamps (see _x_axis), else the iteration labels."""
+        times = self._times[:len(self.iterations)]
+        if not config.time_axis or SAMPLE_TIME_COLUMN not in self.attribute_index or np.isnan(times).all():
+            return self.iterations
+        return [float(t) for t in times - np.nanmin(times)]
+    
+    def _read_rows(self) -> List[PmaRow]:
+        """Parse the complete lines appended since the last read."""
+        try:
+            size = os.path.getsize(self.csv_file_path)
+        except FileNotFoundError:
+            return []
+        if size < self._offset:
+            logger.warning(f"{self.csv_file_path} shrank, so it was rewritten; reading it from the start")
+            self._reset()
+        with open(self.csv_file_path, 'rb') as csvfile:
+            csvfile.seek(self._offset)
+            chunk = csvfile.read()
+        self._offset += len(chunk)
+        complete, newline, self._partial = (self._partial + chunk).rpartition(b"\n")
+        if not newline:
+            return []
+        lines = complete.decode('utf-8').split("\n")
+        if self.headers is None:
+            self._set_headers(_read_pma_header(csv.reader(lines[:1]))[0])
+            lines = lines[1:]
+        rows = list(_iter_pma_rows(csv.reader(lines), self.headers, self._row_num))
+        self._row_num += len(lines)
+        return rows
+    
+    def _set_headers(self, headers: List[str]) -> None:
+        self.headers = headers
+        self.attributes = [header for header in headers if header not in REQUIRED_HEADERS]
+        self.attribute_index = {label: i for i, label in enumerate(self.attributes)}
+        self.congestion_attributes = [attr for attr in TRIAGE_ATTRIBUTES if attr in self.attribute_index]
+        if not self.congestion_attributes:
+            raise ValueError(f"No congestion attributes ({', '.join(TRIAGE_ATTRIBUTES)}) found in data")
+        self.tally = CongestionTally(self.congestion_attributes, (0, 0, 0))
+        n_attributes, n_congestion = len(self.attributes), len(self.congestion_attributes)
+        self._values = np.zeros((0, 0, 0, 0, n_attributes))
+        self._deltas = np.zeros((0, 0, 0, 0, n_congestion))
+        self._rates = np.zeros((0, 0, 0, 0, n_congestion))
+        self._last_values = np.zeros((0, 0, 0, n_attributes))
+    
+    def poll(self, final: bool = False) -> int:
+        """
+        Ingest the iterations completed since the last poll.
+
+        Args:
+            final: Also ingest the newest iteration (the writer has stopped)
+
+        Returns:
+            int: Number of iterations added
+        """
+        self._pending.extend(self._read_rows())
+        if not self._pending:
+            return 0
+        if final:
+            ready, self._pending = self._pending, []
+        else:
+            newest = max(_label_sort_key(row[4]) for row in self._pending)
+            ready = [row for row in self._pending if _label_sort_key(row[4]) < newest]
+            self._pending = [row for row in self._pending if _label_sort_key(row[4]) == newest]
         
-    iterations, ports, sample_vls = _get_common_data_structure(data, guid)
+        last = _label_sort_key(self.iterations[-1]) if self.iterations else None
+        late = [row for row in ready if last is not None and _label_sort_key(row[4]) <= last]
+        if late:
+            logger.warning(f"Skipping {len(late)} rows of iterations that were already ingested "
+                           f"(first at line {late[0][0]})")
+            ready = [row for row in ready if last is None or _label_sort_key(row[4]) > last]
+        if not ready:
+            return 0
+        return self._ingest(ready)
     
-    # Create individual subplot for each port/core bubble attribute combination
-    for port in ports:
-        for attr_name in core_bubble_attrs:
-            _create_individual_subplot(data, guid, port, attr_name, iterations, sample_vls, "bubble")
+    def _regrid(self, guids: List[str], ports: List[str], vls: List[str]) -> None:
+        """Move every per-series array onto a grid with new GUIDs, ports or VLs."""
+        positions = [{label: i for i, label in enumerate(labels)} for labels in (guids, ports, vls)]
+        index = tuple(np.array([new[label] for label in old], dtype=np.int64)
+                      for new, old in zip(positions, (self.guids, self.ports, self.vls)))
+        shape = (len(guids), len(ports), len(vls))
+        for name in ("_values", "_present", "_deltas", "_rates", "_last_values", "_last_present"):
+            old = getattr(self, name)
+            new = np.zeros(shape + old.shape[3:], dtype=old.dtype)
+            new[np.ix_(*index)] = old
+            setattr(self, name, new)
+        self.tally.expand(index, shape)
+        self.guids, self.ports, self.vls = guids, ports, vls
+        self.guid_index, self.port_index, self.vl_index = positions
     
-    # Create comparison graphs showing all ports for each bubble attribute
-    for attr_name in core_bubble_attrs:
-        _create_individual_comparison_subplot(data, guid, ports, attr_name, config.comparison_vl, iterations, "bubble")
+    def _reserve(self, n_iterations: int) -> None:
+        """Grow the iteration capacity to at least ``n_iterations``, doubling to keep appends amortized O(1)."""
+        capacity = len(self._times)
+        if n_iterations <= capacity:
+            return
+        capacity = max(n_iterations, 2 * capacity, 16)
+        used = len(self.iterations)
+        for name in ("_values", "_present", "_deltas", "_rates"):
+            old = getattr(self, name)
+            new = np.zeros(old.shape[:3] + (capacity,) + old.shape[4:], dtype=old.dtype)
+            new[:, :, :, :used] = old[:, :, :, :used]
+            setattr(self, name, new)
+        times = np.full(capacity, np.nan)
+        times[:used] = self._times[:used]
+        self._times = times
     
-    # Special handling for Error Counter Summary (always uses Overall VL)
-    if has_error_counter:
-        _create_individual_comparison_subplot(data, guid, ports, "Error Counter Summary", "Overall", iterations, "bubble")
+    def _ingest(self, rows: List[PmaRow]) -> int:
+        for _, guid, description, _, _, _, _ in rows:
+            existing_description = self.descriptions.setdefault(guid, description)
+            if existing_description != description:
+                logger.warning(f"Inconsistent description for GUID {guid}: "
+                               f"existing='{existing_description}', new='{description}'. "
+                               f"Keeping existing description.")
+        guids = list(dict.fromkeys(self.guids + [row[1] for row in rows]))
+        ports = sorted(set(self.ports).union(row[3] for row in rows), key=_label_sort_key)
+        vls = list(dict.fromkeys(self.vls + [row[5] for row in rows]))
+        if (len(guids), len(ports), len(vls)) != (len(self.guids), len(self.ports), len(self.vls)):
+            self._regrid(guids, ports, vls)
+        
+        first = len(self.iterations)
+        new_iterations = sorted({row[4] for row in rows}, key=_label_sort_key)
+        self._reserve(first + len(new_iterations))
+        iteration_position = {label: first + i for i, label in enumerate(new_iterations)}
+        key = (np.array([self.guid_index[row[1]] for row in rows]),
+               np.array([self.port_index[row[3]] for row in rows]),
+               np.array([self.vl_index[row[5]] for row in rows]),
+               np.array([iteration_position[row[4]] for row in rows]))
+        batch = slice(first, first + len(new_iterations))
+        self._values[key] = _convert_value_block([row[6] for row in rows], rows[0][0])
+        self._present[key] = True
+        values, present = self._values[:, :, :, batch], self._present[:, :, :, batch]
+        
+        # Prepend each series' last earlier sample so deltas and intervals bridge the batch boundary
+        bridged = np.concatenate([self._last_values[:, :, :, None], values], axis=3)
+        counters = [self.attribute_index[attr] for attr in counter_attributes(self.attributes)]
+        stamps = [self.attribute_index[attr] for attr in self.attributes if attr in TIMESTAMP_COLUMNS]
+        window = PmaCounterStore(self.guids, self.descriptions, self.ports, self.vls,
+                                 [""] + new_iterations, counter_attributes(self.attributes),
+                                 bridged[..., counters],
+                                 np.concatenate([self._last_present[..., None], present], axis=3),
+                                 timestamp_columns=[self.attributes[i] for i in stamps],
+                                 timestamps=bridged[..., stamps])
+        columns = [window.attribute_index[attr] for attr in self.congestion_attributes]
+        deltas, _, _ = _counter_deltas(window.values[..., columns], window.present, PMA_COUNTER_BITS)
+        interval = _sample_interval(window)
+        rates = deltas if interval is None else _per_second(deltas, interval)
+        self._deltas[:, :, :, batch] = deltas[:, :, :, 1:]
+        self._rates[:, :, :, batch] = rates[:, :, :, 1:]
+        self.tally.add(deltas[:, :, :, 1:], rates[:, :, :, 1:], present, first)
+        
+        if SAMPLE_TIME_COLUMN in self.attribute_index:
+            stamps = np.where(present, values[..., self.attribute_index[SAMPLE_TIME_COLUMN]], -np.inf)
+            times = stamps.max(axis=(0, 1, 2))
+            self._times[batch] = np.where(np.isfinite(times), times, np.nan)
+        last = np.where(present, np.arange(len(new_iterations)), -1).max(axis=-1)
+        seen = last >= 0
+        latest = np.take_along_axis(values, np.maximum(last, 0)[..., None, None], axis=3)[:, :, :, 0]
+        self._last_values = np.where(seen[..., None], latest, self._last_values)
+        self._last_present |= seen
+        
+        self.iterations.extend(new_iterations)
+        self.iteration_index.update((label, first + i) for i, label in enumerate(new_iterations))
+        return len(new_iterations)
 
 
+def _save_replacing(output_path: str, save: Callable[[str], None]) -> None:
+    """Write through ``save`` to a temporary file and rename it over ``output_path``, so viewers never see half a PNG."""
+    root, ext = os.path.splitext(output_path)
+    tmp_path = f"{root}.tmp{ext}"
+    save(tmp_path)
+    os.replace(tmp_path, output_path)
 
 
-def _clear_performance_cache() -> None:
-    """Clear performance caches to free memory."""
-    cache_size = _time_series_cache.size()
-    dir_cache_size = _directory_cache.size()
+def render_live(live: LiveCounterStore, top: int = DEFAULT_TRIAGE_TOP) -> List[Dict[str, Any]]:
+    """
+    Redraw the ``--follow`` summary in <output_dir>/live.
+
+    Writes the ranked table (as in triage mode), one graph of the first
+    congestion attribute for each of the ``top`` series, and a fabric
+    heatmap of that attribute on the comparison VL with the most congested
+    ports at the top. Files are replaced atomically.
+
+    Returns:
+        List[Dict[str, Any]]: The ranked series, see rank_congestion
+    """
+    ranked = live.tally.rank(live, top)
+    live_dir = os.path.join(config.output_dir, LIVE_DIR)
+    _directory_cache.ensure_directory(live_dir)
+    attr_name = live.congestion_attributes[0]
+    ylabel = f'{attr_name} per second' if live.per_second else f'{attr_name} per sample'
     
-    _time_series_cache.clear()
-    _directory_cache.clear()
+    def _write_table(path: str) -> None:
+        with open(path, 'w', newline='', encoding='utf-8') as table_file:
+            fieldnames = list(ranked[0]) if ranked else ["rank", "guid", "description", "port", "vl", "score"]
+            writer = csv.DictWriter(table_file, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(ranked)
+    _save_replacing(os.path.join(live_dir, LIVE_TABLE), _write_table)
     
-    gc.collect()
+    if ranked:
+        series = [(f"{entry['description'] or entry['guid']} p{entry['port']} {_format_vl_title(entry['vl'])}",
+                   live.rates[live.guid_index[entry['guid']], live.port_index[entry['port']],
+                              live.vl_index[entry['vl']], :, 0])
+                  for entry in ranked]
+        template = FigureTemplate(len(series), live.x_axis())
+        try:
+            template.set_series(series)
+            template.set_text(f'Top {len(series)} congested series: {attr_name}\n'
+                              f'{len(live.iterations)} iterations', ylabel)
+            _save_replacing(os.path.join(live_dir, LIVE_TOP_PORTS), template.save)
+        finally:
+            template.close()
     
-    logger.debug(f"Cleared {cache_size} cached time series entries and {dir_cache_size} directory entries")
+    vl = config.comparison_vl if config.comparison_vl in live.vl_index else "Overall"
+    vi = live.vl_index.get(vl, 0)
+    row_guids, row_ports, row_labels = _heatmap_rows(live)
+    vl_present = live.present[row_guids, row_ports, vi, :]
+    rows = np.flatnonzero(vl_present.any(axis=1))
+    if len(rows):
+        totals = live.tally.totals[row_guids[rows], row_ports[rows], vi, 0]
+        rows = rows[np.argsort(-totals, kind='stable')]
+        matrix = np.ma.masked_array(live.rates[row_guids[rows], row_ports[rows], vi, :, 0], mask=~vl_present[rows])
+        figure = HeatmapFigure([row_labels[r] for r in rows], live.iterations)
+        try:
+            title = f'{ylabel} {_format_vl_title(live.vls[vi])} ({len(rows)} ports), most congested first'
+            _save_replacing(os.path.join(live_dir, LIVE_HEATMAP), lambda path: figure.save(matrix, title, path))
+        finally:
+            figure.close()
+    return ranked
+
+
+def follow_pma_csv(csv_file_path: str, refresh_interval: float = DEFAULT_FOLLOW_INTERVAL,
+                   top: int = DEFAULT_TRIAGE_TOP, stop: Optional[threading.Event] = None) -> LiveCounterStore:
+    """
+    Tail a CSV while the collector is still writing it and keep a live summary up to date.
+
+    Every ``refresh_interval`` seconds the iterations completed since the
+    last refresh are ingested (see LiveCounterStore) and, if there were
+    any, render_live redraws the summary and the table is printed. Runs
+    until ``stop`` is set or SIGTERM/SIGINT arrives, then ingests the last
+    iteration and refreshes once more.
 
-def create_graphs(data: Dict[str, Any], available_attributes: List[str]) -> None:
-    """Create individual graphs from the parsed PMA data with performance optimizations.
-    
     Args:
-        data: The parsed PMA data structure
-        available_attributes: List of available attribute column names
-        
+        csv_file_path: CSV being written, e.g. by ``pmaCounterCollector.py --stream``;
+            it may not exist yet
+        refresh_interval: Seconds between refreshes
+        top: Number of (GUID, port, VL) series to report and graph
+        stop: Event that ends the loop (default: one set by SIGTERM/SIGINT)
+
+    Returns:
+        LiveCounterStore: Everything ingested
+
     Raises:
-        ValueError: If configuration is invalid
+        ValueError: If the CSV has no congestion attributes or the configuration is invalid
         OSError: If output directory cannot be created
     """
-    # Initialize directory cache for this graph generation session
+    if refresh_interval <= 0:
+        raise ValueError("the refresh interval must be positive")
     _directory_cache.clear()
-    
-    # Validate configuration before proceeding
     _validate_config()
+    _configure_matplotlib()
     
-    # Configure matplotlib for better performance with individual plots
-    if config.use_fast_rendering:
-        plt.rcParams['figure.max_open_warning'] = 0
-        plt.rcParams['font.size'] = 9  # Slightly larger for individual plots
-        plt.rcParams['lines.markersize'] = 4
-        plt.rcParams['lines.linewidth'] = 1.5
-        # Use non-interactive backend for better performance
-        plt.switch_backend('Agg')
-    
-    guids = list(data.keys())
-    
-    print(f"Generating individual subplot PNG files for {len(guids)} GUIDs...")
-    
-    for i, guid in enumerate(guids):
-        if config.use_fast_rendering:
-            print(f"Processing GUID {i+1}/{len(guids)}: {guid}")
+    previous_handlers = {}
+    if stop is None:
+        stop = threading.Event()
         
-        # Each function now creates multiple individual PNG files
-        create_xmit_rcv_pkt_graphs(data, guid, available_attributes)
-        create_congestion_graphs(data, guid, available_attributes)
-        create_bubble_graphs(data, guid, available_attributes)
-        
-        # Clear cache periodically to manage memory
-        if config.cache_time_series and (i + 1) % config.cache_clear_interval == 0:
-            _clear_performance_cache()
-    
-    # Final cleanup
-    _clear_performance_cache()
-    print(f"Individual subplot generation complete. Files saved to: {config.output_dir}")
+        def _request_stop(signum, frame) -> None:
+            print(f"Received {signal.Signals(signum).name}, finishing...")
+            stop.set()
+        for name in FOLLOW_STOP_SIGNALS:
+            signum = getattr(signal, name)
+            previous_handlers[signum] = signal.signal(signum, _request_stop)
     
-def _validate_comparison_vl(data: Dict[str, Any], comparison_vl: str) -> bool:
+    live = LiveCounterStore(csv_file_path)
+    print(f"Following {csv_file_path}, refreshing {os.path.join(config.output_dir, LIVE_DIR)} "
+          f"every {refresh_interval:g}s (Ctrl-C to stop)...")
+    try:
+        while True:
+            final = stop.is_set()
+            with _profiler.stage("follow_ingest"):
+                added = live.poll(final)
+            if added:
+                with _profiler.stage("follow_render"):
+                    ranked = render_live(live, top)
+                print(f"[{time.strftime('%H:%M:%S')}] {len(live.iterations)} iterations (+{added}), "
+                      f"top {len(ranked)} congested series:")
+                print(_format_triage_table(ranked))
+            if final:
+                break
+            stop.wait(refresh_interval)
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+    print(f"Followed {len(live.iterations)} iterations. Files saved to: {os.path.join(config.output_dir, LIVE_DIR)}")
+    return live
+
+
+def _validate_comparison_vl(data: PmaCounterStore, comparison_vl: str) -> bool:
     """Validate that the comparison VL exists in the dataset.
     
     Args:
@@ -620,15 +3106,10 @@ def _validate_comparison_vl(data: Dict[str, Any], comparison_vl: str) -> bool:
     Returns:
         bool: True if the VL exists, False otherwise
     """
-    for guid in data.keys():
-        iterations = [k for k in data[guid].keys() if k != "Description"]
-        if iterations:
-            ports = list(data[guid][iterations[0]].keys())
-            if ports:
-                vls = list(data[guid][iterations[0]][ports[0]].keys())
-                if comparison_vl in vls:
-                    return True
-    return False
+    vi = data.vl_index.get(comparison_vl)
+    if vi is None:
+        return False
+    return bool(data.present[:, :, vi, :].any())
 
 def _validate_config() -> None:
     """Validate configuration settings."""
@@ -639,51 +3120,126 @@ def _validate_config() -> None:
             "may result in large file sizes without significant quality improvement."
         )
     
-    if config.cache_clear_interval < 1:
-        raise ValueError("cache_clear_interval must be at least 1")
+    if config.time_series_cache_mb <= 0:
+        raise ValueError("time_series_cache_mb must be positive")
+    
+    if config.jobs < 1:
+        raise ValueError("jobs must be at least 1")
     
     if not os.path.exists(config.output_dir):
         logger.info(f"Creating output directory: {config.output_dir}")
         _directory_cache.ensure_directory(config.output_dir)
 
 
-def print_usage():
-    print("Usage: python pmaCounterGraphing.py <path_to_csv> [<COMPARISON_VL>]")
-    print("  <path_to_csv>: Path to the PMA counter CSV file to parse")
-    print("  [COMPARISON_VL]: (Optional) VL to use for comparison graphs (default: 'Overall')")
-    sys.exit(1)
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Parse a PMA counter CSV and graph it')
+    parser.add_argument('csv_path', help='Path to the PMA counter CSV file to parse')
+    parser.add_argument('comparison_vl', nargs='?', default=None,
+                        help="VL to use for comparison graphs (default: 'Overall')")
+    parser.add_argument('--mode', choices=('graphs', 'heatmap', 'triage'), default='graphs',
+                        help="'graphs': PNGs per GUID/port (default); 'heatmap': one fabric-wide "
+                             "heatmap per attribute and VL; 'triage': rank congested ports and "
+                             "graph only the top ones")
+    parser.add_argument('--top', type=int, default=DEFAULT_TRIAGE_TOP, metavar='K',
+                        help=f'Triage mode: number of (GUID, port, VL) series to report (default: {DEFAULT_TRIAGE_TOP})')
+    parser.add_argument('--sort-congestion', nargs='?', const=DEFAULT_HEATMAP_SORT_ATTRIBUTE, default=None,
+                        metavar='ATTR',
+                        help=f'Heatmap mode: order rows by the total of ATTR, most congested first '
+                             f'(default ATTR: {DEFAULT_HEATMAP_SORT_ATTRIBUTE})')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse the CSV in bounded memory and graph each GUID as it completes')
+    parser.add_argument('--follow', action='store_true',
+                        help='Tail a CSV that is still being written and keep the top congested ports graph, '
+                             f'a fabric heatmap and the triage table in <output_dir>/{LIVE_DIR} up to date')
+    parser.add_argument('--refresh', type=float, default=DEFAULT_FOLLOW_INTERVAL, metavar='SECONDS',
+                        help=f'With --follow, seconds between refreshes (default: {DEFAULT_FOLLOW_INTERVAL:g})')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Render graphs on N worker processes (default: 1, serial)')
+    parser.add_argument('--derived', action='store_true',
+                        help='Also graph per-interval deltas, rates and utilization ratios')
+    parser.add_argument('--interval', type=float, default=None, metavar='SECONDS',
+                        help='Seconds between samples (time_between_queries), enables per-second rates; '
+                             'CSVs with timestamp columns use the measured intervals by default')
+    parser.add_argument('--iteration-axis', action='store_true',
+                        help='Plot against the iteration number even when the CSV has timestamp columns')
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f'Always parse the CSV text; do not read or write the <csv>{PARSE_CACHE_SUFFIX} sidecar')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-render every PNG even if the render manifest says it is unchanged')
+    parser.add_argument('--memory-budget', type=float, default=DEFAULT_STREAM_MEMORY_BUDGET_MB,
+                        metavar='MB',
+                        help=f'Memory budget for --stream in MB (default: {DEFAULT_STREAM_MEMORY_BUDGET_MB})')
+    parser.add_argument('--profile', action='store_true', default=config.profile,
+                        help=f'Print per-stage timings and peak RSS at the end (also {PROFILE_ENV_VAR}=1)')
+    parser.add_argument('--trace', default=config.trace_path, metavar='FILE',
+                        help=f'Write a Chrome trace-event JSON of every profiled call to FILE '
+                             f'(implies --profile, also {TRACE_ENV_VAR}=FILE)')
+    args = parser.parse_args(argv)
+    if args.stream and args.mode != 'graphs':
+        parser.error(f'--mode {args.mode} needs every GUID at once and cannot be combined with --stream')
+    if args.follow and (args.stream or args.mode != 'graphs'):
+        parser.error('--follow draws its own summary and cannot be combined with --stream or --mode')
+    if args.refresh <= 0:
+        parser.error('--refresh must be positive')
+    if args.top < 1:
+        parser.error('--top must be at least 1')
+    return args
 
 # Example usage and testing
 if __name__ == "__main__":
-    # Take CSV file path from command line argument
-    if len(sys.argv) < 2:
-        print_usage()
-
-    csv_path = sys.argv[1]
+    args = _parse_args()
+    csv_path = args.csv_path
+    config.jobs = args.jobs
+    config.incremental = not args.force
+    config.derived_metrics = args.derived or args.interval is not None
+    config.sample_interval = args.interval
+    config.time_axis = not args.iteration_axis
+    config.profile = args.profile
+    config.trace_path = args.trace
+    _configure_profiling()
     try:
-        pma_data, available_attributes = parse_pma_csv(csv_path)
-        print(f"Successfully parsed {csv_path}")
-        print(f"Available attributes: {available_attributes}")
-        
-        # Set and validate comparison_vl immediately after data parsing
-        if len(sys.argv) >= 3:
+        if args.comparison_vl is not None:
             # Set comparison_vl from command line
-            config.comparison_vl = sys.argv[2]
+            config.comparison_vl = args.comparison_vl
             print(f"COMPARISON_VL set to: {config.comparison_vl}")
+        
+        if args.follow:
+            follow_pma_csv(csv_path, args.refresh, args.top)
+        elif args.stream:
+            available_attributes = create_graphs_streaming(csv_path, args.memory_budget)
+            print(f"Available attributes: {available_attributes}")
+        else:
+            pma_data, available_attributes = parse_pma_csv(csv_path, use_cache=not args.no_cache)
+            print(f"Successfully parsed {csv_path}")
+            if config.derived_metrics:
+                pma_data = add_derived_metrics(pma_data, _sample_interval(pma_data))
+                available_attributes = counter_attributes(pma_data.attributes)
+            print(f"Available attributes: {available_attributes}")
             
-            # Validate immediately and fallback if necessary
-            if not _validate_comparison_vl(pma_data, config.comparison_vl):
+            # Validate comparison_vl immediately after data parsing and fallback if necessary
+            if args.comparison_vl is not None and not _validate_comparison_vl(pma_data, config.comparison_vl):
                 logger.warning(f"Comparison VL '{config.comparison_vl}' not found in data. Using 'Overall' as fallback.")
                 config.comparison_vl = "Overall"
-        
-        print(f"Using comparison VL: {config.comparison_vl}")
-        
-        guid_count = len(pma_data)
-        print(f"Found {guid_count} GUIDs in dataset")
-        
-        create_graphs(pma_data, available_attributes)
+            
+            print(f"Using comparison VL: {config.comparison_vl}")
+            
+            guid_count = len(pma_data)
+            print(f"Found {guid_count} GUIDs in dataset")
+            
+            if args.mode == 'heatmap':
+                create_heatmaps(pma_data, sort_attribute=args.sort_congestion)
+            elif args.mode == 'triage':
+                triage_congestion(pma_data, available_attributes, args.top)
+            else:
+                create_graphs(pma_data, available_attributes)
         print(f"Graph generation completed successfully!")
         
+        if _profiler.enabled:
+            print(_profiler.summary())
+        if config.trace_path:
+            _profiler.write_trace(config.trace_path)
+            print(f"Trace written to {config.trace_path}")
+        
     except FileNotFoundError:
         print(f"Error: File not found: {csv_path}")
         print("Please check the file path and try again.")
@@ -700,4 +3256,3 @@ if __name__ == "__main__":
         print(f"Unexpected error: {str(e)}")
         logger.exception("Unexpected error during execution")
         sys.exit(1)
-
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Synthetic PMA Counter CSV Generator
+
+Writes CSVs in exactly the format produced by
+``pmaCountersFromSwitch.sh data_processing``, so pmaCounterGraphing can be
+exercised and benchmarked at any fabric size without booking the fabric:
+
+    GUID,Description,Port,Iteration,VL,<selected_attributes>
+
+Rows are iteration-major (iteration, switch, ISL port). Each port writes an
+Overall row, one row per VL in the requested range and a VL 15 row. Counters
+are cumulative since the clear done at initialization, and Overall is the sum
+of the VL rows. Congestion counters follow one of PATTERNS.
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from typing import List, Tuple
+import numpy as np
+
+# Attribute list as passed to islCounterCollection (header keeps the ", " separators)
+DEFAULT_ATTRIBUTES = "Xmit Pkts, Rcv Pkts, Xmit Time Cong, Xmit Wait, Rcv Bubble"
+MANAGEMENT_VL = "15"
+SWITCH_PORTS = 48  # Ports per switch; ISLs are numbered within this range
+GUID_PREFIX = 0x0011750102000000
+EDGE_FRACTION = 2 / 3  # Share of switches named/numbered as edge switches
+
+# Packets per sample interval on a busy ISL (log-normal median) and on VL 15
+MEDIAN_PKTS_PER_INTERVAL = 100_000
+MANAGEMENT_PKTS_PER_INTERVAL = 20
+BACKGROUND_CONGESTION = 0.001
+
+# Congestion counter increments per transmitted packet at full congestion
+CONGESTION_SCALE = {
+    "Xmit Wait": 0.5,
+    "Xmit Time Cong": 0.2,
+    "Rcv Bubble": 0.05,
+    "Xmit Wait Data": 0.4,
+    "Xmit Wasted BW": 0.1,
+    "Congestion Discards": 0.0001,
+}
+ERROR_ATTRIBUTES = ("Error Counter Summary",)
+ERROR_EVENTS_PER_INTERVAL = 0.001
+
+# Congestion patterns:
+#   none     - background congestion only
+#   uniform  - mild congestion on every ISL
+#   hotspot  - hot_fraction of the ISLs are heavily congested for the whole run
+#   incast   - every ISL of switch 0 is congested, plus one ISL per other switch
+#   bursty   - ISLs flip between quiet and congested bursts
+PATTERNS = ("none", "uniform", "hotspot", "incast", "bursty")
+HOT_CONGESTION = 0.5
+UNIFORM_CONGESTION = 0.05
+BURST_STOP_PROBABILITY = 0.3
+
+
+@dataclass
+class SyntheticFabric:
+    """Parameters of a generated dataset."""
+    switches: int = 8
+    ports: int = 16  # ISL ports per switch
+    vl_start: int = 0
+    vl_end: int = 3
+    iterations: int = 10
+    attributes: str = DEFAULT_ATTRIBUTES
+    pattern: str = "hotspot"
+    hot_fraction: float = 0.05
+    seed: int = 0
+    attribute_names: List[str] = field(init=False)
+
+    def __post_init__(self):
+        # Same trimming as extract_attributes in pmaCountersFromSwitch.sh
+        self.attribute_names = [attr.strip() for attr in self.attributes.split(',')]
+        if self.switches < 1 or self.ports < 1 or self.iterations < 1:
+            raise ValueError("switches, ports and iterations must be at least 1")
+        if not 0 <= self.vl_start <= self.vl_end < int(MANAGEMENT_VL):
+            raise ValueError(f"VL range must satisfy 0 <= vl_start <= vl_end < {MANAGEMENT_VL}")
+        if self.ports > SWITCH_PORTS:
+            raise ValueError(f"At most {SWITCH_PORTS} ISL ports per switch")
+        if self.pattern not in PATTERNS:
+            raise ValueError(f"Unknown pattern '{self.pattern}', expected one of {', '.join(PATTERNS)}")
+        if not 0 <= self.hot_fraction <= 1:
+            raise ValueError("hot_fraction must be between 0 and 1")
+
+    @property
+    def vls(self) -> List[str]:
+        """VL column values in row order for one port."""
+        return ["Overall"] + [str(vl) for vl in range(self.vl_start, self.vl_end + 1)] + [MANAGEMENT_VL]
+
+    @property
+    def rows(self) -> int:
+        return self.switches * self.ports * len(self.vls) * self.iterations
+
+
+def fabric_layout(fabric: SyntheticFabric) -> Tuple[List[str], List[str], List[List[int]]]:
+    """
+    Switch GUIDs, node descriptions and ISL port numbers.
+
+    Descriptions keep the leading space left by ``awk -F "SW"`` in
+    opa_fabric_switches. Edge switches use their top ports as uplinks and
+    core switches their bottom ports.
+    """
+    n_edge = max(1, int(round(fabric.switches * EDGE_FRACTION))) if fabric.switches > 1 else 1
+    guids, descriptions, isl_ports = [], [], []
+    for s in range(fabric.switches):
+        guids.append(f"0x{GUID_PREFIX + s:016x}")
+        if s < n_edge:
+            descriptions.append(f" edge{s + 1:03d}")
+            isl_ports.append(list(range(SWITCH_PORTS - fabric.ports + 1, SWITCH_PORTS + 1)))
+        else:
+            descriptions.append(f" core{s - n_edge + 1:03d}")
+            isl_ports.append(list(range(1, fabric.ports + 1)))
+    return guids, descriptions, isl_ports
+
+
+class _CongestionModel:
+    """Per-ISL congestion level in [0, 1] for each iteration."""
+    def __init__(self, fabric: SyntheticFabric, rng: np.random.Generator):
+        self.fabric = fabric
+        self.rng = rng
+        shape = (fabric.switches, fabric.ports)
+        self.base = np.full(shape, BACKGROUND_CONGESTION)
+        if fabric.pattern == "uniform":
+            self.base[:] = UNIFORM_CONGESTION
+        elif fabric.pattern == "hotspot":
+            hot = rng.random(shape) < fabric.hot_fraction
+            self.base[hot] = HOT_CONGESTION
+        elif fabric.pattern == "incast":
+            self.base[0, :] = HOT_CONGESTION
+            if fabric.switches > 1:
+                self.base[np.arange(1, fabric.switches), rng.integers(0, fabric.ports, fabric.switches - 1)] = HOT_CONGESTION / 2
+        self.bursting = np.zeros(shape, dtype=bool)
+
+    def level(self) -> np.ndarray:
+        """Congestion level of every (switch, port) for the next iteration."""
+        if self.fabric.pattern != "bursty":
+            return self.base
+        start = self.rng.random(self.bursting.shape) < self.fabric.hot_fraction / 5
+        stop = self.rng.random(self.bursting.shape) < BURST_STOP_PROBABILITY
+        self.bursting = (self.bursting & ~stop) | start
+        return np.where(self.bursting, HOT_CONGESTION, self.base)
+
+
+def _increments(fabric: SyntheticFabric, rng: np.random.Generator, traffic: np.ndarray,
+                congestion: np.ndarray) -> np.ndarray:
+    """
+    Counter increments for one interval, shape (switch, port, VL row, attribute).
+
+    ``traffic`` is the expected packets per interval for each (switch, port,
+    data/management VL); the Overall row (index 0) is filled with the sum.
+    """
+    n_attrs = len(fabric.attribute_names)
+    # Each interval's load varies around the port's mean
+    pkts = rng.poisson(traffic * rng.uniform(0.8, 1.2, traffic.shape[:2])[..., None])
+    out = np.zeros(traffic.shape[:2] + (traffic.shape[2] + 1, n_attrs), dtype=np.int64)
+    for a, attr in enumerate(fabric.attribute_names):
+        if attr in CONGESTION_SCALE:
+            expected = pkts * (CONGESTION_SCALE[attr] * congestion)[..., None]
+            out[..., 1:, a] = rng.poisson(expected)
+        elif attr in ERROR_ATTRIBUTES:
+            out[..., 1:, a] = rng.poisson(ERROR_EVENTS_PER_INTERVAL, pkts.shape)
+        elif attr == "Rcv Pkts":
+            # The far end of the link sends about as much as this end
+            out[..., 1:, a] = rng.poisson(traffic)
+        else:
+            out[..., 1:, a] = pkts
+    out[..., 0, :] = out[..., 1:, :].sum(axis=2)
+    return out
+
+
+def generate_pma_csv(output_path: str, fabric: SyntheticFabric) -> int:
+    """
+    Write a synthetic PMA counter CSV.
+
+    Args:
+        output_path: CSV file to write
+        fabric: Fabric size, VL range, attributes and congestion pattern
+
+    Returns:
+        int: Number of data rows written
+    """
+    rng = np.random.default_rng(fabric.seed)
+    guids, descriptions, isl_ports = fabric_layout(fabric)
+    vls = fabric.vls
+    n_data_vls = len(vls) - 2
+
+    # Mean packets per interval for each (switch, port, VL) excluding Overall
+    port_rate = rng.lognormal(np.log(MEDIAN_PKTS_PER_INTERVAL), 0.5, (fabric.switches, fabric.ports))
+    shares = rng.dirichlet(np.ones(n_data_vls), (fabric.switches, fabric.ports))
+    traffic = np.concatenate([port_rate[..., None] * shares,
+                              np.full((fabric.switches, fabric.ports, 1), MANAGEMENT_PKTS_PER_INTERVAL)],
+                             axis=-1)
+    congestion = _CongestionModel(fabric, rng)
+
+    # Row prefixes in data_processing order: switch, ISL port, then VL rows
+    prefixes = [(f"{guids[s]},{descriptions[s]},{port},", [f",{vl}," for vl in vls])
+                for s in range(fabric.switches) for port in isl_ports[s]]
+
+    totals = np.zeros((fabric.switches, fabric.ports, len(vls), len(fabric.attribute_names)), dtype=np.int64)
+    with open(output_path, 'w', newline='') as out:
+        out.write(f"GUID,Description,Port,Iteration,VL,{fabric.attributes}\n")
+        for i in range(fabric.iterations):
+            totals += _increments(fabric, rng, traffic, congestion.level())
+            cells = totals.reshape(len(prefixes), len(vls), -1).astype(str)
+            lines = []
+            for (port_prefix, vl_parts), port_cells in zip(prefixes, cells):
+                for vl_part, values in zip(vl_parts, port_cells):
+                    lines.append(f"{port_prefix}{i}{vl_part}{','.join(values)}\n")
+            out.write(''.join(lines))
+    return fabric.rows
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Write a synthetic PMA counter CSV in the '
+                                                 'pmaCountersFromSwitch.sh data_processing format')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--switches', type=int, default=8, help='Number of switches (default: 8)')
+    parser.add_argument('--ports', type=int, default=16, help='ISL ports per switch (default: 16)')
+    parser.add_argument('--vl-start', type=int, default=0, help='First data VL (default: 0)')
+    parser.add_argument('--vl-end', type=int, default=3, help='Last data VL (default: 3)')
+    parser.add_argument('--iterations', type=int, default=10, help='Samples per port (default: 10)')
+    parser.add_argument('--attributes', default=DEFAULT_ATTRIBUTES,
+                        help=f'Comma separated counter names (default: "{DEFAULT_ATTRIBUTES}")')
+    parser.add_argument('--pattern', choices=PATTERNS, default='hotspot',
+                        help='Congestion pattern (default: hotspot)')
+    parser.add_argument('--hot-fraction', type=float, default=0.05,
+                        help='Share of ISLs congested by the hotspot/bursty patterns (default: 0.05)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        fabric = SyntheticFabric(args.switches, args.ports, args.vl_start, args.vl_end, args.iterations,
+                                 args.attributes, args.pattern, args.hot_fraction, args.seed)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    rows = generate_pma_csv(args.output, fabric)
+    print(f"Wrote {rows} rows ({fabric.switches} switches x {fabric.ports} ports x "
+          f"{len(fabric.vls)} VL rows x {fabric.iterations} iterations) to {args.output}")
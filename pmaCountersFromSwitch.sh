@@ -11,9 +11,16 @@ declare -A sw_lids
 declare -A query_out
 declare -A node_desc
 switches=""
+TOPOLOGY_TOOL="$(dirname "$(realpath "${BASH_SOURCE[0]}")")/fabricTopology.py"
 iterations=0
 vl_mask=0
 opa_fabric_switches() {
+    # Served from the topology snapshot when possible; discovered below otherwise
+    local topology
+    if topology="$(python3 "$TOPOLOGY_TOOL" shell 2>/dev/null)"; then
+        eval "$topology"
+        return
+    fi
     opareport_out="$(opareport -q)"
     switches="$(grep "SW" <<< "$opareport_out" | awk '{print $1}' | tr '\n' ' ')"
     isl_list="$(opareport -q -o islinks)"
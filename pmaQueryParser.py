@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Single-Pass opapmaquery Output Parser
+
+Parses ``opapmaquery -o getdatacounters`` responses into one counter table
+per section in a single pass over the lines:
+
+    {"overall": {"Xmit Pkts": "1234", ...}, "0": {...}, ..., "15": {...}}
+
+The tables reproduce the text matching of extract_attributes in
+pmaCountersFromSwitch.sh, which forks echo/awk/grep/sed for every
+attribute x VL x port x iteration, so CSVs written from them are
+byte-identical to ``data_processing`` output.
+
+Run as a script it re-parses a raw output file (``SWITCH_COUNTER_RAW``,
+the optional last argument of islCounterCollection) into the standard
+CSV, e.g. to pick other attributes after the run:
+
+    ./pmaQueryParser.py rawOut.txt "Xmit Pkts, Rcv Pkts, Xmit Wait" pmaOut.csv
+"""
+
+import argparse
+import re
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+OVERALL = "overall"  # Section before the first "VL Number" line
+MANAGEMENT_VL = "15"
+RAW_HEADER = "Raw query outputs"
+
+RAW_CHUNK_CHARS = 16 << 20  # Raw output read per chunk when re-parsing
+
+# One line per match: the text before the first whitespace-delimited all-digit field
+# (the value awk picks in extract_attributes) and that field, if there is one
+_COUNTER_LINE = re.compile(r'^[ \t]*(.*?)[ \t]*(?:(?<![^ \t\n])([0-9]+)(?![^ \t\n]).*)?$', re.M)
+_RAW_BLOCK = re.compile(r'\n===== Switch: (\S*) Port: (\S*) Iteration: (\d+)'
+                        r'(?: Sample: (\S+) Start: (\S+) End: (\S+))? =====(?=\n|\Z)')
+
+# Extra CSV columns written by pmaCounterCollector --timestamps, in Unix seconds: the
+# sample's scheduled time (shared by every port) and the start/end of the port's query
+TIMESTAMP_COLUMNS = ("Sample Time", "Query Start", "Query End")
+
+CounterTable = Dict[str, Dict[str, Optional[str]]]
+BlockKey = Tuple[str, str, int]  # (switch GUID, port, iteration)
+SampleTimes = Tuple[float, float, float]  # TIMESTAMP_COLUMNS values
+
+
+def split_sections(query_data: str) -> Dict[str, str]:
+    """
+    Split a getdatacounters response into {section: text} at its "VL Number" lines.
+
+    Every section's text starts with a newline. Like the awk filters in
+    extract_attributes, only the first run of a VL is kept; a VL number
+    that reappears after another VL is ignored.
+    """
+    sections = {}
+    key = OVERALL
+    texts = []
+    pos = 0
+    query_data = "\n" + query_data
+    while True:
+        found = query_data.find("VL Number", pos)
+        if found < 0:
+            texts.append(query_data[pos:])
+            break
+        start = query_data.rfind("\n", 0, found)
+        end = query_data.find("\n", found)
+        if end < 0:
+            end = len(query_data)
+        texts.append(query_data[pos:start])
+        fields = query_data[start:end].split()
+        number = fields[2] if len(fields) > 2 else ""
+        if number != key:
+            if key is not None:
+                sections[key] = "".join(texts)
+            key = None if number in sections else number
+            texts = []
+        pos = end
+    if key is not None:
+        sections[key] = "".join(texts)
+    return sections
+
+
+def parse_getdatacounters(query_data: str) -> CounterTable:
+    """
+    Parse one port's getdatacounters response.
+
+    Returns {section: {counter: value}} with "overall" for the lines before
+    the first "VL Number" line and the VL number for each VL section. A
+    counter's name is its line up to the first all-digit field and its
+    value is that field (None if the line has none); only the first line
+    of each name is kept, as ``head -1`` does.
+    """
+    table = {}
+    for key, text in split_sections(query_data).items():
+        section = table[key] = {}
+        for name, value in _COUNTER_LINE.findall(text):
+            if name not in section and (name or value):
+                section[name] = value or None
+    return table
+
+
+def attribute_names(selected_attributes: str) -> List[str]:
+    """Split an islCounterCollection attribute list like ``IFS=',' read -ra`` plus trimming."""
+    names = selected_attributes.split(',')
+    if names and names[-1] == "":
+        names.pop()
+    return [name.strip() for name in names]
+
+
+def counter_value(section: Dict[str, Optional[str]], attribute: str) -> str:
+    """
+    Value of ``attribute`` in one section, "0" when missing.
+
+    Like ``grep -E "^[[:space:]]*${attr}" | head -1`` the first counter
+    whose name starts with the attribute wins, e.g. "Xmit Wait" reads an
+    earlier "Xmit Wait Data" line.
+    """
+    for name, value in section.items():
+        if name.startswith(attribute):
+            return value or "0"
+    return "0"
+
+
+class AttributeExtractor:
+    """
+    Values of a fixed attribute list, formatted as extract_attributes prints them.
+
+    Builds the CSV without a full counter table: one regex pass per
+    response finds the VL headers and the lines starting with a selected
+    attribute, so only those lines reach Python. Same results as
+    section_values on parse_getdatacounters' table, several times faster.
+    """
+    def __init__(self, attributes: List[str]):
+        self.attributes = attributes
+        # Longest first, so the captured alternative is the longest attribute the line starts
+        # with; every attribute that is a prefix of it matches the same line
+        alternatives = sorted(set(attributes), key=len, reverse=True)
+        self._covers = {alt: [i for i, attr in enumerate(attributes) if alt.startswith(attr)]
+                        for alt in alternatives}
+        # Usually the value directly follows the name and is captured as such; otherwise the
+        # rest of the line is captured and searched in Python
+        self._lines = re.compile(r'\n[ \t]*(?:(VL Number[^\n]*)|(' + "|".join(map(re.escape, alternatives)) +
+                                 r')(?:[ \t]+([0-9]+)(?![^ \t\n])|([^\n]*)))')
+        # An empty attribute matches every line and a digit in a name can be its value: use the table
+        self._use_table = any(attr == "" or re.search(r'[0-9]', attr) for attr in attributes)
+
+    @staticmethod
+    def _value(tail: str) -> str:
+        """First all-digit field of a line, given the text after the attribute name."""
+        fields = tail.split()
+        # The attribute may end inside a field; its remainder is not a separate field
+        start = 0 if tail[:1] in (" ", "\t") else 1
+        for value in fields[start:]:
+            if value.isdigit() and value.isascii():
+                return value
+        return "0"
+
+    def section_values(self, query_data: str) -> Dict[str, str]:
+        """{section: comma separated values} for one getdatacounters response."""
+        if self._use_table:
+            return section_values(parse_getdatacounters(query_data), self.attributes)
+        result = {}
+        key = OVERALL
+        values = [None] * len(self.attributes)
+        missing = len(values)
+        headers = 0
+        for header, alt, value, tail in self._lines.findall("\n" + query_data):
+            if header:
+                headers += 1
+                fields = header.split()
+                number = fields[2] if len(fields) > 2 else ""
+                if number != key:
+                    if key is not None:
+                        result[key] = ",".join([value or "0" for value in values])
+                    # A VL section that reappears later is never read by the awk filter
+                    key = None if number in result else number
+                    values = [None] * len(self.attributes)
+                    missing = len(values)
+            elif missing and key is not None:
+                for i in self._covers[alt]:
+                    if values[i] is None:
+                        values[i] = value = value or self._value(tail)
+                        missing -= 1
+        if key is not None:
+            result[key] = ",".join([value or "0" for value in values])
+        if headers != query_data.count("VL Number"):
+            # "VL Number" in the middle of a line still starts a section for awk
+            return section_values(parse_getdatacounters(query_data), self.attributes)
+        return result
+
+
+def section_values(table: CounterTable, attributes: List[str]) -> Dict[str, str]:
+    """Comma separated values of ``attributes`` for every section of a parsed table."""
+    return {vl: ",".join([counter_value(section, attr) for attr in attributes]) for vl, section in table.items()}
+
+
+def csv_vls(data_vl_start: int, data_vl_end: int) -> List[str]:
+    """Sections written for every port by data_processing, in row order."""
+    return [OVERALL] + [str(vl) for vl in range(data_vl_start, data_vl_end + 1)] + [MANAGEMENT_VL]
+
+
+class PmaCsvFormatter:
+    """
+    Rows of the processed CSV, one iteration at a time, in data_processing's order.
+
+    Args:
+        selected_attributes: Attribute list, written verbatim in the header
+        switches: Switch GUIDs in row order
+        descriptions: Node description of each switch
+        isl_ports: ISL ports of each switch in row order
+        vls: Sections per port, see csv_vls
+        timestamps: Append the TIMESTAMP_COLUMNS to every row
+    """
+    def __init__(self, selected_attributes: str, switches: List[str], descriptions: Dict[str, str],
+                 isl_ports: Dict[str, List[str]], vls: List[str], timestamps: bool = False):
+        self.header = f"GUID,Description,Port,Iteration,VL,{selected_attributes}"
+        if timestamps:
+            self.header += "," + ",".join(TIMESTAMP_COLUMNS)
+        self.header += "\n"
+        self.timestamps = timestamps
+        self.switches = switches
+        self.descriptions = descriptions
+        self.isl_ports = isl_ports
+        self._zeros = ",".join("0" for _ in attribute_names(selected_attributes))
+        self._vl_columns = [(vl, "Overall" if vl == OVERALL else vl) for vl in vls]
+
+    def iteration_rows(self, iteration: int, port_values: Callable[[BlockKey], Optional[Dict[str, str]]],
+                       port_times: Optional[Callable[[BlockKey], Optional[SampleTimes]]] = None) -> str:
+        """
+        All rows of one iteration.
+
+        ``port_values`` returns the section_values of the response for a
+        (switch, port, iteration), or None if there is none. With
+        timestamps, ``port_times`` returns its SampleTimes (the columns
+        are left empty where it returns None).
+        """
+        rows = []
+        suffix = "\n"
+        for switch in self.switches:
+            description = self.descriptions.get(switch, "")
+            for port in self.isl_ports[switch]:
+                key = (switch, port, iteration)
+                prefix = f"{switch},{description},{port},{iteration},"
+                if self.timestamps:
+                    times = port_times(key) if port_times else None
+                    suffix = f",{format_times(times)}\n" if times else "," * (len(TIMESTAMP_COLUMNS) - 1) + ",\n"
+                values = port_values(key)
+                if values is None:
+                    # get_port_attributes echoes its error message into every row
+                    missing = f"No data found for {switch} port {port} iteration {iteration}"
+                    rows.extend([f"{prefix}{column},{missing}{suffix}" for _, column in self._vl_columns])
+                else:
+                    rows.extend([f"{prefix}{column},{values.get(vl, self._zeros)}{suffix}"
+                                 for vl, column in self._vl_columns])
+        return "".join(rows)
+
+
+def format_times(times: SampleTimes) -> str:
+    """SampleTimes as comma separated Unix seconds with microsecond resolution."""
+    return ",".join(f"{t:.6f}" for t in times)
+
+
+def write_pma_csv(output_file: str, formatter: PmaCsvFormatter, iterations: int,
+                  port_values: Callable[[BlockKey], Optional[Dict[str, str]]],
+                  port_times: Optional[Callable[[BlockKey], Optional[SampleTimes]]] = None) -> None:
+    """Write the processed CSV for ``iterations`` iterations, see PmaCsvFormatter.iteration_rows."""
+    with open(output_file, 'w') as out:
+        out.write(formatter.header)
+        for i in range(iterations):
+            out.write(formatter.iteration_rows(i, port_values, port_times))
+
+
+def raw_block(switch: str, port: str, iteration: int, query_data: str, times: Optional[SampleTimes] = None) -> str:
+    """
+    One response as the shell script writes it to the raw output file.
+
+    With ``times`` the header also carries the SampleTimes, which
+    iter_raw_blocks reads back.
+    """
+    stamp = ""
+    if times:
+        stamp = " Sample: {} Start: {} End: {}".format(*format_times(times).split(","))
+    return f"===== Switch: {switch} Port: {port} Iteration: {iteration}{stamp} =====\n{query_data}\n\n"
+
+
+def switch_descriptions(report: str) -> Dict[str, str]:
+    """Switch GUID -> node description from ``opareport -q`` output (text after "SW")."""
+    descriptions = {}
+    for line in report.splitlines():
+        if "SW" in line and line.split():
+            descriptions.setdefault(line.split()[0], line.split("SW")[1])
+    return descriptions
+
+
+def iter_raw_blocks(raw: TextIO,
+                    chunk_chars: int = RAW_CHUNK_CHARS) -> Iterator[Tuple[BlockKey, Optional[SampleTimes], str]]:
+    """
+    Yield ((switch, port, iteration), times, response) for each block of a raw output file.
+
+    ``times`` are the SampleTimes from a timestamped header (see
+    raw_block), None for the shell script's headers.
+
+    The file is read in chunks of whole lines and split on the block
+    headers by regex. The shell script writes each response with its
+    trailing newlines stripped, followed by an empty line; an empty
+    response is "".
+    """
+    key = times = None
+    parts = []
+    # Every chunk starts with the newline ending the previous line, so the header regex
+    # can anchor on it
+    pending = "\n"
+    while True:
+        chunk = raw.read(chunk_chars)
+        text = pending + chunk
+        if chunk:
+            # Only split complete lines, a header may straddle the chunk boundary
+            cut = text.rfind("\n")
+            text, pending = text[:cut], text[cut:]
+        pos = 0
+        for match in _RAW_BLOCK.finditer(text):
+            if key is not None:
+                parts.append(text[pos:match.start()])
+                yield key, times, "".join(parts)[1:-1]
+            key = (match.group(1), match.group(2), int(match.group(3)))
+            times = (float(match.group(4)), float(match.group(5)), float(match.group(6))) if match.group(4) else None
+            parts = []
+            pos = match.end()
+        if key is not None:
+            parts.append(text[pos:])
+        if not chunk:
+            break
+    if key is not None:
+        # The file ends with the last response's newline and the empty line, unless the
+        # collector was killed while writing it
+        text = "".join(parts)[1:]
+        yield key, times, text[:-2] if text.endswith("\n\n") else text.rstrip("\n")
+
+
+def raw_to_csv(raw_file: str, selected_attributes: str, output_file: str,
+               descriptions: Optional[Dict[str, str]] = None,
+               data_vl_start: Optional[int] = None, data_vl_end: Optional[int] = None) -> int:
+    """
+    Re-parse a raw output file into the standard CSV.
+
+    Switch, port and iteration order are taken from the raw file. Without
+    an explicit range the data VLs are those found in the responses
+    (VL 15 aside). Descriptions are not in the raw file; pass them from
+    switch_descriptions or they are left empty. Blocks with timestamped
+    headers add the TIMESTAMP_COLUMNS to the CSV.
+
+    Returns:
+        int: Number of responses parsed
+    """
+    extractor = AttributeExtractor(attribute_names(selected_attributes))
+    switches, isl_ports = [], {}
+    values: Dict[BlockKey, Optional[Dict[str, str]]] = {}
+    block_times: Dict[BlockKey, SampleTimes] = {}
+    iterations = 0
+    data_vls = set()
+    with open(raw_file, 'r') as raw:
+        for (switch, port, i), times, query_data in iter_raw_blocks(raw):
+            ports = isl_ports.get(switch)
+            if ports is None:
+                switches.append(switch)
+                ports = isl_ports[switch] = []
+            if port not in ports:
+                ports.append(port)
+            iterations = max(iterations, i + 1)
+            if times:
+                block_times[(switch, port, i)] = times
+            if query_data:
+                # Only the formatted values are kept, not the whole response
+                port_values = values[(switch, port, i)] = extractor.section_values(query_data)
+                data_vls.update(vl for vl in port_values if vl.isdigit() and vl != MANAGEMENT_VL)
+            else:
+                values[(switch, port, i)] = None
+
+    if data_vl_start is None:
+        data_vl_start = min((int(vl) for vl in data_vls), default=0)
+    if data_vl_end is None:
+        data_vl_end = max((int(vl) for vl in data_vls), default=data_vl_start - 1)
+    formatter = PmaCsvFormatter(selected_attributes, switches, descriptions or {}, isl_ports,
+                                csv_vls(data_vl_start, data_vl_end), timestamps=bool(block_times))
+    write_pma_csv(output_file, formatter, iterations, values.get, block_times.get)
+    return len(values)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Re-parse a pmaCountersFromSwitch raw output file into the '
+                                                 'standard PMA counter CSV')
+    parser.add_argument('raw_file', help='Raw query outputs (SWITCH_COUNTER_RAW)')
+    parser.add_argument('selected_attributes', help='Comma separated counter names, e.g. "Xmit Pkts, Xmit Wait"')
+    parser.add_argument('output_file', help='CSV to write')
+    parser.add_argument('--report', default=None, metavar='FILE',
+                        help="Saved 'opareport -q' output to take switch descriptions from "
+                             "(default: empty descriptions)")
+    parser.add_argument('--vl-start', type=int, default=None,
+                        help='First data VL (default: lowest VL in the raw file)')
+    parser.add_argument('--vl-end', type=int, default=None,
+                        help='Last data VL (default: highest VL in the raw file other than 15)')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        descriptions = None
+        if args.report:
+            with open(args.report, 'r') as report:
+                descriptions = switch_descriptions(report.read())
+        count = raw_to_csv(args.raw_file, args.selected_attributes, args.output_file, descriptions,
+                           args.vl_start, args.vl_end)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Parsed {count} responses from {args.raw_file} into {args.output_file}")
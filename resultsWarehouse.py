@@ -0,0 +1,706 @@
+#!/usr/bin/env python3
+"""
+Protofat Results Warehouse
+
+Every benchmark script leaves its results in ${LOGDIR}/${IDENTIFIER}/
+(see set_logs in util.sh), one file set per TESTID:
+
+    ${TESTID}-run.log        run metadata in its first two lines, then the output
+    ${TESTID}-summary.csv    init_host,dest_host,bw per node pair
+    ${TESTID}-summary.json   GPCNET tables (parse_gpcnet.py)
+    ${TESTID}-totaltable.csv Size plus one bandwidth column per node pair (OSU)
+    ${TESTID}-swcnt.csv      switch port counters (pmaCounterCollector.py)
+    ${TESTID}-niccnt.csv     NIC counter deltas per node (opa_counter)
+
+This tool loads all of them, also from inside .tar.gz/.tgz archives, into
+one SQLite database indexed by run, FM algorithm, node pair, message size
+and switch port. Ingest is incremental: files whose size and mtime are
+unchanged since the last ingest are skipped, changed files are replaced.
+
+    ./resultsWarehouse.py ingest ${LOGDIR}
+    ./resultsWarehouse.py runs --benchmark OSUMB
+    ./resultsWarehouse.py compare bw --size 262144
+    ./resultsWarehouse.py compare gpcnet --name "RR Two-sided BW (131072 B)" --metric Avg
+    ./resultsWarehouse.py sql "SELECT fm_algo, COUNT(*) FROM runs GROUP BY fm_algo"
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import sys
+import tarfile
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from parse_gpcnet import GPCNET_NAME, PER_TEST_INFO, UNITS_HEADER, _parse_lines, parse_value
+from pmaQueryParser import TIMESTAMP_COLUMNS
+
+# Configure logging
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_ENV_VAR = "PROTOFAT_RESULTS_DB"
+DEFAULT_DB = "protofat_results.sqlite"
+TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar")
+
+# File name suffix after ${TESTID} -> kind, see set_logs in util.sh
+FILE_KINDS = {
+    "-run.log": "run_log",
+    "-summary.csv": "summary",
+    "-summary.json": "gpcnet_json",
+    "-totaltable.csv": "totaltable",
+    "-swcnt.csv": "swcnt",
+    "-niccnt.csv": "niccnt",
+}
+# Message size the benchmark script greps for the summary.csv bandwidth
+SUMMARY_MSG_SIZES = {"OSUMB": 262144, "UNIBAND": 2097152}
+
+# ${COMPILER}_${MPI}-${NAME}-${FM_ALGO}-${THEDATE}, THEDATE as date +'%m-%d_%H-%M'
+_IDENTIFIER = re.compile(r'^(?P<compiler>[^_]+)_(?P<mpi>[^-]+)-(?P<benchmark>.+)-(?P<fm_algo>[^-]+)'
+                         r'-(?P<date>\d\d-\d\d_\d\d-\d\d)$')
+
+# config_string keys of set_logs -> runs columns
+RUN_COLUMNS = {
+    "COMPILER": "compiler",
+    "COMPILER_VER": "compiler_ver",
+    "MPI": "mpi",
+    "MPI_VER": "mpi_ver",
+    "HFI": "hfi",
+    "JOBID": "jobid",
+    "NODELIST": "nodelist",
+    "NNODES": "nnodes",
+    "PROCS_PER_NODE": "procs_per_node",
+    "OFA_OPA_Stack": "opa_stack",
+    "OPA_FM": "opa_fm",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    run_key TEXT NOT NULL UNIQUE,  -- IDENTIFIER/TESTID
+    identifier TEXT, testid TEXT, benchmark TEXT, test TEXT, date TEXT, fm_algo TEXT,
+    compiler TEXT, compiler_ver TEXT, mpi TEXT, mpi_ver TEXT, hfi TEXT, jobid TEXT, nodelist TEXT,
+    nnodes INTEGER, procs_per_node INTEGER, opa_stack TEXT, opa_fm TEXT,
+    metadata TEXT  -- JSON of every config_string entry
+);
+CREATE TABLE IF NOT EXISTS files (
+    file_id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,  -- archive members as archive.tar.gz:member
+    kind TEXT, size INTEGER, mtime REAL,
+    run_id INTEGER REFERENCES runs(run_id),
+    rows INTEGER, ingested REAL
+);
+CREATE TABLE IF NOT EXISTS pair_bw (
+    file_id INTEGER, run_id INTEGER,
+    init_host TEXT, dest_host TEXT,
+    msg_size INTEGER,  -- NULL if the summary's message size is unknown
+    bw REAL,
+    source TEXT  -- summary or totaltable
+);
+CREATE TABLE IF NOT EXISTS switch_ports (
+    file_id INTEGER, run_id INTEGER,
+    guid TEXT, description TEXT, port INTEGER, vl TEXT, attribute TEXT,  -- vl 0..15 or Overall
+    total REAL,  -- sum of the per-iteration increases
+    peak REAL,  -- largest single-iteration increase
+    samples INTEGER
+);
+CREATE TABLE IF NOT EXISTS nic_counters (
+    file_id INTEGER, run_id INTEGER,
+    block INTEGER,  -- opa_counter output appended to the file, in order
+    node TEXT, counter TEXT, value REAL
+);
+CREATE TABLE IF NOT EXISTS gpcnet (
+    file_id INTEGER, run_id INTEGER,
+    test TEXT, tbl TEXT, name TEXT, metric TEXT, value REAL, unit TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_fm_algo ON runs(fm_algo, benchmark);
+CREATE INDEX IF NOT EXISTS runs_benchmark ON runs(benchmark, date);
+CREATE INDEX IF NOT EXISTS pair_bw_run ON pair_bw(run_id);
+CREATE INDEX IF NOT EXISTS pair_bw_pair ON pair_bw(init_host, dest_host);
+CREATE INDEX IF NOT EXISTS pair_bw_size ON pair_bw(msg_size, run_id);
+CREATE INDEX IF NOT EXISTS pair_bw_file ON pair_bw(file_id);
+CREATE INDEX IF NOT EXISTS switch_ports_run ON switch_ports(run_id);
+CREATE INDEX IF NOT EXISTS switch_ports_port ON switch_ports(guid, port);
+CREATE INDEX IF NOT EXISTS switch_ports_file ON switch_ports(file_id);
+CREATE INDEX IF NOT EXISTS nic_counters_run ON nic_counters(run_id);
+CREATE INDEX IF NOT EXISTS nic_counters_node ON nic_counters(node);
+CREATE INDEX IF NOT EXISTS nic_counters_file ON nic_counters(file_id);
+CREATE INDEX IF NOT EXISTS gpcnet_run ON gpcnet(run_id);
+CREATE INDEX IF NOT EXISTS gpcnet_name ON gpcnet(name, metric);
+CREATE INDEX IF NOT EXISTS gpcnet_file ON gpcnet(file_id);
+"""
+DATA_TABLES = ("pair_bw", "switch_ports", "nic_counters", "gpcnet")
+
+# What compare can aggregate: pair bandwidth, GPCNET cells, switch port and NIC counters
+COMPARE_TARGETS = ("bw", "gpcnet", "switch", "nic")
+
+Row = Tuple[Any, ...]
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open (creating if needed) the warehouse database."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def file_kind(name: str) -> Optional[Tuple[str, str]]:
+    """
+    Kind and TESTID of a result file name.
+
+    Returns:
+        (kind, testid), or None if the name is not a set_logs result file
+    """
+    base = os.path.basename(name)
+    for suffix, kind in FILE_KINDS.items():
+        if base.endswith(suffix) and len(base) > len(suffix):
+            return kind, base[:-len(suffix)]
+    return None
+
+
+def identifier_metadata(identifier: str) -> Dict[str, str]:
+    """runs columns encoded in an IDENTIFIER directory name; empty if it does not match."""
+    match = _IDENTIFIER.match(identifier)
+    return match.groupdict() if match else {}
+
+
+def parse_run_header(lines: Sequence[str]) -> Dict[str, Any]:
+    """
+    Run metadata from the first two lines of a run log.
+
+    Line 1 is "$NAME - $THEDATE - $FM_ALGO - $TESTID", line 2 set_logs'
+    config_string ("$NAME: $TEST - COMPILER: ... - NODELIST: ... - OPA_FM: ...").
+
+    Returns:
+        runs columns plus "metadata", a dict of every config_string entry
+    """
+    run = {}
+    if lines:
+        fields = [field.strip() for field in lines[0].split(' - ')]
+        if len(fields) >= 4:
+            run.update(benchmark=fields[0], date=fields[1], fm_algo=fields[2])
+    if len(lines) > 1:
+        metadata = {}
+        for segment in lines[1].split(' - '):
+            key, sep, value = segment.partition(': ')
+            if sep:
+                metadata[key.strip()] = value.strip()
+        if run.get("benchmark") in metadata:
+            run["test"] = metadata[run["benchmark"]]
+        for key, column in RUN_COLUMNS.items():
+            if metadata.get(key):
+                run[column] = metadata[key]
+        run["metadata"] = metadata
+    return run
+
+
+def _split_pair(column: str) -> Tuple[str, str]:
+    """
+    Hosts of a totaltable column named "${hi}-${h}".
+
+    Host names may contain dashes themselves; the column is split at the
+    middle dash, which is right whenever both hosts follow one naming scheme.
+    """
+    dashes = [i for i, char in enumerate(column) if char == '-']
+    if not dashes:
+        return column, ""
+    split = dashes[len(dashes) // 2]
+    return column[:split], column[split + 1:]
+
+
+def _number(cell: str) -> float:
+    try:
+        return float(cell)
+    except ValueError:
+        return math.nan
+
+
+def read_summary(f: TextIO, benchmark: str) -> Iterator[Row]:
+    """(init_host, dest_host, msg_size, bw, source) of a summary.csv."""
+    msg_size = SUMMARY_MSG_SIZES.get(benchmark)
+    for record in csv.DictReader(f):
+        if record.get("init_host") and record.get("dest_host"):
+            yield record["init_host"], record["dest_host"], msg_size, _number(record.get("bw") or ""), "summary"
+
+
+def read_totaltable(f: TextIO) -> Iterator[Row]:
+    """(init_host, dest_host, msg_size, bw, source) of every cell of an OSU totaltable.csv."""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if not header:
+        return
+    pairs = [_split_pair(column.strip()) for column in header[1:]]
+    for record in reader:
+        if not record or not record[0].strip().isdigit():
+            continue
+        size = int(record[0])
+        for (init_host, dest_host), cell in zip(pairs, record[1:]):
+            if cell.strip():
+                yield init_host, dest_host, size, _number(cell), "totaltable"
+
+
+def read_swcnt(f: TextIO) -> Iterator[Row]:
+    """
+    (guid, description, port, vl, attribute, total, peak, samples) per
+    switch port counter series of a pmaCounterCollector CSV.
+
+    A sample below its predecessor is a counter reset: the increase is
+    then the sample itself, as in pmaCounterGraphing.
+    """
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if not header:
+        return
+    header = [column.strip() for column in header]
+    columns = [i for i, column in enumerate(header) if i >= 5 and column not in TIMESTAMP_COLUMNS]
+    # (guid, port, vl) -> [description, last samples, totals, peaks, samples], one entry per attribute
+    series: Dict[Tuple[str, str, str], List[Any]] = {}
+    for record in reader:
+        try:
+            values = [float(record[i]) for i in columns]
+        except (IndexError, ValueError):
+            continue
+        key = (record[0].strip(), record[2].strip(), record[4].strip())
+        state = series.get(key)
+        if state is None:
+            series[key] = [record[1].strip(), values, [0.0] * len(columns), [0.0] * len(columns), 1]
+            continue
+        last, totals, peaks = state[1], state[2], state[3]
+        for j, value in enumerate(values):
+            increase = value - last[j] if value >= last[j] else value
+            totals[j] += increase
+            if increase > peaks[j]:
+                peaks[j] = increase
+        state[1] = values
+        state[4] += 1
+    for (guid, port, vl), (description, _, totals, peaks, samples) in series.items():
+        for i, total, peak in zip(columns, totals, peaks):
+            yield guid, description, int(port), vl, header[i], total, peak, samples
+
+
+def read_niccnt(f: TextIO) -> Iterator[Row]:
+    """(block, node, counter, value) of the opa_counter blocks appended to a niccnt.csv."""
+    block = -1
+    header: List[str] = []
+    for line in f:
+        cells = [cell.strip() for cell in line.strip().split(',')]
+        if not cells[0]:
+            continue
+        if cells[0] == "Node":
+            block += 1
+            header = cells[1:]
+            continue
+        for counter, cell in zip(header, cells[1:]):
+            yield max(block, 0), cells[0], counter, _number(cell)
+
+
+def read_gpcnet_log(f: TextIO) -> Iterator[Row]:
+    """(test, table, name, metric, value, unit) of a GPCNET run log; nothing for other benchmarks."""
+    first = f.readline()
+    if first.split(' - ')[0].strip() != GPCNET_NAME:
+        return
+    _, rows = _parse_lines(_prepend(first, f))
+    for row in rows:
+        yield row["test"], row["table"], row["name"], row["metric"], row["value"], row["unit"]
+
+
+def gpcnet_json_run(data: Dict[str, Any]) -> Dict[str, Any]:
+    """runs columns from the test_info of a parse_gpcnet.py JSON result, for runs whose log is gone."""
+    info = {key: value for key, value in data.get("test_info", {}).items() if key not in PER_TEST_INFO}
+    run = {column: info[key] for key, column in RUN_COLUMNS.items() if info.get(key)}
+    run.update(benchmark=GPCNET_NAME, metadata=info)
+    if "date" in info:
+        run["date"] = info["date"]
+    if "FMALGO" in info:
+        run["fm_algo"] = info["FMALGO"]
+    return run
+
+
+def read_gpcnet_json(data: Dict[str, Any]) -> Iterator[Row]:
+    """(test, table, name, metric, value, unit) of a parse_gpcnet.py JSON result."""
+    for test, tables in data.items():
+        if test == "test_info" or not isinstance(tables, dict):
+            continue
+        for table, names in tables.items():
+            for name, cells in names.items():
+                unit = cells.get(UNITS_HEADER, "")
+                for metric, cell in cells.items():
+                    if metric == UNITS_HEADER:
+                        continue
+                    value, suffix = parse_value(cell)
+                    yield test, table, name, metric, value, unit or suffix
+
+
+def _prepend(first: str, rest: Iterable[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+class Warehouse:
+    """Incremental ingest of result files into a warehouse database."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self._run_ids: Dict[str, int] = {}
+        self.ingested = 0
+        self.skipped = 0
+
+    def run_id(self, identifier: str, testid: str) -> int:
+        """Id of the run IDENTIFIER/TESTID, created from the IDENTIFIER's fields if new."""
+        run_key = f"{identifier}/{testid}"
+        if run_key not in self._run_ids:
+            found = self.conn.execute("SELECT run_id FROM runs WHERE run_key = ?", (run_key,)).fetchone()
+            if found:
+                self._run_ids[run_key] = found[0]
+            else:
+                run = identifier_metadata(identifier)
+                columns = ["run_key", "identifier", "testid", *run]
+                cursor = self.conn.execute(
+                    f"INSERT INTO runs ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    (run_key, identifier, testid, *run.values()))
+                self._run_ids[run_key] = cursor.lastrowid
+        return self._run_ids[run_key]
+
+    def _update_run(self, run_id: int, run: Dict[str, Any]) -> None:
+        if not run:
+            return
+        if "metadata" in run:
+            run = {**run, "metadata": json.dumps(run["metadata"])}
+        assignments = ', '.join(f"{column} = ?" for column in run)
+        self.conn.execute(f"UPDATE runs SET {assignments} WHERE run_id = ?", (*run.values(), run_id))
+
+    def _benchmark(self, run_id: int) -> str:
+        return self.conn.execute("SELECT benchmark FROM runs WHERE run_id = ?", (run_id,)).fetchone()[0] or ""
+
+    def _seen(self, path: str, size: int, mtime: float) -> Tuple[bool, Optional[int]]:
+        """Whether path was ingested at this size and mtime, and its file_id if it was ingested at all."""
+        found = self.conn.execute("SELECT file_id, size, mtime FROM files WHERE path = ?", (path,)).fetchone()
+        if found is None:
+            return False, None
+        return (found[1] == size and found[2] == mtime), found[0]
+
+    def ingest_file(self, path: str, name: str, size: int, mtime: float, opener) -> bool:
+        """
+        Load one result file unless it is unchanged since its last ingest.
+
+        Args:
+            path: Key of the file in the files table
+            name: Path whose directory is the IDENTIFIER and basename the result file
+            size, mtime: Change detection stamp
+            opener: Callable returning the file opened as text
+
+        Returns:
+            True if the file was (re)loaded
+        """
+        kind_testid = file_kind(name)
+        if kind_testid is None:
+            return False
+        kind, testid = kind_testid
+        seen, file_id = self._seen(path, size, mtime)
+        if seen:
+            self.skipped += 1
+            return False
+        identifier = os.path.basename(os.path.dirname(name))
+        if kind == "gpcnet_json" and self._has_log(path, name):
+            # The run log holds the same GPCNET tables; the JSON only matters once the log is gone
+            return False
+
+        run_id = self.run_id(identifier, testid)
+        if file_id is not None:
+            for table in DATA_TABLES:
+                self.conn.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+            self.conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+        file_id = self.conn.execute("INSERT INTO files (path, kind, size, mtime, run_id) VALUES (?, ?, ?, ?, ?)",
+                                    (path, kind, size, mtime, run_id)).lastrowid
+
+        with opener() as f:
+            if kind == "run_log":
+                header = [f.readline(), f.readline()]
+                self._update_run(run_id, parse_run_header([line.strip() for line in header if line]))
+                f.seek(0)
+                table, rows = "gpcnet", read_gpcnet_log(f)
+            elif kind == "gpcnet_json":
+                data = json.load(f)
+                self._update_run(run_id, gpcnet_json_run(data))
+                table, rows = "gpcnet", read_gpcnet_json(data)
+            elif kind == "summary":
+                table, rows = "pair_bw", read_summary(f, self._benchmark(run_id))
+            elif kind == "totaltable":
+                table, rows = "pair_bw", read_totaltable(f)
+            elif kind == "swcnt":
+                table, rows = "switch_ports", read_swcnt(f)
+            else:
+                table, rows = "nic_counters", read_niccnt(f)
+            count = self._insert(table, file_id, run_id, rows)
+
+        self.conn.execute("UPDATE files SET rows = ?, ingested = ? WHERE file_id = ?", (count, time.time(), file_id))
+        self.ingested += 1
+        return True
+
+    def _has_log(self, path: str, name: str) -> bool:
+        log = name[:-len("-summary.json")] + "-run.log"
+        if ':' in path and not os.path.exists(path):
+            # Archive member: the log is a sibling member
+            return self.conn.execute("SELECT 1 FROM files WHERE path = ?",
+                                     (path[:path.rindex(':') + 1] + log,)).fetchone() is not None
+        return os.path.exists(log)
+
+    def _insert(self, table: str, file_id: int, run_id: int, rows: Iterable[Row]) -> int:
+        count = 0
+
+        def stamped():
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield (file_id, run_id, *(None if isinstance(v, float) and math.isnan(v) else v for v in row))
+
+        width = {"pair_bw": 5, "switch_ports": 8, "nic_counters": 4, "gpcnet": 6}[table]
+        self.conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * (width + 2))})", stamped())
+        return count
+
+    def ingest_archive(self, archive: str) -> None:
+        """Load the result files inside a tar archive; the archive's stamp covers every member."""
+        stat = os.stat(archive)
+        seen, file_id = self._seen(archive, stat.st_size, stat.st_mtime)
+        if seen:
+            self.skipped += 1
+            return
+        # Recorded even without result members, so e.g. GPCNET artifact tarballs are only read once
+        if file_id is None:
+            self.conn.execute("INSERT INTO files (path, kind, size, mtime, rows, ingested) VALUES (?, 'archive', ?, ?, 0, ?)",
+                              (archive, stat.st_size, stat.st_mtime, time.time()))
+        else:
+            self.conn.execute("UPDATE files SET size = ?, mtime = ?, ingested = ? WHERE file_id = ?",
+                              (stat.st_size, stat.st_mtime, time.time(), file_id))
+        with tarfile.open(archive) as tar:
+            # Logs first, so summary.json members can see whether their log is present
+            members = sorted((m for m in tar if m.isfile() and file_kind(m.name)),
+                             key=lambda m: file_kind(m.name)[0] != "run_log")
+            for member in members:
+                self.ingest_file(f"{archive}:{member.name}", member.name, stat.st_size, stat.st_mtime,
+                                 lambda m=member: io.TextIOWrapper(tar.extractfile(m), errors='replace'))
+
+    def ingest(self, paths: Iterable[str]) -> None:
+        """Load result files, directories (searched recursively) and tar archives in one transaction."""
+        with self.conn:
+            for path in paths:
+                for file in _walk(path):
+                    # A malformed file leaves no partial rows behind and does not stop the ingest
+                    self.conn.execute("SAVEPOINT result_file")
+                    try:
+                        if file.endswith(TAR_SUFFIXES):
+                            self.ingest_archive(file)
+                        else:
+                            stat = os.stat(file)
+                            self.ingest_file(file, file, stat.st_size, stat.st_mtime,
+                                             lambda file=file: open(file, errors='replace'))
+                    except (OSError, ValueError, tarfile.TarError) as e:
+                        self.conn.execute("ROLLBACK TO result_file")
+                        self._run_ids.clear()
+                        logger.warning(f"Skipping {file}: {e}")
+                    self.conn.execute("RELEASE result_file")
+
+
+def _walk(path: str) -> List[str]:
+    """Result files and archives under path, run logs first."""
+    if not os.path.isdir(path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No such file or directory: {path}")
+        return [path]
+    files = []
+    for root, _, names in os.walk(path):
+        files.extend(os.path.join(root, name) for name in names
+                     if file_kind(name) or name.endswith(TAR_SUFFIXES))
+    return sorted(files, key=lambda file: (file_kind(file) or ("",))[0] != "run_log")
+
+
+def compare(conn: sqlite3.Connection, target: str, by: str = "fm_algo", benchmark: Optional[str] = None,
+            size: Optional[int] = None, name: Optional[str] = None, metric: Optional[str] = None,
+            attribute: Optional[str] = None, test: Optional[str] = None,
+            tbl: Optional[str] = None) -> Tuple[List[str], List[Row]]:
+    """
+    Statistics of one result value grouped by a runs column.
+
+    Args:
+        conn: Warehouse database
+        target: bw (pair bandwidth), gpcnet (table cell), switch (port counter total) or nic (counter delta)
+        by: runs column to group by
+        benchmark: Only runs of this benchmark (NAME)
+        size: bw message size; default the summary bandwidth. A pair's totaltable
+            cell is used in preference to its summary row at the same size
+        name, metric: gpcnet row name and column
+        attribute: switch attribute or nic counter name
+        test, tbl: gpcnet test and table, needed when name and metric match more than one
+
+    Returns:
+        (column names, one row per group: group, runs, values, mean, stddev, min, max)
+
+    Raises:
+        ValueError: On a missing filter, or gpcnet cells from several tables or units
+    """
+    if target not in COMPARE_TARGETS:
+        raise ValueError(f"unknown compare target {target}; choose from {', '.join(COMPARE_TARGETS)}")
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+    if by not in columns:
+        raise ValueError(f"cannot group by {by}; choose from {', '.join(sorted(columns))}")
+
+    conditions, params = [], []
+    if target == "bw":
+        table, value = "pair_bw", "bw"
+        if size is None:
+            conditions.append("v.source = 'summary'")
+        else:
+            # OSU summaries repeat the totaltable cell at SUMMARY_MSG_SIZES; count each pair once
+            conditions.append("v.msg_size = ? AND (v.source = 'totaltable' OR NOT EXISTS ("
+                              "SELECT 1 FROM pair_bw t WHERE t.msg_size = v.msg_size AND t.run_id = v.run_id "
+                              "AND t.init_host = v.init_host AND t.dest_host = v.dest_host "
+                              "AND t.source = 'totaltable'))")
+            params.append(size)
+    elif target == "gpcnet":
+        table, value = "gpcnet", "value"
+        for column, wanted in (("name", name), ("metric", metric)):
+            if wanted is None:
+                raise ValueError(f"compare gpcnet needs --{column}")
+            conditions.append(f"v.{column} = ?")
+            params.append(wanted)
+        for column, wanted in (("test", test), ("tbl", tbl)):
+            if wanted is not None:
+                conditions.append(f"v.{column} = ?")
+                params.append(wanted)
+    else:
+        table, value = ("switch_ports", "total") if target == "switch" else ("nic_counters", "value")
+        if attribute is None:
+            raise ValueError(f"compare {target} needs --attribute")
+        conditions.append(f"v.{'attribute' if target == 'switch' else 'counter'} = ?")
+        params.append(attribute)
+    if benchmark is not None:
+        conditions.append("r.benchmark = ?")
+        params.append(benchmark)
+    if target == "gpcnet":
+        # The same row name appears in several tests and tables, in different units
+        matched = conn.execute(f"SELECT DISTINCT v.test, v.tbl, v.unit FROM gpcnet v "
+                               f"JOIN runs r ON r.run_id = v.run_id WHERE {' AND '.join(conditions)}",
+                               params).fetchall()
+        if len({(row[0], row[1]) for row in matched}) > 1 or len({row[2] for row in matched}) > 1:
+            found = ", ".join(f"{row[0]} / {row[1]} ({row[2] or 'no unit'})" for row in sorted(matched))
+            raise ValueError(f"gpcnet {name} {metric} is in several tables or units: {found}; "
+                             f"choose one with --test and --table")
+
+    query = (f"SELECT r.{by}, COUNT(DISTINCT r.run_id), COUNT(v.{value}), AVG(v.{value}), "
+             f"AVG(v.{value} * v.{value}), MIN(v.{value}), MAX(v.{value}) "
+             f"FROM {table} v JOIN runs r ON r.run_id = v.run_id "
+             f"WHERE {' AND '.join(conditions)} GROUP BY r.{by} ORDER BY r.{by}")
+    rows = []
+    for group, runs, count, mean, square, low, high in conn.execute(query, params):
+        stddev = math.sqrt(max(square - mean * mean, 0.0)) if count else None
+        rows.append((group, runs, count, mean, stddev, low, high))
+    return [by, "runs", "values", "mean", "stddev", "min", "max"], rows
+
+
+def list_runs(conn: sqlite3.Connection, benchmark: Optional[str] = None,
+              fm_algo: Optional[str] = None) -> Tuple[List[str], List[Row]]:
+    """Runs with their key metadata and number of ingested files, ordered by run key."""
+    conditions, params = [], []
+    for column, wanted in (("benchmark", benchmark), ("fm_algo", fm_algo)):
+        if wanted is not None:
+            conditions.append(f"r.{column} = ?")
+            params.append(wanted)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    columns = ["run_key", "benchmark", "test", "fm_algo", "date", "compiler", "mpi", "nodelist", "files"]
+    query = (f"SELECT {', '.join('r.' + c for c in columns[:-1])}, COUNT(f.file_id) FROM runs r "
+             f"LEFT JOIN files f ON f.run_id = r.run_id {where} GROUP BY r.run_id ORDER BY r.run_key")
+    return columns, conn.execute(query, params).fetchall()
+
+
+def run_sql(conn: sqlite3.Connection, query: str) -> Tuple[List[str], List[Row]]:
+    """Result of an arbitrary query."""
+    cursor = conn.execute(query)
+    columns = [description[0] for description in cursor.description or ()]
+    return columns, cursor.fetchall()
+
+
+def print_table(columns: List[str], rows: List[Row], as_csv: bool = False) -> None:
+    """Print query results aligned, or as CSV."""
+    if as_csv:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns)
+        writer.writerows(rows)
+        return
+    cells = [[_format(cell) for cell in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def _format(cell: Any) -> str:
+    if cell is None:
+        return ""
+    if isinstance(cell, float):
+        return f"{cell:.6g}"
+    return str(cell)
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Ingest protofat results into an indexed SQLite warehouse '
+                                                 'and query it')
+    parser.add_argument('--db', default=os.environ.get(DB_ENV_VAR, DEFAULT_DB), metavar='FILE',
+                        help=f'Warehouse database (default: ${DB_ENV_VAR} or {DEFAULT_DB})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='Load new and changed result files')
+    ingest.add_argument('paths', nargs='+', help='Result files, LOGDIRs or IDENTIFIER directories, tar archives')
+
+    runs = commands.add_parser('runs', help='List ingested runs')
+    runs.add_argument('--benchmark', default=None, help='Only runs of this benchmark, e.g. OSUMB')
+    runs.add_argument('--fm-algo', default=None, help='Only runs with this FM algorithm')
+    runs.add_argument('--csv', action='store_true', help='Print CSV')
+
+    cmp = commands.add_parser('compare', help='Compare a result value across groups of runs')
+    cmp.add_argument('target', choices=COMPARE_TARGETS,
+                     help='bw: node pair bandwidth, gpcnet: table cell, switch: port counter total, '
+                          'nic: NIC counter delta')
+    cmp.add_argument('--by', default='fm_algo', help='runs column to group by (default: fm_algo)')
+    cmp.add_argument('--benchmark', default=None, help='Only runs of this benchmark')
+    cmp.add_argument('--size', type=int, default=None, help='bw message size (default: the summary bandwidth)')
+    cmp.add_argument('--name', default=None, help='gpcnet row name')
+    cmp.add_argument('--metric', default=None, help='gpcnet column, e.g. Avg')
+    cmp.add_argument('--test', default=None, help='gpcnet test, e.g. network_load_test')
+    cmp.add_argument('--table', default=None, help='gpcnet table within the test')
+    cmp.add_argument('--attribute', default=None, help='switch attribute or nic counter, e.g. XmitWait')
+    cmp.add_argument('--csv', action='store_true', help='Print CSV')
+
+    sql = commands.add_parser('sql', help='Run an SQL query')
+    sql.add_argument('query', help='SQL over the runs, files, pair_bw, switch_ports, nic_counters and gpcnet tables')
+    sql.add_argument('--csv', action='store_true', help='Print CSV')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        conn = connect(args.db)
+        if args.command == 'ingest':
+            warehouse = Warehouse(conn)
+            started = time.perf_counter()
+            warehouse.ingest(args.paths)
+            print(f"Ingested {warehouse.ingested} files, skipped {warehouse.skipped} unchanged "
+                  f"in {time.perf_counter() - started:.2f}s")
+        elif args.command == 'runs':
+            print_table(*list_runs(conn, args.benchmark, args.fm_algo), as_csv=args.csv)
+        elif args.command == 'compare':
+            print_table(*compare(conn, args.target, args.by, args.benchmark, args.size, args.name,
+                                 args.metric, args.attribute, args.test, args.table), as_csv=args.csv)
+        else:
+            print_table(*run_sql(conn, args.query), as_csv=args.csv)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -26,6 +26,9 @@ universal_opts
 : ${PPN:=4}
 : ${NNODES:=$SLURM_NNODES}
 : ${HISET:=''} # SET NODE TO TEST AGAINST ALL OTHER NODES.
+: ${CONCURRENT_PAIRS:=false} # RUN NODE-DISJOINT PAIRWISE PAIRS AT ONCE.
+: ${AVOID_SHARED_LINKS:=false} # ALSO KEEP PAIRS SHARING AN ISL APART.
+: ${MAX_PAIRS:=0} # MOST PAIRS AT ONCE, 0 FOR NO LIMIT.
 
 if [[ $TESTS == 'all' ]]; then TESTS='pairwise,edgewise,crosswise'; fi
 
@@ -68,9 +71,11 @@ if [[ ! ($TESTS =~ 'pairwise') ]]; then
 fi
 
 if [[ $PROFILE == 'true' ]]; then
-    PROFILER=$THISDIR/pmaCountersFromSwitch.sh
+    # Streams each sample to disk, so the samples taken so far survive the job ending first
+    PROFILER="$THISDIR/pmaCounterCollector.py --stream"
     PROFILER_FIELDS="Xmit Pkts, Rcv Pkts, Xmit Time Cong, Xmit Wait, Rcv Bubble"
     $PROFILER 0 3 $PITER $PSPAN "$PROFILER_FIELDS" "$SWITCH_COUNTER_OUT" "$SWITCH_COUNTER_RAW" &
+    PROFILER_PID=$!
 fi
 
 set_mpi_flags $NNODES $PPN
@@ -82,22 +87,36 @@ if [[ $TESTS =~ 'pairwise' ]]; then
     echo FI_OPX_TID_DISABLED=${FI_OPX_TID_DISABLED}
     echo FI_OPX_ROUTE_CONTROL=${FI_OPX_ROUTE_CONTROL}
     nprocs=$(( 2*PPN ))
+    rounds=$(pair_rounds) || { echo "ERROR: cannot schedule the pairwise pairs"; exit 1; }
+    mapfile -t ROUNDS <<< "$rounds"
     echo "init_host,dest_host,bw" > $RUN_RSLT
-    for hi in $HISET; do
-        echo "Uniband Pairwise - $hi"
+    for k in ${!ROUNDS[@]}; do
+        pairs=(${ROUNDS[$k]})
+        echo "Uniband Pairwise - round $(( k+1 ))/${#ROUNDS[@]}: ${#pairs[@]} pairs"
         si=${SECONDS}
-        for h in $NODELIST; do
-            if [[ $h == $hi ]]; then continue; fi
+        pids=()
+        for pair in ${pairs[@]}; do
+            hi=${pair%,*}
+            h=${pair#*,}
             echo "$hi,$h"
-            echo "mpirun -np $nprocs -ppn $PPN -host ${hi},${h} ${CMD} ${CMD_ARGS}" &> $RUN_TMP 
-            mpirun -np $nprocs -ppn $PPN -host "${hi},${h}" ${CMD} ${CMD_ARGS} &>> $RUN_TMP
-            # grep "^      2097152" $RUN_TMP | sed "s/^/$h /g"
-            bw_num=$(awk '/2097152   / {print $3}' $RUN_TMP)
+            pair_tmp=${RUN_TMP}-${hi}-${h}
+            echo "mpirun -np $nprocs -ppn $PPN -host ${hi},${h} ${CMD} ${CMD_ARGS}" &> $pair_tmp
+            mpirun -np $nprocs -ppn $PPN -host "${hi},${h}" ${CMD} ${CMD_ARGS} &>> $pair_tmp &
+            pids+=($!)
+        done
+        wait ${pids[@]}
+        for pair in ${pairs[@]}; do
+            hi=${pair%,*}
+            h=${pair#*,}
+            pair_tmp=${RUN_TMP}-${hi}-${h}
+            # grep "^      2097152" $pair_tmp | sed "s/^/$h /g"
+            bw_num=$(awk '/2097152   / {print $3}' $pair_tmp)
             echo "$hi,$h,$bw_num" >> $RUN_RSLT
-            cat $RUN_TMP >> $RUN_LOG
+            cat $pair_tmp >> $RUN_LOG
+            rm -f $pair_tmp
         done
         sf=$(( SECONDS-si ))
-        echo "$hi took $sf seconds."
+        echo "Round $(( k+1 )) took $sf seconds."
     done
 fi
 
@@ -148,4 +167,5 @@ if [[ $TESTS =~ 'crosswise' ]]; then
     sf=$(( SECONDS-si ))
     echo "CROSSWISE took $sf seconds."
 fi
+stop_profiler
 # $HOME/jp_scripts/get-my-intel-bios.sh
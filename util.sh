@@ -166,8 +166,34 @@ set_mpi_flags() {
     export PROCS=$procs
 }
 
+# Query the fabric topology snapshot (see fabricTopology.py); fails if it cannot be served
+fabric_topology() {
+    python3 ${THISDIR}/fabricTopology.py "$@" 2>/dev/null
+}
+
+# Rounds of a pairwise sweep of HISET against NODELIST (see pairScheduler.py), one line of
+# "init,dest" pairs per round: single pairs unless CONCURRENT_PAIRS=true, and with
+# AVOID_SHARED_LINKS=true no two pairs of a round share an ISL (routes saved next to RUN_LOG)
+pair_rounds() {
+    sched_opts=""
+    if [[ $CONCURRENT_PAIRS == 'true' ]]; then sched_opts+=" --concurrent --max-pairs ${MAX_PAIRS:-0}"; fi
+    if [[ $AVOID_SHARED_LINKS == 'true' ]]; then
+        sched_opts+=" --avoid-shared-links --hfi ${HFI_ID%%,*} --routes ${RUN_LOG%-run.log}-routes.txt"
+    fi
+    python3 ${THISDIR}/pairScheduler.py --nodes $NODELIST --hiset $HISET $sched_opts "$@"
+}
+
+stop_profiler() {
+    # The collector streams each sample to disk; SIGTERM ends it after the sample in progress
+    if [[ -n $PROFILER_PID ]]; then
+        kill -TERM $PROFILER_PID 2> /dev/null
+        wait $PROFILER_PID
+        PROFILER_PID=
+    fi
+}
+
 check_fgar() {
-    SWITCH_LID=$(opaextractlids |& awk -F';' '/SW/ {print $NF}' | head -1)
+    SWITCH_LID=$(fabric_topology switch-lid) || SWITCH_LID=$(opaextractlids |& awk -F';' '/SW/ {print $NF}' | head -1)
     SWITCH_CONFIG=$(opasmaquery -o swinfo -l "$SWITCH_HASH" | grep -m 1 Adapt | cut -d' ' -f3,15)
     if [[ "$SWITCH_CONFIG" =~ "0" ]]; then
         echo "FGAR IS NOT ACTIVE."
@@ -207,7 +233,7 @@ unset_fgar() {
 }
 
 detect_algo() {
-    SWITCH_LID=$(opaextractlids |& awk -F';' '/SW/ {print $NF}' | head -1)
+    SWITCH_LID=$(fabric_topology switch-lid) || SWITCH_LID=$(opaextractlids |& awk -F';' '/SW/ {print $NF}' | head -1)
     SM_QUERY=$(opasmaquery -o sitscvlt -l $SWITCH_LID -m 41)
 
     # Fat tree will give a sitscvlt where everything maps to VL 15 except for SIT0
@@ -259,7 +285,8 @@ set_logs() {
 }
 
 node_by_edge() {
-    nodes_edges=$(opaextractsellinks |& awk -F';' '/hfi1_0/ {print $4,$NF}' | cut -d ' ' -f 1,3 | tr ' ' ',' | sort -t ',' -k2n)
+    nodes_edges=$({ fabric_topology hfi-edges ||
+        opaextractsellinks |& awk -F';' '/hfi1_0/ {print $4,$NF}' | cut -d ' ' -f 1,3 | tr ' ' ','; } | sort -t ',' -k2n)
     edgeq=$(echo "$nodes_edges" | cut -d ',' -f 2 | uniq)
     actualnodes=$(scontrol show hostnames $SLURM_NODELIST)
     exclude_list=""